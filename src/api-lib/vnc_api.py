@@ -15,6 +15,7 @@ import __main__ as main
 import ssl
 import re
 import os
+import uuid
 from urlparse import urlparse
 
 from gen.vnc_api_client_gen import all_resource_type_tuples
@@ -619,11 +620,13 @@ class VncApi(object):
     @check_homepage
     def _objects_list(self, res_type, parent_id=None, parent_fq_name=None,
                       obj_uuids=None, back_ref_id=None, fields=None,
-                      detail=False, count=False, filters=None, shared=False):
+                      detail=False, count=False, filters=None, shared=False,
+                      page_marker=None, page_limit=None):
         return self.resource_list(
                 res_type, parent_id=parent_id, parent_fq_name=parent_fq_name,
                 back_ref_id=back_ref_id, obj_uuids=obj_uuids, fields=fields,
-                detail=detail, count=count, filters=filters, shared=shared)
+                detail=detail, count=count, filters=filters, shared=shared,
+                page_marker=page_marker, page_limit=page_limit)
     # end _objects_list
 
     @check_homepage
@@ -1080,6 +1083,128 @@ class VncApi(object):
         return json.loads(content)['uuid']
     # end ref_relax_for_delete
 
+    def _bulk_pending_collection_ops(self, res_type, obj, obj_uuid,
+                                     operation):
+        # ref and prop-collection updates that _object_create/update send
+        # in requests of their own, as operations following the object's
+        ops = []
+        updates = []
+        for pending_updates in (obj._pending_field_list_updates,
+                                obj._pending_field_map_updates):
+            for prop_name, prop_ops in pending_updates.items():
+                for oper, elem_val, elem_pos in prop_ops:
+                    if isinstance(elem_val, GeneratedsSuper):
+                        elem_val = elem_val.exportDict('')
+                    updates.append({'field': prop_name, 'operation': oper,
+                                    'value': elem_val, 'position': elem_pos})
+        if updates:
+            ops.append({'operation': 'prop-collection-update',
+                        'data': {'uuid': obj_uuid, 'updates': updates}})
+
+        if operation != 'update':
+            # refs of a created object go in its body
+            return ops
+        for ref_name in obj._pending_ref_updates:
+            ref_orig = set(
+                    [(x.get('uuid'), tuple(x.get('to', [])), x.get('attr'))
+                        for x in getattr(obj, '_original_' + ref_name, [])])
+            ref_new = set(
+                    [(x.get('uuid'), tuple(x.get('to', [])), x.get('attr'))
+                        for x in getattr(obj, ref_name, [])])
+            ref_type = ref_name[:-5].replace('_', '-')
+            for ref_oper, refs in (('DELETE', ref_orig - ref_new),
+                                   ('ADD', ref_new - ref_orig)):
+                for ref in refs:
+                    attr = ref[2] if ref_oper == 'ADD' else None
+                    ops.append({'operation': 'ref-update', 'data': json.loads(
+                        json.dumps({'type': res_type, 'uuid': obj_uuid,
+                                    'ref-type': ref_type, 'ref-uuid': ref[0],
+                                    'ref-fq-name': list(ref[1]),
+                                    'operation': ref_oper, 'attr': attr},
+                                   default=self._obj_serializer_diff))})
+        return ops
+    # end _bulk_pending_collection_ops
+
+    @check_homepage
+    def bulk(self, operations, continue_on_error=False):
+        """Apply several operations in one request to the API server.
+
+        :param operations: list of dicts with keys
+            'operation': 'create', 'update', 'delete' or 'ref-update'
+            'type': resource type e.g. 'virtual-machine-interface'
+            'uuid': uuid of the object to update or delete
+            'data': object (or dict) to create or update, or the body of a
+                    ref-update e.g. {'type': ..., 'uuid': ..., 'ref-type': ...,
+                    'ref-uuid': ..., 'operation': 'ADD', 'attr': ...}
+        :param continue_on_error: go on with the next operations after a
+            failed one instead of stopping
+        :returns: list of results in order of operations, each a dict with
+            'status' (200 on success) and 'data' (the response of the
+            operation) or 'error'. Operations not attempted have no result.
+
+        Objects given for create get their uuid set from the result. Their
+        pending prop-list/map and (on update) ref changes are sent as
+        operations following theirs, the result of the object's operation
+        is the first failure among them if any.
+        """
+        ops_body = []
+        # index in operations of each operation sent
+        op_idxs = []
+        for idx, op in enumerate(operations):
+            op_body = dict(op)
+            data = op.get('data')
+            collection_ops = []
+            if hasattr(data, 'serialize_to_json'):
+                operation = op['operation'].lower()
+                if operation == 'create':
+                    data._pending_field_updates |= data._pending_ref_updates
+                    data._pending_ref_updates = set([])
+                    if (not data.uuid and (data._pending_field_list_updates or
+                            data._pending_field_map_updates)):
+                        # prop-collection updates need the uuid up front
+                        data.uuid = str(uuid.uuid4())
+                elif not op.get('uuid'):
+                    op_body['uuid'] = data.uuid
+                # Ignore fields with None value in json representation
+                op_body['data'] = json.loads(
+                    json.dumps(data, default=self._obj_serializer))
+                collection_ops = self._bulk_pending_collection_ops(
+                    op['type'], data, op_body.get('uuid') or data.uuid,
+                    operation)
+            ops_body.append(op_body)
+            op_idxs.append(idx)
+            ops_body.extend(collection_ops)
+            op_idxs.extend([idx] * len(collection_ops))
+
+        json_body = json.dumps({'operations': ops_body,
+                                'continue_on_error': continue_on_error})
+        uri = self._action_uri['bulk']
+        content = self._request_server(rest.OP_POST, uri, data=json_body)
+        op_results = json.loads(content)['results']
+
+        results = []
+        for idx, result in zip(op_idxs, op_results):
+            if idx == len(results):
+                results.append(result)
+            elif result['status'] != 200 and results[idx]['status'] == 200:
+                results[idx] = result
+
+        for op, result in zip(operations, results):
+            data = op.get('data')
+            if result['status'] != 200 or not hasattr(data, 'set_server_conn'):
+                continue
+            if op['operation'].lower() == 'create':
+                obj_dict = result['data'].values()[0]
+                data.uuid = obj_dict['uuid']
+                if 'parent_uuid' in obj_dict:
+                    data.parent_uuid = obj_dict['parent_uuid']
+            if op['operation'].lower() in ('create', 'update'):
+                data.set_server_conn(self)
+                data.clear_pending_updates()
+
+        return results
+    # end bulk
+
     def obj_to_id(self, obj):
         return self.fq_name_to_id(obj.get_type(), obj.get_fq_name())
     # end obj_to_id
@@ -1230,7 +1355,15 @@ class VncApi(object):
     @check_homepage
     def resource_list(self, obj_type, parent_id=None, parent_fq_name=None,
                       back_ref_id=None, obj_uuids=None, fields=None,
-                      detail=False, count=False, filters=None, shared=False):
+                      detail=False, count=False, filters=None, shared=False,
+                      page_marker=None, page_limit=None):
+        """List resources of obj_type.
+
+        With page_limit, at most page_limit resources are returned along
+        with a 'marker' to pass as page_marker to get the next page (None
+        once all resources are listed). For detail list, (resource objects,
+        marker) is returned in that case.
+        """
         if not obj_type:
             raise ResourceTypeUnknownError(obj_type)
 
@@ -1291,6 +1424,11 @@ class VncApi(object):
         if self._exclude_hrefs is not None:
             query_params['exclude_hrefs'] = True
 
+        if page_limit:
+            query_params['page_limit'] = page_limit
+            if page_marker:
+                query_params['page_marker'] = page_marker
+
         if do_post_for_list:
             uri = self._action_uri.get('list-bulk-collection')
             if not uri:
@@ -1322,6 +1460,8 @@ class VncApi(object):
             resource_obj.set_server_conn(self)
             resource_objs.append(resource_obj)
 
+        if page_limit:
+            return resource_objs, response.get('marker')
         return resource_objs
     # end resource_list
 
@@ -12,6 +12,16 @@ class ApiInternalRequest(object):
         self.json = json_as_dict
         self.query = query
     # end __init__
+
+    @property
+    def path(self):
+        return self.urlparts.path
+    # end path
+
+    @property
+    def method(self):
+        return self.environ.get('REQUEST_METHOD', 'GET').upper()
+    # end method
 # end class ApiInternalRequest
 
 class ApiContext(object):
@@ -255,6 +255,42 @@ class TestIp(unittest.TestCase):
         self.failUnless(mac_str == name_str)
 
 
+class TestSubnetIntervalIndex(unittest.TestCase):
+
+    def testFind(self):
+        index = SubnetIntervalIndex({'a': '10.1.0.0/16',
+                                     'b': '10.1.2.0/24',
+                                     'c': '10.3.0.0/24',
+                                     'd': 'fd14::/120'})
+        self.assertEqual(index.find('10.1.2.5'), 'b')
+        self.assertEqual(index.find('10.1.3.5'), 'a')
+        self.assertEqual(index.find('10.3.0.255'), 'c')
+        self.assertEqual(index.find('fd14::4'), 'd')
+        self.assertIsNone(index.find('10.2.0.1'))
+        self.assertIsNone(index.find('fd15::4'))
+
+        index.remove('a')
+        self.assertIsNone(index.find('10.1.3.5'))
+        index.add('e', '10.1.3.0/24')
+        self.assertEqual(index.find('10.1.3.5'), 'e')
+
+    def testOverlap(self):
+        index = SubnetIntervalIndex({0: '10.1.0.0/24',
+                                     1: '10.1.2.0/23',
+                                     2: 'fd14::/120'})
+        self.assertIsNone(index.first_overlap())
+        self.assertIsNone(index.find_overlap('10.1.1.0/24'))
+        self.assertIsNone(index.find_overlap('fd14::100/120'))
+        self.assertEqual(index.find_overlap('10.1.3.248/28'),
+                         (1, IPNetwork('10.1.2.0/23')))
+        self.assertIn(index.find_overlap('10.0.0.0/8')[0], (0, 1))
+
+        index.add(3, '10.1.3.248/28')
+        self.assertEqual(index.first_overlap(),
+                         (IPNetwork('10.1.2.0/23'), IPNetwork('10.1.3.248/28')))
+# end class TestSubnetIntervalIndex
+
+
 def suite():
     loader = unittest.TestLoader()
     testsuite = loader.loadTestsFromTestCase(TestIp)
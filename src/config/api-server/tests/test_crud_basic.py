@@ -41,6 +41,7 @@ import cfgm_common
 from cfgm_common import vnc_plugin_base
 from cfgm_common import vnc_cgitb
 from cfgm_common import db_json_exim
+from cfgm_common.vnc_cassandra import ObjectCacheManager
 vnc_cgitb.enable(format='text')
 
 sys.path.append('../common/tests')
@@ -1900,6 +1901,179 @@ class TestVncCfgApiServer(test_case.ApiServerTestCase):
                 'uuid_to_fq_name invoked in delete at dbe_uve_trace')
     # end test_uve_trace_delete_name_from_msg
 
+    def test_db_resync_in_chunks(self):
+        db_client = self._api_server._db_conn
+        progress = db_client.db_resync_progress()
+        self.assertTrue(progress['done'])
+        self.assertEqual(progress['types_done'], progress['types_total'])
+        self.assertEqual(progress['objects_done'], progress['objects_total'])
+
+        test_obj = self._create_test_object()
+        resynced = []
+        def spy_dbe_resync(orig_method, obj_type, obj_uuids):
+            self.assertLessEqual(len(obj_uuids), 2)
+            resynced.extend((obj_type, obj_uuid) for obj_uuid in obj_uuids)
+            return orig_method(obj_type, obj_uuids)
+
+        type_to_uuids = db_client._object_db.get_obj_uuids_by_type()
+        orig_chunk_size = db_client._db_resync_chunk_size
+        db_client._db_resync_chunk_size = 2
+        try:
+            with test_common.patch(db_client, '_dbe_resync', spy_dbe_resync):
+                db_client._db_resync_objects(type_to_uuids)
+        finally:
+            db_client._db_resync_chunk_size = orig_chunk_size
+
+        self.assertEqual(sorted(resynced),
+            sorted((obj_type, obj_uuid)
+                   for obj_type, obj_uuids in type_to_uuids.items()
+                   for obj_uuid in obj_uuids))
+        self.assertIn(('virtual_network', test_obj.uuid), resynced)
+        # networks resynced before other types
+        resynced_types = [obj_type for obj_type, _ in resynced]
+        num_vns = len(type_to_uuids['virtual_network'])
+        self.assertEqual(set(resynced_types[:num_vns]), set(['virtual_network']))
+        progress = db_client.db_resync_progress()
+        self.assertEqual(progress['types_done'], len(type_to_uuids))
+        self.assertEqual(progress['objects_done'], len(resynced))
+    # end test_db_resync_in_chunks
+
+    def test_bulk_operations(self):
+        vn_obj = VirtualNetwork('vn-%s' %(self.id()))
+        self._vnc_lib.virtual_network_create(vn_obj)
+        vmis = [VirtualMachineInterface('vmi-%s-%s' %(self.id(), i),
+                                        parent_obj=Project())
+                for i in range(3)]
+        for vmi in vmis:
+            vmi.set_virtual_network(vn_obj)
+        ipam_obj = NetworkIpam('ipam-%s' %(self.id()))
+        self._vnc_lib.network_ipam_create(ipam_obj)
+
+        results = self._vnc_lib.bulk(
+            [{'operation': 'create', 'type': 'virtual-machine-interface',
+              'data': vmi} for vmi in vmis] +
+            [{'operation': 'ref-update',
+              'data': {'type': 'virtual-network', 'uuid': vn_obj.uuid,
+                       'ref-type': 'network-ipam', 'ref-uuid': ipam_obj.uuid,
+                       'operation': 'ADD',
+                       'attr': {'ipam_subnets': []}}}])
+        self.assertEqual([r['status'] for r in results], [200] * 4)
+        for vmi in vmis:
+            self.assertIsNotNone(vmi.uuid)
+            self._vnc_lib.virtual_machine_interface_read(id=vmi.uuid)
+        vn_obj = self._vnc_lib.virtual_network_read(id=vn_obj.uuid)
+        self.assertEqual(vn_obj.get_network_ipam_refs()[0]['uuid'],
+                         ipam_obj.uuid)
+
+        # stops at first failure, earlier operations stay applied
+        vmis[0].set_display_name('updated')
+        results = self._vnc_lib.bulk([
+            {'operation': 'update', 'type': 'virtual-machine-interface',
+             'data': vmis[0]},
+            {'operation': 'delete', 'type': 'virtual-network',
+             'uuid': vn_obj.uuid},
+            {'operation': 'delete', 'type': 'virtual-machine-interface',
+             'uuid': vmis[1].uuid}])
+        self.assertEqual([r['status'] for r in results], [200, 409])
+        self.assertEqual(self._vnc_lib.virtual_machine_interface_read(
+            id=vmis[0].uuid).get_display_name(), 'updated')
+        self._vnc_lib.virtual_machine_interface_read(id=vmis[1].uuid)
+
+        results = self._vnc_lib.bulk([
+            {'operation': 'delete', 'type': 'virtual-network',
+             'uuid': vn_obj.uuid}] +
+            [{'operation': 'delete', 'type': 'virtual-machine-interface',
+              'uuid': vmi.uuid} for vmi in vmis],
+            continue_on_error=True)
+        self.assertEqual([r['status'] for r in results], [409, 200, 200, 200])
+        self._vnc_lib.virtual_network_delete(id=vn_obj.uuid)
+
+        # whole request rejected if any operation is malformed
+        with ExpectedException(BadRequest):
+            self._vnc_lib.bulk([
+                {'operation': 'create', 'type': 'virtual-network',
+                 'data': VirtualNetwork('vn-bad-%s' %(self.id()))},
+                {'operation': 'delete', 'type': 'no-such-type',
+                 'uuid': vn_obj.uuid}])
+        with ExpectedException(NoIdError):
+            self._vnc_lib.virtual_network_read(
+                fq_name=['default-domain', 'default-project',
+                         'vn-bad-%s' %(self.id())])
+    # end test_bulk_operations
+
+    def test_bulk_operations_unexpected_error(self):
+        vn_objs = [VirtualNetwork('vn-%s-%s' %(self.id(), i))
+                   for i in range(3)]
+        for vn_obj in vn_objs:
+            self._vnc_lib.virtual_network_create(vn_obj)
+            vn_obj.set_display_name('updated')
+
+        def fail_second_vn(orig_method, obj_type, obj_uuid):
+            if obj_uuid == vn_objs[1].uuid:
+                raise Exception("Fake unexpected error")
+            return orig_method(obj_type, obj_uuid)
+
+        operations = [{'operation': 'update', 'type': 'virtual-network',
+                       'data': vn_obj} for vn_obj in vn_objs]
+        with test_common.patch(self._api_server, 'http_resource_update',
+                               fail_second_vn):
+            results = self._vnc_lib.bulk(operations)
+            self.assertEqual([r['status'] for r in results], [200, 500])
+            self.assertIn('Fake unexpected error', results[1]['error'])
+            self.assertEqual(self._vnc_lib.virtual_network_read(
+                id=vn_objs[2].uuid).get_display_name(), vn_objs[2].name)
+
+            results = self._vnc_lib.bulk(operations, continue_on_error=True)
+            self.assertEqual([r['status'] for r in results], [200, 500, 200])
+        self.assertEqual(self._vnc_lib.virtual_network_read(
+            id=vn_objs[2].uuid).get_display_name(), 'updated')
+    # end test_bulk_operations_unexpected_error
+
+    def test_bulk_operations_pending_collection_updates(self):
+        vn_obj = VirtualNetwork('vn-%s' %(self.id()))
+        self._vnc_lib.virtual_network_create(vn_obj)
+        ipam_obj = NetworkIpam('ipam-%s' %(self.id()))
+        self._vnc_lib.network_ipam_create(ipam_obj)
+
+        vn_obj.add_annotations(KeyValuePair(key='k1', value='v1'))
+        vn_obj.add_network_ipam(ipam_obj, VnSubnetsType([]))
+        results = self._vnc_lib.bulk([
+            {'operation': 'update', 'type': 'virtual-network',
+             'data': vn_obj}])
+        self.assertEqual([r['status'] for r in results], [200])
+        vn_obj = self._vnc_lib.virtual_network_read(id=vn_obj.uuid)
+        self.assertEqual([a.key for a in vn_obj.annotations.key_value_pair],
+                         ['k1'])
+        self.assertEqual(vn_obj.get_network_ipam_refs()[0]['uuid'],
+                         ipam_obj.uuid)
+    # end test_bulk_operations_pending_collection_updates
+
+    def test_bulk_operations_notifications_in_one_burst(self):
+        msgbus = self._api_server._db_conn._msgbus
+        published = []
+        published_before_op = []
+        def record_publish(orig_method, oper_info):
+            published.append(oper_info)
+            return orig_method(oper_info)
+        def record_operation(orig_method, op):
+            published_before_op.append(len(published))
+            return orig_method(op)
+
+        vn_objs = [VirtualNetwork('vn-%s-%s' %(self.id(), i))
+                   for i in range(3)]
+        with test_common.patch(msgbus, 'publish', record_publish), \
+                test_common.patch(self._api_server, '_bulk_operation',
+                                  record_operation):
+            results = self._vnc_lib.bulk(
+                [{'operation': 'create', 'type': 'virtual-network',
+                  'data': vn_obj} for vn_obj in vn_objs])
+        self.assertEqual([r['status'] for r in results], [200] * 3)
+        self.assertEqual(published_before_op, [0] * 3)
+        self.assertEqual(
+            set(vn_obj.uuid for vn_obj in vn_objs),
+            set(n['uuid'] for n in published if n['oper'] == 'CREATE'))
+    # end test_bulk_operations_notifications_in_one_burst
+
     def test_ref_update_with_existing_ref(self):
         ipam_obj = NetworkIpam('ipam-%s' % self.id())
         self._vnc_lib.network_ipam_create(ipam_obj)
@@ -2749,7 +2923,8 @@ class TestExtensionApi(test_case.ApiServerTestCase):
             # add/del/mod envvar
             request.environ['X_TEST_DUMMY'] = 'foo'
             request.environ['HTTP_X_CONTRAIL_USERAGENT'] = 'bar'
-            del request.environ['SERVER_SOFTWARE']
+            # already gone from the operations of a bulk request
+            request.environ.pop('SERVER_SOFTWARE', None)
 
             # /virtual-networks -> virtual-network
             obj_type = request.path[1:-1]
@@ -2911,6 +3086,22 @@ class TestExtensionApi(test_case.ApiServerTestCase):
         obj = self._vnc_lib.virtual_network_read(id=obj.uuid)
     # end test_validate_request
 
+    def test_bulk_operations_validated(self):
+        self.ignore_err_in_log = True
+        results = self._vnc_lib.bulk([
+            {'operation': 'create', 'type': 'virtual-network',
+             'data': VirtualNetwork('validate-create-bulk')},
+            {'operation': 'create', 'type': 'virtual-network',
+             'data': VirtualNetwork('bulk-%s' %(self.id()))}],
+            continue_on_error=True)
+        self.assertEqual([r['status'] for r in results], [456, 200])
+        self.assertThat(results[0]['error'],
+                        Contains('invalidating create request'))
+        with ExpectedException(NoIdError):
+            self._vnc_lib.virtual_network_read(
+                fq_name=VirtualNetwork('validate-create-bulk').fq_name)
+    # end test_bulk_operations_validated
+
 # end class TestExtensionApi
 
 
@@ -4158,6 +4349,155 @@ class TestBulk(test_case.ApiServerTestCase):
 # end class TestBulk
 
 
+class TestListPagination(test_case.ApiServerTestCase):
+    @classmethod
+    def setUpClass(cls, *args, **kwargs):
+        cls.console_handler = logging.StreamHandler()
+        cls.console_handler.setLevel(logging.DEBUG)
+        logger.addHandler(cls.console_handler)
+        super(TestListPagination, cls).setUpClass(*args, **kwargs)
+    # end setUpClass
+
+    @classmethod
+    def tearDownClass(cls, *args, **kwargs):
+        logger.removeHandler(cls.console_handler)
+        super(TestListPagination, cls).tearDownClass(*args, **kwargs)
+    # end tearDownClass
+
+    def _create_project_vns(self, num_vns):
+        proj_obj = Project('proj-%s' %(self.id()))
+        self._vnc_lib.project_create(proj_obj)
+        vn_objs = []
+        for i in range(num_vns):
+            vn_obj = VirtualNetwork('vn-%s-%s' %(i, self.id()), proj_obj)
+            vn_obj.display_name = 'vn-%s' %(i % 2)
+            self._vnc_lib.virtual_network_create(vn_obj)
+            vn_objs.append(vn_obj)
+        return proj_obj, vn_objs
+    # end _create_project_vns
+
+    def _list_all_pages(self, page_limit, **kwargs):
+        pages = []
+        marker = None
+        while True:
+            ret_list = self._vnc_lib.resource_list('virtual-network',
+                page_marker=marker, page_limit=page_limit, **kwargs)
+            pages.append(ret_list['virtual-networks'])
+            marker = ret_list['marker']
+            if marker is None:
+                return pages
+            self.assertThat(len(pages), LessThan(100))
+    # end _list_all_pages
+
+    def test_paginate_parent_anchor(self):
+        proj_obj, vn_objs = self._create_project_vns(5)
+
+        pages = self._list_all_pages(2, parent_id=proj_obj.uuid)
+        self.assertEqual([len(p) for p in pages], [2, 2, 1])
+        ret_uuids = [vn['uuid'] for page in pages for vn in page]
+        self.assertEqual(len(ret_uuids), len(set(ret_uuids)))
+        self.assertThat(set(ret_uuids), Equals(set(o.uuid for o in vn_objs)))
+    # end test_paginate_parent_anchor
+
+    def test_paginate_with_filters(self):
+        proj_obj, vn_objs = self._create_project_vns(5)
+
+        pages = self._list_all_pages(2, parent_id=proj_obj.uuid,
+                                     filters={'display_name': 'vn-0'})
+        ret_uuids = [vn['uuid'] for page in pages for vn in page]
+        self.assertThat(set(ret_uuids), Equals(
+            set(o.uuid for o in vn_objs if o.display_name == 'vn-0')))
+    # end test_paginate_with_filters
+
+    def test_paginate_no_anchor(self):
+        _, vn_objs = self._create_project_vns(3)
+
+        pages = self._list_all_pages(1)
+        ret_uuids = [vn['uuid'] for page in pages for vn in page]
+        self.assertEqual(len(ret_uuids), len(set(ret_uuids)))
+        for vn_obj in vn_objs:
+            self.assertIn(vn_obj.uuid, ret_uuids)
+    # end test_paginate_no_anchor
+
+    def test_stream_list(self):
+        proj_obj, vn_objs = self._create_project_vns(5)
+
+        query_params = {'parent_id': proj_obj.uuid, 'detail': True}
+        ret_list = self._vnc_lib._request_server(
+            rest.OP_GET, '/virtual-networks', data=query_params)
+        query_params['stream'] = True
+        ret_stream_list = self._vnc_lib._request_server(
+            rest.OP_GET, '/virtual-networks', data=query_params)
+        self.assertEqual(len(ret_stream_list['virtual-networks']), 5)
+        self.assertNotIn('marker', ret_stream_list)
+        self.assertThat(
+            set(vn['virtual-network']['uuid']
+                for vn in ret_stream_list['virtual-networks']),
+            Equals(set(vn['virtual-network']['uuid']
+                   for vn in ret_list['virtual-networks'])))
+    # end test_stream_list
+
+    def test_stream_list_page_limit_returns_marker(self):
+        proj_obj, vn_objs = self._create_project_vns(5)
+
+        # page_limit bounds the streamed list even when it spans chunks
+        self._api_server._LIST_STREAM_PAGE_SIZE = 2
+        try:
+            pages = []
+            marker = None
+            while True:
+                query_params = {'parent_id': proj_obj.uuid, 'stream': True,
+                                'page_limit': 3}
+                if marker is not None:
+                    query_params['page_marker'] = marker
+                ret_stream_list = self._vnc_lib._request_server(
+                    rest.OP_GET, '/virtual-networks', data=query_params)
+                pages.append(ret_stream_list['virtual-networks'])
+                marker = ret_stream_list['marker']
+                if marker is None:
+                    break
+                self.assertThat(len(pages), LessThan(100))
+        finally:
+            del self._api_server._LIST_STREAM_PAGE_SIZE
+
+        self.assertEqual(len(pages[0]), 3)
+        ret_uuids = [vn['uuid'] for page in pages for vn in page]
+        self.assertEqual(len(ret_uuids), len(set(ret_uuids)))
+        self.assertThat(set(ret_uuids), Equals(set(o.uuid for o in vn_objs)))
+    # end test_stream_list_page_limit_returns_marker
+
+    def test_stream_list_error_on_later_page(self):
+        proj_obj, vn_objs = self._create_project_vns(5)
+
+        def fail_later_pages(orig_method, *args, **kwargs):
+            if kwargs.get('paginate_start'):
+                raise Exception("Fake db error on later page")
+            return orig_method(*args, **kwargs)
+
+        query_params = {'parent_id': proj_obj.uuid, 'stream': True}
+        self._api_server._LIST_STREAM_PAGE_SIZE = 2
+        try:
+            with test_common.patch(self._api_server._db_conn, 'dbe_list',
+                                   fail_later_pages):
+                ret_stream_list = self._vnc_lib._request_server(
+                    rest.OP_GET, '/virtual-networks', data=query_params)
+        finally:
+            del self._api_server._LIST_STREAM_PAGE_SIZE
+        # the cut short list says so and tells where to resume from
+        self.assertEqual(len(ret_stream_list['virtual-networks']), 2)
+        self.assertIn('Fake db error on later page', ret_stream_list['error'])
+        self.assertIsNotNone(ret_stream_list['marker'])
+
+        ret_list = self._vnc_lib.resource_list('virtual-network',
+            parent_id=proj_obj.uuid, page_marker=ret_stream_list['marker'],
+            page_limit=10)
+        ret_uuids = [vn['uuid'] for vn in ret_stream_list['virtual-networks']]
+        ret_uuids += [vn['uuid'] for vn in ret_list['virtual-networks']]
+        self.assertThat(set(ret_uuids), Equals(set(o.uuid for o in vn_objs)))
+    # end test_stream_list_error_on_later_page
+# end class TestListPagination
+
+
 class TestCacheWithMetadata(test_case.ApiServerTestCase):
     @classmethod
     def setUpClass(cls, *args, **kwargs):
@@ -4401,9 +4741,150 @@ class TestCacheWithMetadataEviction(test_case.ApiServerTestCase):
             self.assertTrue(
                 False, 'Eviction failed, all VNs present in cache')
     # end test_evict_on_full
+
+    def test_evict_least_recently_used(self):
+        vn1_obj = vnc_api.VirtualNetwork('vn-1-%s' %(self.id()))
+        self._vnc_lib.virtual_network_create(vn1_obj)
+
+        vn2_obj = vnc_api.VirtualNetwork('vn-2-%s' %(self.id()))
+        self._vnc_lib.virtual_network_create(vn2_obj)
+
+        vn3_obj = vnc_api.VirtualNetwork('vn-3-%s' %(self.id()))
+        self._vnc_lib.virtual_network_create(vn3_obj)
+
+        # prime with vn-1 and vn-2, then make vn-1 most recently used
+        cache_mgr = self._api_server._db_conn._object_db._obj_cache_mgr
+        self._vnc_lib.virtual_network_read(id=vn1_obj.uuid)
+        self._vnc_lib.virtual_network_read(id=vn2_obj.uuid)
+        self._vnc_lib.virtual_network_read(id=vn1_obj.uuid)
+
+        evictions = cache_mgr.get_stats()['evictions']
+        self._vnc_lib.virtual_network_read(id=vn3_obj.uuid)
+        cache_keys = cache_mgr._cache.keys()
+        self.assertIn(vn1_obj.uuid, cache_keys)
+        self.assertNotIn(vn2_obj.uuid, cache_keys)
+        self.assertIn(vn3_obj.uuid, cache_keys)
+        self.assertEqual(cache_mgr.get_stats()['evictions'], evictions + 1)
+    # end test_evict_least_recently_used
 # end class TestCacheWithMetadataEviction
 
 
+class TestCacheWithNotifyInvalidation(test_case.ApiServerTestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.console_handler = logging.StreamHandler()
+        cls.console_handler.setLevel(logging.DEBUG)
+        logger.addHandler(cls.console_handler)
+        return super(TestCacheWithNotifyInvalidation, cls).setUpClass(
+            extra_config_knobs=[('DEFAULTS', 'object_cache_invalidation',
+            'notify')])
+    # end setUpClass
+
+    @classmethod
+    def tearDownClass(cls, *args, **kwargs):
+        logger.removeHandler(cls.console_handler)
+        super(TestCacheWithNotifyInvalidation, cls).tearDownClass(
+            *args, **kwargs)
+    # end tearDownClass
+
+    def setUp(self):
+        self.uuid_cf = self.get_cf( 'config_db_uuid', 'obj_uuid_table')
+        self.cache_mgr = self._api_server._db_conn._object_db._obj_cache_mgr
+        return super(TestCacheWithNotifyInvalidation, self).setUp()
+    # end setUp
+
+    def test_hit_served_from_memory(self):
+        vn_obj = vnc_api.VirtualNetwork('vn-%s' %(self.id()))
+        vn_obj.display_name = 'test-cache-obj'
+        self._vnc_lib.virtual_network_create(vn_obj)
+        self._vnc_lib.virtual_networks_list(obj_uuids=[vn_obj.uuid])
+        self.assertIn(vn_obj.uuid, self.cache_mgr._cache.keys())
+
+        # a db change without notification is not seen
+        hits = self.cache_mgr.get_stats()['hits']
+        with self.uuid_cf.patches([
+            ('column', (vn_obj.uuid, 'prop:display_name', 'not-notified')),
+            ]):
+            ret_vn_objs = self._vnc_lib.virtual_networks_list(
+                obj_uuids=[vn_obj.uuid], detail=True)
+            self.assertEqual(
+                ret_vn_objs[0].display_name, 'test-cache-obj')
+        self.assertEqual(self.cache_mgr.get_stats()['hits'], hits + 1)
+    # end test_hit_served_from_memory
+
+    def test_notification_evicts(self):
+        vn_obj = vnc_api.VirtualNetwork('vn-%s' %(self.id()))
+        self._vnc_lib.virtual_network_create(vn_obj)
+        self._vnc_lib.virtual_networks_list(obj_uuids=[vn_obj.uuid])
+        self.assertIn(vn_obj.uuid, self.cache_mgr._cache.keys())
+
+        self._api_server._db_conn._msgbus._dbe_subscribe_callback(
+            {'oper': 'UPDATE', 'type': 'virtual_network',
+             'uuid': vn_obj.uuid, 'fq_name': vn_obj.get_fq_name()})
+        self.assertNotIn(vn_obj.uuid, self.cache_mgr._cache.keys())
+
+        vn_obj.display_name = 'updated-name'
+        self._vnc_lib.virtual_network_update(vn_obj)
+        ret_vn_objs = self._vnc_lib.virtual_networks_list(
+            obj_uuids=[vn_obj.uuid], detail=True)
+        self.assertEqual(ret_vn_objs[0].display_name, 'updated-name')
+    # end test_notification_evicts
+
+    def test_ref_update_evicts_both_ends(self):
+        ipam_obj = vnc_api.NetworkIpam('ipam-%s' %(self.id()))
+        self._vnc_lib.network_ipam_create(ipam_obj)
+        vn_obj = vnc_api.VirtualNetwork('vn-%s' %(self.id()))
+        self._vnc_lib.virtual_network_create(vn_obj)
+
+        def cache_both():
+            self._vnc_lib.virtual_networks_list(obj_uuids=[vn_obj.uuid])
+            self._vnc_lib.network_ipams_list(obj_uuids=[ipam_obj.uuid])
+            self.assertIn(vn_obj.uuid, self.cache_mgr._cache.keys())
+            self.assertIn(ipam_obj.uuid, self.cache_mgr._cache.keys())
+
+        # local ref-update
+        cache_both()
+        self._vnc_lib.ref_update('virtual-network', vn_obj.uuid,
+            'network-ipam', ipam_obj.uuid, None, 'ADD',
+            vnc_api.VnSubnetsType([]))
+        self.assertNotIn(vn_obj.uuid, self.cache_mgr._cache.keys())
+        self.assertNotIn(ipam_obj.uuid, self.cache_mgr._cache.keys())
+
+        # ref-update notified by another api-server
+        cache_both()
+        self._api_server._db_conn._msgbus._dbe_subscribe_callback(
+            {'oper': 'UPDATE', 'type': 'virtual_network',
+             'uuid': vn_obj.uuid, 'fq_name': vn_obj.get_fq_name(),
+             'ref_uuid': ipam_obj.uuid})
+        self.assertNotIn(vn_obj.uuid, self.cache_mgr._cache.keys())
+        self.assertNotIn(ipam_obj.uuid, self.cache_mgr._cache.keys())
+    # end test_ref_update_evicts_both_ends
+
+    def test_prop_collection_update_evicts(self):
+        vn_obj = vnc_api.VirtualNetwork('vn-%s' %(self.id()))
+        self._vnc_lib.virtual_network_create(vn_obj)
+        self._vnc_lib.virtual_networks_list(obj_uuids=[vn_obj.uuid])
+        self.assertIn(vn_obj.uuid, self.cache_mgr._cache.keys())
+
+        self._vnc_lib.prop_map_set_element(vn_obj.uuid, 'annotations',
+            vnc_api.KeyValuePair(key='k1', value='v1'))
+        self.assertNotIn(vn_obj.uuid, self.cache_mgr._cache.keys())
+        ret_vn_objs = self._vnc_lib.virtual_networks_list(
+            obj_uuids=[vn_obj.uuid], detail=True)
+        self.assertEqual(
+            [a.key for a in ret_vn_objs[0].annotations.key_value_pair],
+            ['k1'])
+    # end test_prop_collection_update_evicts
+
+    def test_zero_max_entries_disables_cache(self):
+        cache_mgr = ObjectCacheManager(None, max_entries=0)
+        cache_mgr.set(None, {'obj-uuid': {'obj_dict': {'uuid': 'obj-uuid'}}},
+                      None, False)
+        self.assertEqual(len(cache_mgr._cache), 0)
+    # end test_zero_max_entries_disables_cache
+# end class TestCacheWithNotifyInvalidation
+
+
 class TestCacheWithMetadataExcludeTypes(test_case.ApiServerTestCase):
     @classmethod
     def setUpClass(cls):
@@ -105,4 +105,75 @@ class TestQuota(test_case.ApiServerTestCase):
         self.assertEqual(result['ok'], self._fip_quota)
         self.assertEqual(result['exception'], 1)
     # end test_example
+
+    def test_quota_counter_on_delete_and_quota_update(self):
+        proj_name = 'admin' + self.id()
+        kwargs = {'quota':{'virtual_machine_interface': self._port_quota}}
+        project = Project(proj_name, **kwargs)
+        self._vnc_lib.project_create(project)
+        vn = VirtualNetwork('vn-%s' %(self.id()), project)
+        self._vnc_lib.virtual_network_create(vn)
+        def create_port():
+            vmi = VirtualMachineInterface(str(uuid.uuid4()), project)
+            vmi.set_virtual_network(vn)
+            self._vnc_lib.virtual_machine_interface_create(vmi)
+            return vmi
+        vmis = [create_port() for i in xrange(self._port_quota)]
+        with ExpectedException(OverQuota):
+            create_port()
+
+        # delete releases quota
+        db_conn = self._api_server._db_conn
+        self._vnc_lib.virtual_machine_interface_delete(id=vmis[0].uuid)
+        self.assertEqual(db_conn.quota_counter_add(
+            project.uuid, 'virtual_machine_interface', 0),
+            self._port_quota - 1)
+        vmis[0] = create_port()
+        with ExpectedException(OverQuota):
+            create_port()
+
+        # counter recounted from db after quota change
+        project.set_quota(QuotaType(
+            virtual_machine_interface=self._port_quota + 1))
+        self._vnc_lib.project_update(project)
+        self.assertIsNone(db_conn.quota_counter_add(
+            project.uuid, 'virtual_machine_interface', 0))
+        vmis.append(create_port())
+        with ExpectedException(OverQuota):
+            create_port()
+        self.assertEqual(db_conn.quota_counter_add(
+            project.uuid, 'virtual_machine_interface', 0),
+            self._port_quota + 1)
+    # end test_quota_counter_on_delete_and_quota_update
+
+    def test_quota_counter_reseed_keeps_other_counters(self):
+        db_conn = self._api_server._db_conn
+        projects = []
+        for i in xrange(2):
+            project = Project('admin%d-%s' %(i, self.id()), quota=QuotaType(
+                virtual_network=3))
+            self._vnc_lib.project_create(project)
+            self._vnc_lib.virtual_network_create(
+                VirtualNetwork('vn-%s' %(self.id()), project))
+            projects.append(project)
+        # an api-server died between counting a create and its undo
+        self.assertEqual(db_conn.quota_counter_add(
+            projects[0].uuid, 'virtual_network', 1), 2)
+
+        # recently modified counters are left alone
+        db_conn._quota_counters_reseed()
+        self.assertEqual(db_conn.quota_counter_add(
+            projects[0].uuid, 'virtual_network', 0), 2)
+
+        orig_idle = db_conn._QUOTA_COUNTER_RESEED_IDLE
+        db_conn._QUOTA_COUNTER_RESEED_IDLE = 0
+        try:
+            db_conn._quota_counters_reseed()
+        finally:
+            db_conn._QUOTA_COUNTER_RESEED_IDLE = orig_idle
+        self.assertEqual(db_conn.quota_counter_add(
+            projects[0].uuid, 'virtual_network', 0), 1)
+        self.assertEqual(db_conn.quota_counter_add(
+            projects[1].uuid, 'virtual_network', 0), 1)
+    # end test_quota_counter_reseed_keeps_other_counters
 # class TestPermissions
@@ -413,6 +413,38 @@ class TestRbac(test_case.ApiServerTestCase):
     def test_aaa_mode(self):
         self.assertRaises(HttpError, self._vnc_lib.set_aaa_mode, "invalid-aaa-mode")
 
+    def test_rule_cache_invalidation(self):
+        rbac = self._api_server._rbac
+        rbac.invalidate_rule_cache()
+        hits = rbac.get_rule_cache_stats()['hits']
+        rule_list, rules_by_object = rbac._get_compiled_rbac_rules(None, None)
+        rule_list_again, _ = rbac._get_compiled_rbac_rules(None, None)
+        self.assertIs(rule_list, rule_list_again)
+        self.assertEqual(rbac.get_rule_cache_stats()['entries'], 1)
+        self.assertEqual(rbac.get_rule_cache_stats()['hits'], hits + 1)
+        self.assertNotIn('virtual-network', rules_by_object)
+
+        # new rule in global list visible right away
+        aal = self._vnc_lib.api_access_list_read(
+            fq_name=['default-global-system-config',
+                     'default-api-access-list'])
+        aal_entries = aal.get_api_access_list_entries()
+        aal_entries.add_rbac_rule(RbacRuleType(
+            rule_object='virtual-network', rule_field=None,
+            rule_perms=[RbacPermType(role_name='net-admin',
+                                     role_crud='CRUD')]))
+        aal.set_api_access_list_entries(aal_entries)
+        self._vnc_lib.api_access_list_update(aal)
+
+        rule_list, rules_by_object = rbac._get_compiled_rbac_rules(None, None)
+        self.assertEqual(len(rule_list), len(rule_list_again) + 1)
+        self.assertEqual(rules_by_object['virtual-network'][-1]['rule_perms'],
+                         [{'role_name': 'net-admin', 'role_crud': 'CRUD'}])
+        self.assertEqual(
+            len(rules_by_object['virtual-network']),
+            len(rules_by_object['*']) + 1)
+    # end test_rule_cache_invalidation
+
     def tearDown(self):
         super(TestRbac, self).tearDown()
     # end tearDown
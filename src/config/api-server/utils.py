@@ -16,6 +16,10 @@ from pysandesh.gen_py.sandesh.ttypes import SandeshLevel
 _WEB_HOST = '0.0.0.0'
 _WEB_PORT = 8082
 _ADMIN_PORT = 8095
+# also the VncDbClient defaults, shared so it resyncs alike when built
+# directly (e.g. in tests)
+DB_RESYNC_CONCURRENCY = 8
+DB_RESYNC_CHUNK_SIZE = 1000
 
 
 def user_password(s):
@@ -86,6 +90,11 @@ def parse_args(args_str):
         'kombu_ssl_ca_certs': '',
         'object_cache_entries': '10000', # max number of objects cached for read
         'object_cache_exclude_types': '', # csv of object types to *not* cache
+        'object_cache_max_bytes': '0', # max size of cached objects, 0 = no limit
+        'object_cache_invalidation': 'timestamp', # 'timestamp' or 'notify'
+        # chunks of objects resynced in parallel
+        'db_resync_concurrency': DB_RESYNC_CONCURRENCY,
+        'db_resync_chunk_size': DB_RESYNC_CHUNK_SIZE, # objects per chunk
         'db_engine': 'cassandra',
     }
     defaults.update(SandeshConfig.get_default_options(['DEFAULTS']))
@@ -288,6 +297,21 @@ def parse_args(args_str):
             help="Maximum number of objects cached for read, default 10000")
     parser.add_argument("--object_cache_exclude_types",
             help="Comma separated values of object types to not cache")
+    parser.add_argument("--object_cache_max_bytes",
+            help="Maximum estimated size in bytes of objects cached for read,"
+                 " default 0 (no limit)")
+    parser.add_argument("--object_cache_invalidation",
+            choices=['timestamp', 'notify'],
+            help="How cached objects are invalidated: 'timestamp' checks "
+                 "freshness in database on every read, 'notify' evicts "
+                 "on update notifications from the message bus, "
+                 "default timestamp")
+    parser.add_argument("--db_resync_concurrency",
+            help="Number of object chunks resynced in parallel at startup, "
+                 "default %s" % (DB_RESYNC_CONCURRENCY))
+    parser.add_argument("--db_resync_chunk_size",
+            help="Number of objects read at a time during startup resync, "
+                 "default %s" % (DB_RESYNC_CHUNK_SIZE))
     parser.add_argument("--db_engine",
         help="Database engine to use, default cassandra")
     SandeshConfig.add_parser_arguments(parser)
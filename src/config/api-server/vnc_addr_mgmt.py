@@ -2,6 +2,7 @@
 # Copyright (c) 2013 Juniper Networks, Inc. All rights reserved.
 #
 
+import bisect
 import copy
 import uuid
 import netaddr
@@ -478,6 +479,145 @@ class Subnet(object):
 # end class Subnet
 
 
+class SubnetIntervalIndex(object):
+
+    """Address ranges of a set of subnets kept sorted per ip version
+
+    CIDR blocks either nest or are disjoint, so once sorted by first
+    address (widest block first on ties) the block owning an address is
+    the closest one starting at or below it, and an overlap is any block
+    starting at or below the furthest end seen so far. Sorted view is
+    rebuilt lazily after add/remove since lookups far outnumber updates.
+    """
+
+    def __init__(self, networks=None):
+        self._networks = {}
+        self._sorted = None
+        for key, network in (networks or {}).items():
+            self.add(key, network)
+    # end __init__
+
+    def add(self, key, network):
+        self._networks[key] = IPNetwork(network)
+        self._sorted = None
+    # end add
+
+    def remove(self, key):
+        if self._networks.pop(key, None) is not None:
+            self._sorted = None
+    # end remove
+
+    def _build(self):
+        self._sorted = {}
+        by_version = {}
+        for key, network in self._networks.items():
+            by_version.setdefault(network.version, []).append(
+                (network.first, network.last, key, network))
+        for version, entries in by_version.items():
+            entries.sort(key=lambda e: (e[0], -e[1]))
+            starts = [e[0] for e in entries]
+            # reach[i] is the entry reaching furthest among entries[:i+1]
+            reach = []
+            for i, entry in enumerate(entries):
+                if not reach or entry[1] > entries[reach[-1]][1]:
+                    reach.append(i)
+                else:
+                    reach.append(reach[-1])
+            self._sorted[version] = (starts, entries, reach)
+    # end _build
+
+    def _get_sorted(self, version):
+        if self._sorted is None:
+            self._build()
+        return self._sorted.get(version)
+    # end _get_sorted
+
+    def find(self, ip_addr):
+        """Return key of the innermost subnet containing ip_addr or None"""
+        ip_addr = IPAddress(ip_addr)
+        sorted_entries = self._get_sorted(ip_addr.version)
+        if not sorted_entries:
+            return None
+        starts, entries, reach = sorted_entries
+        ip_val = int(ip_addr)
+        i = bisect.bisect_right(starts, ip_val) - 1
+        if i < 0 or entries[reach[i]][1] < ip_val:
+            return None
+        # only nested blocks make this walk back more than one step
+        while i >= 0:
+            if entries[i][1] >= ip_val:
+                return entries[i][2]
+            i -= 1
+        return None
+    # end find
+
+    def find_overlap(self, network):
+        """Return (key, network) of a subnet overlapping network or None"""
+        network = IPNetwork(network)
+        sorted_entries = self._get_sorted(network.version)
+        if not sorted_entries:
+            return None
+        starts, entries, reach = sorted_entries
+        i = bisect.bisect_right(starts, network.last) - 1
+        if i < 0:
+            return None
+        entry = entries[reach[i]]
+        if entry[1] < network.first:
+            return None
+        return entry[2], entry[3]
+    # end find_overlap
+
+    def first_overlap(self):
+        """Return a pair of overlapping subnet networks or None"""
+        if self._sorted is None:
+            self._build()
+        for starts, entries, reach in self._sorted.values():
+            for i in range(1, len(entries)):
+                if entries[i][0] <= entries[reach[i - 1]][1]:
+                    return entries[reach[i - 1]][3], entries[i][3]
+        return None
+    # end first_overlap
+# end class SubnetIntervalIndex
+
+
+class SubnetObjDict(dict):
+
+    """Subnet objects of a virtual-network or ipam keyed by subnet name,
+    indexed by address range for ip to subnet lookups
+    """
+
+    def __init__(self):
+        super(SubnetObjDict, self).__init__()
+        self._index = SubnetIntervalIndex()
+    # end __init__
+
+    def __setitem__(self, subnet_name, subnet_obj):
+        super(SubnetObjDict, self).__setitem__(subnet_name, subnet_obj)
+        self._index.add(subnet_name, subnet_obj._network)
+    # end __setitem__
+
+    def __delitem__(self, subnet_name):
+        super(SubnetObjDict, self).__delitem__(subnet_name)
+        self._index.remove(subnet_name)
+    # end __delitem__
+
+    def find_by_ip(self, ip_addr, subnet_name=None):
+        """Return subnet object owning ip_addr, optionally restricted to
+        subnet_name, or None
+        """
+        if subnet_name:
+            subnet_obj = self.get(subnet_name)
+            if subnet_obj and subnet_obj.ip_belongs(ip_addr):
+                return subnet_obj
+            return None
+        subnet_name = self._index.find(ip_addr)
+        if subnet_name is None:
+            return None
+        return self[subnet_name]
+    # end find_by_ip
+# end class SubnetObjDict
+
+
 # Address management for virtual network
 class AddrMgmt(object):
 
@@ -486,7 +626,7 @@ class AddrMgmt(object):
         self.version = 0
         self._server_mgr = server_mgr
         self._db_conn = None
-        # dict of VN where each key has dict of subnets
+        # dict of VN/ipam where each key has SubnetObjDict of subnets
         self._subnet_objs = {}
     # end __init__
 
@@ -586,7 +726,7 @@ class AddrMgmt(object):
         ipam_fq_name_str = ':'.join(ipam_fq_name)
         subnet_objs = self._subnet_objs.get(ipam_uuid)
         if subnet_objs is None:
-            self._subnet_objs[ipam_uuid] = {}
+            self._subnet_objs[ipam_uuid] = SubnetObjDict()
             #read ipam to get ipam_subnets and generate subnet_objs
             (ok, ipam_dict) = self._uuid_to_obj_dict('network_ipam',
                                                      ipam_uuid)
@@ -606,7 +746,7 @@ class AddrMgmt(object):
                 subnet_obj = self._create_subnet_obj_for_ipam_subnet(
                                  ipam_subnet, ipam_fq_name_str, should_persist)
                 if ipam_uuid not in self._subnet_objs:
-                    self._subnet_objs[ipam_uuid] = {}
+                    self._subnet_objs[ipam_uuid] = SubnetObjDict()
                 self._subnet_objs[ipam_uuid][subnet_name] = subnet_obj
             subnet_objs = self._subnet_objs[ipam_uuid]
 
@@ -647,7 +787,7 @@ class AddrMgmt(object):
 
     def _create_ipam_subnet_objs(self, ipam_uuid, ipam_dict,
                                  should_persist):
-        self._subnet_objs.setdefault(ipam_uuid, {})
+        self._subnet_objs.setdefault(ipam_uuid, SubnetObjDict())
         ipam_fq_name_str = ':'.join(ipam_dict['fq_name'])
         ipam_subnets_dict = ipam_dict.get('ipam_subnets')
         if ipam_subnets_dict:
@@ -658,7 +798,7 @@ class AddrMgmt(object):
 
     def _create_net_subnet_objs(self, vn_fq_name_str, vn_uuid, vn_dict,
                                 should_persist):
-        self._subnet_objs.setdefault(vn_uuid, {})
+        self._subnet_objs.setdefault(vn_uuid, SubnetObjDict())
         # create subnet for each new subnet
         refs = vn_dict.get('network_ipam_refs')
         if refs:
@@ -891,13 +1031,14 @@ class AddrMgmt(object):
     def check_overlap_with_refs(self, refs_list, req_list=None):
         if req_list is None:
             return True, ""
-        req_subnets = [IPNetwork(subnet) for subnet in req_list]
-        refs_subnets = [IPNetwork(subnet) for subnet in refs_list]
-        for net1 in req_subnets:
-            for net2 in refs_subnets:
-                if net1 in net2 or net2 in net1:
-                    err_msg = "Overlapping addresses: "
-                    return False, err_msg + str([net1, net2])
+        refs_index = SubnetIntervalIndex(dict(enumerate(refs_list)))
+        for subnet in req_list:
+            net1 = IPNetwork(subnet)
+            overlap = refs_index.find_overlap(net1)
+            if overlap:
+                net2 = overlap[1]
+                err_msg = "Overlapping addresses: "
+                return False, err_msg + str([net1, net2])
 
         return True, ""
     # end check_overlap_with_refs
@@ -905,12 +1046,11 @@ class AddrMgmt(object):
     # check subnets associated with ipam or vn, return error if
     # any two subnets have overal ip address
     def check_subnet_overlap(self, requested_subnets):
-        subnets = [IPNetwork(subnet) for subnet in requested_subnets]
-        for i, net1 in enumerate(subnets):
-            for net2 in subnets[i+1:]:
-                if net1 in net2 or net2 in net1:
-                    err_msg = "Overlapping addresses: "
-                    return False, err_msg + str([net1, net2])
+        index = SubnetIntervalIndex(dict(enumerate(requested_subnets)))
+        overlap = index.first_overlap()
+        if overlap:
+            err_msg = "Overlapping addresses: "
+            return False, err_msg + str(list(overlap))
 
         return True, ""
     # end check_subnet_overlap
@@ -1310,7 +1450,7 @@ class AddrMgmt(object):
             subnet_obj = self._subnet_objs[obj_uuid][subnet_name]
         except KeyError:
             if obj_uuid not in self._subnet_objs:
-                self._subnet_objs[obj_uuid] = {}
+                self._subnet_objs[obj_uuid] = SubnetObjDict()
             subnet_obj = Subnet(
                 '%s:%s' % (fq_name_str, subnet_name),
                 subnet_dict['ip_prefix'],
@@ -1570,12 +1710,11 @@ class AddrMgmt(object):
             if not subnet_objs:
                 continue
 
-            for subnet_name in subnet_objs:
-                subnet_obj = subnet_objs[subnet_name]
-                if not subnet_obj.ip_belongs(ip_addr):
-                    continue
-                ip_addr = subnet_obj.ip_set_in_use(ipaddr=ip_addr)
-                return True
+            subnet_obj = subnet_objs.find_by_ip(ip_addr)
+            if subnet_obj is None:
+                continue
+            ip_addr = subnet_obj.ip_set_in_use(ipaddr=ip_addr)
+            return True
 
         return False
     # end _ipam_ip_alloc_notify
@@ -1629,14 +1768,10 @@ class AddrMgmt(object):
             if subnet_objs is None:
                 continue
 
-            for subnet_name in subnet_objs:
-                if sub and sub != subnet_name:
-                    continue
-
-                subnet_obj = subnet_objs[subnet_name]
-                if subnet_obj.ip_belongs(ip_addr):
-                    subnet_obj.ip_free(IPAddress(ip_addr))
-                    return True
+            subnet_obj = subnet_objs.find_by_ip(ip_addr, sub)
+            if subnet_obj:
+                subnet_obj.ip_free(IPAddress(ip_addr))
+                return True
         return False
     # end _ipam_ip_free_req
 
@@ -1678,12 +1813,9 @@ class AddrMgmt(object):
                                 ipam_fq_name, ipam_uuid, False)
             if subnet_objs is None:
                 continue
-            for subnet_name in subnet_objs:
-                if sub and sub != subnet_name:
-                    continue
-                subnet_obj = subnet_objs[subnet_name]
-                if subnet_obj.ip_belongs(ip_addr):
-                    return subnet_obj.is_ip_allocated(IPAddress(ip_addr))
+            subnet_obj = subnet_objs.find_by_ip(ip_addr, sub)
+            if subnet_obj:
+                return subnet_obj.is_ip_allocated(IPAddress(ip_addr))
         raise cfgm_common.exceptions.VncError("")
     #end _ipam_is_ip_allocated
 
@@ -1729,21 +1861,25 @@ class AddrMgmt(object):
         for ipam_ref in ipam_refs:
             ipam_uuid = ipam_ref['uuid']
 
-            for subnet_name in self._subnet_objs.get(ipam_uuid) or []:
-                subnet_obj = self._subnet_objs[ipam_uuid][subnet_name]
-                if subnet_obj.ip_belongs(ip_addr):
-                    subnet_obj.ip_reset_in_use(ip_addr)
-                    return True
+            subnet_objs = self._subnet_objs.get(ipam_uuid)
+            if not subnet_objs:
+                continue
+            subnet_obj = subnet_objs.find_by_ip(ip_addr)
+            if subnet_obj:
+                subnet_obj.ip_reset_in_use(ip_addr)
+                return True
 
         return False
     # end _ipam_ip_free_notify
 
     def _net_ip_free_notify(self, ip_addr, vn_uuid):
-        for subnet_name in self._subnet_objs.get(vn_uuid) or []:
-            subnet_obj = self._subnet_objs[vn_uuid][subnet_name]
-            if subnet_obj.ip_belongs(ip_addr):
-                subnet_obj.ip_reset_in_use(ip_addr)
-                return True
+        subnet_objs = self._subnet_objs.get(vn_uuid)
+        if not subnet_objs:
+            return False
+        subnet_obj = subnet_objs.find_by_ip(ip_addr)
+        if subnet_obj:
+            subnet_obj.ip_reset_in_use(ip_addr)
+            return True
         return False
     # end _net_ip_free_notify
 
@@ -28,6 +28,7 @@ import os
 import re
 import random
 import socket
+import types
 from cfgm_common import jsonutils as json
 from provision_defaults import *
 import uuid
@@ -64,6 +65,7 @@ bottle.BaseRequest.MEMFILE_MAX = 1024000
 import utils
 import context
 from context import get_request, get_context, set_context, use_context
+from context import clear_context
 from context import ApiContext
 import vnc_cfg_types
 from vnc_db import VncDbClient
@@ -106,6 +108,7 @@ from cfgm_common.uve.nodeinfo.ttypes import NodeStatusUVE, \
     NodeStatus
 
 from sandesh.traces.ttypes import RestApiTrace
+from sandesh.introspect import ttypes as sandesh_introspect
 from vnc_bottle import get_bottle_server
 from cfgm_common.vnc_greenlets import VncGreenlet
 
@@ -134,6 +137,8 @@ _ACTION_RESOURCES = [
      'method': 'POST', 'method_name': 'stop_profile'},
     {'uri': '/list-bulk-collection', 'link_name': 'list-bulk-collection',
      'method': 'POST', 'method_name': 'list_bulk_collection_http_post'},
+    {'uri': '/bulk', 'link_name': 'bulk',
+     'method': 'POST', 'method_name': 'bulk_http_post'},
     {'uri': '/obj-perms', 'link_name': 'obj-perms',
      'method': 'GET', 'method_name': 'obj_perms_http_get'},
     {'uri': '/chown', 'link_name': 'chown',
@@ -192,6 +197,11 @@ class VncApiServer(object):
         'virtual_network', 'virtual-network',
         'network_ipam', 'network-ipam',
     ]
+    # objects read from db per page when streaming a list response
+    _LIST_STREAM_PAGE_SIZE = 1000
+    # max number of operations in a request on /bulk
+    _BULK_MAX_OPERATIONS = 1000
+
     def __new__(cls, *args, **kwargs):
         obj = super(VncApiServer, cls).__new__(cls, *args, **kwargs)
         obj.api_bottle = bottle.Bottle()
@@ -561,8 +571,10 @@ class VncApiServer(object):
 
             get_context().set_state('DBE_CREATE')
 
-            if quota_limit >= 0:
-                #master_election
+            if quota_limit >= 0 and not db_conn.has_quota_counters():
+                # no quota counters in this db, check the current count and
+                # create under a per type election so that concurrent
+                # creates see each other
                 ret = {'ok': None, 'result': None}
                 def _create():
                     (ok, result) = r_class.check_for_quota(obj_type, obj_dict,
@@ -581,7 +593,17 @@ class VncApiServer(object):
                 if not ret['ok']:
                     return ret['ok'], ret['result']
             else:
-                #normal execution
+                if quota_limit >= 0:
+                    # counted in project quota counter before create, so
+                    # that concurrent creates see each other
+                    (ok, result) = r_class.check_for_quota(obj_type, obj_dict,
+                                                           quota_limit, proj_uuid, db_conn)
+                    if not ok:
+                        return (ok, result)
+                    get_context().push_undo(
+                        QuotaHelper.release_quota_for_resource,
+                        db_conn, obj_type, proj_uuid)
+
                 (ok, result) = db_conn.dbe_create(obj_type, obj_id, obj_dict)
                 if not ok:
                     return (ok, result)
@@ -915,6 +937,7 @@ class VncApiServer(object):
             (ok, del_result) = db_conn.dbe_delete(obj_type, id, read_result)
             if not ok:
                 return (ok, del_result)
+            r_class.release_quota(obj_type, read_result, db_conn)
 
             # type-specific hook
             get_context().set_state('POST_DBE_DELETE')
@@ -1023,9 +1046,22 @@ class VncApiServer(object):
         else:
             exclude_hrefs = False
 
+        page_marker = get_request().query.get('page_marker') or None
+        try:
+            page_limit = int(get_request().query.page_limit or 0) or None
+        except ValueError:
+            raise cfgm_common.exceptions.HttpError(
+                400, 'Invalid page_limit ' + get_request().query.page_limit)
+
+        if 'stream' in get_request().query:
+            is_stream = 'true' in get_request().query.stream.lower()
+        else:
+            is_stream = False
+
         return self._list_collection(obj_type, parent_uuids, back_ref_uuids,
                                      obj_uuids, is_count, is_detail, filters,
-                                     req_fields, include_shared, exclude_hrefs)
+                                     req_fields, include_shared, exclude_hrefs,
+                                     page_marker, page_limit, is_stream)
     # end http_resource_list
 
     # internal_request_<oper> - handlers of internally generated requests
@@ -1387,6 +1423,10 @@ class VncApiServer(object):
         self._addr_mgmt = addr_mgmt
         vnc_cfg_types.Resource.addr_mgmt = addr_mgmt
 
+        # resync progress can be queried while db init is underway
+        sandesh_introspect.DbResyncProgressReq.handle_request = \
+            self.sandesh_db_resync_progress_handle_request
+
         # DB interface initialization
         if self._args.wipe_config:
             self._db_connect(True)
@@ -1394,6 +1434,11 @@ class VncApiServer(object):
             self._db_connect(self._args.reset_config)
             self._db_init_entries()
 
+        sandesh_introspect.ObjectCacheStatsReq.handle_request = \
+            self.sandesh_obj_cache_stats_handle_request
+        sandesh_introspect.RbacRuleCacheStatsReq.handle_request = \
+            self.sandesh_rbac_rule_cache_stats_handle_request
+
         # API/Permissions check
         # after db init (uses db_conn)
         self._rbac = vnc_rbac.VncRbac(self, self._db_conn)
@@ -1509,7 +1554,10 @@ class VncApiServer(object):
             return
 
         rest_trace.status = bottle.response.status
-        rest_trace.response_body = json.dumps(response)
+        if isinstance(response, types.GeneratorType):
+            rest_trace.response_body = '<streamed>'
+        else:
+            rest_trace.response_body = json.dumps(response)
         rest_trace.trace_msg(name='RestApiTraceBuf', sandesh=self._sandesh)
     # end _generate_rest_api_response_trace
 
@@ -1530,7 +1578,10 @@ class VncApiServer(object):
                 response = handler(*args, **kwargs)
                 self._generate_rest_api_response_trace(trace, response)
 
-                self._extensions_transform_response(get_request(), response)
+                if not isinstance(response, types.GeneratorType):
+                    # streamed responses can't be transformed
+                    self._extensions_transform_response(get_request(),
+                                                        response)
 
                 return response
             except Exception as e:
@@ -2125,6 +2176,147 @@ class VncApiServer(object):
         return {'uuid': obj_uuid}
     # end ref_relax_for_delete_http_post
 
+    def _bulk_validate_operation(self, idx, op):
+        if not isinstance(op, dict):
+            return 'operation %d is not a dict' %(idx)
+        operation = (op.get('operation') or '').upper()
+        if operation not in ('CREATE', 'UPDATE', 'DELETE', 'REF-UPDATE',
+                             'PROP-COLLECTION-UPDATE'):
+            return ('operation %d should be create, update, delete, '
+                    'ref-update or prop-collection-update: %s' %(
+                        idx, op.get('operation')))
+        if operation not in ('REF-UPDATE', 'PROP-COLLECTION-UPDATE'):
+            try:
+                self.get_resource_class(op.get('type'))
+            except TypeError:
+                return "operation %d resource type '%s' not found" %(
+                    idx, op.get('type'))
+        if operation in ('UPDATE', 'DELETE') and not op.get('uuid'):
+            return 'operation %d needs uuid' %(idx)
+        if (operation in ('CREATE', 'UPDATE', 'REF-UPDATE',
+                          'PROP-COLLECTION-UPDATE') and
+                not isinstance(op.get('data'), dict)):
+            return 'operation %d needs data as a dict' %(idx)
+        return None
+    # end _bulk_validate_operation
+
+    def _bulk_operation(self, op):
+        # run one operation of a bulk request as its own request, with the
+        # credentials and tenant of the bulk request
+        operation = op['operation'].upper()
+        if operation == 'REF-UPDATE':
+            path = '/ref-update'
+            method = 'POST'
+            json_as_dict = op['data']
+        elif operation == 'PROP-COLLECTION-UPDATE':
+            path = '/prop-collection-update'
+            method = 'POST'
+            json_as_dict = op['data']
+        else:
+            r_class = self.get_resource_class(op['type'])
+            resource_type = r_class.resource_type
+            object_type = r_class.object_type
+            if operation == 'CREATE':
+                path = '/%ss' %(resource_type)
+                method = 'POST'
+                json_as_dict = {resource_type: op['data']}
+            elif operation == 'UPDATE':
+                path = '/%s/%s' %(resource_type, op['uuid'])
+                method = 'PUT'
+                json_as_dict = {resource_type: op['data']}
+            else:
+                path = '/%s/%s' %(resource_type, op['uuid'])
+                method = 'DELETE'
+                json_as_dict = None
+
+        orig_context = get_context()
+        orig_request = get_request()
+        # drop request attributes cached by bottle for the bulk request
+        environ = dict((k, v) for k, v in orig_request.environ.items()
+                       if not k.startswith('bottle.request.'))
+        environ['PATH_INFO'] = path
+        environ['REQUEST_METHOD'] = method
+        b_req = bottle.BaseRequest(environ)
+        i_req = context.ApiInternalRequest(
+            b_req.url, b_req.urlparts, b_req.environ, b_req.headers,
+            json_as_dict, None)
+        try:
+            set_context(context.ApiContext(internal_req=i_req))
+            # same extension and rbac checks as the standalone request
+            self._extensions_transform_request(i_req)
+            self._extensions_validate_request(i_req)
+            (ok, status) = self._rbac.validate_request(i_req)
+            if not ok:
+                (code, err_msg) = status
+                raise cfgm_common.exceptions.HttpError(code, err_msg)
+            if operation == 'CREATE':
+                response = self.http_resource_create(object_type)
+            elif operation == 'UPDATE':
+                response = self.http_resource_update(object_type, op['uuid'])
+            elif operation == 'DELETE':
+                response = self.http_resource_delete(object_type, op['uuid'])
+            elif operation == 'REF-UPDATE':
+                response = self.ref_update_http_post()
+            else:
+                response = self.prop_collection_http_post()
+            self._extensions_transform_response(i_req, response)
+            return response
+        finally:
+            set_context(orig_context)
+    # end _bulk_operation
+
+    def bulk_http_post(self):
+        # Operations are checked together up front and then applied in
+        # order. Each is committed on its own, a failure doesn't undo the
+        # operations before it and stops the rest unless continue_on_error.
+        # Their notifications are published together once all are done.
+        operations = get_request().json.get('operations')
+        continue_on_error = get_request().json.get('continue_on_error', False)
+        if not isinstance(operations, list):
+            raise cfgm_common.exceptions.HttpError(
+                400, 'Bad Request: operations should be a list')
+        if len(operations) > self._BULK_MAX_OPERATIONS:
+            raise cfgm_common.exceptions.HttpError(
+                400, 'Bad Request: more than %d operations' %(
+                    self._BULK_MAX_OPERATIONS))
+        for idx, op in enumerate(operations):
+            err_msg = self._bulk_validate_operation(idx, op)
+            if err_msg:
+                raise cfgm_common.exceptions.HttpError(
+                    400, 'Bad Request: ' + err_msg)
+
+        results = []
+        self._db_conn.dbe_hold_notifications()
+        try:
+            for op in operations:
+                try:
+                    rsp_body = self._bulk_operation(op)
+                    results.append({'status': 200, 'data': rsp_body or {}})
+                except cfgm_common.exceptions.HttpError as e:
+                    results.append({'status': e.status_code,
+                                    'error': e.content})
+                    if not continue_on_error:
+                        break
+                except bottle.HTTPError as e:
+                    # aborted by an extension
+                    results.append({'status': e.status_code,
+                                    'error': e.body})
+                    if not continue_on_error:
+                        break
+                except Exception as e:
+                    # earlier operations are committed, report them along
+                    # with the failure rather than failing the whole request
+                    err_msg = cfgm_common.utils.detailed_traceback()
+                    self.config_log(err_msg, level=SandeshLevel.SYS_ERR)
+                    results.append({'status': 500, 'error': str(e)})
+                    if not continue_on_error:
+                        break
+        finally:
+            self._db_conn.dbe_release_notifications()
+
+        return {'results': results}
+    # end bulk_http_post
+
     def fq_name_to_id_http_post(self):
         self._post_common(None, {})
         type = get_request().json.get('type')
@@ -2298,10 +2490,20 @@ class VncApiServer(object):
 
         exclude_hrefs = get_request().json.get('exclude_hrefs', False)
 
+        page_marker = get_request().json.get('page_marker') or None
+        try:
+            page_limit = int(get_request().json.get('page_limit') or 0) or None
+        except ValueError:
+            raise cfgm_common.exceptions.HttpError(
+                400, 'Invalid page_limit %s'
+                % (get_request().json.get('page_limit')))
+        is_stream = get_request().json.get('stream', False)
+
         return self._list_collection(r_class.object_type, parent_uuids,
                                      back_ref_uuids, obj_uuids, is_count,
                                      is_detail, filters, req_fields,
-                                     include_shared, exclude_hrefs)
+                                     include_shared, exclude_hrefs,
+                                     page_marker, page_limit, is_stream)
     # end list_bulk_collection_http_post
 
     # Private Methods
@@ -2334,6 +2536,8 @@ class VncApiServer(object):
                                          [--default_encoding ascii ]
                                          --object_cache_size 10000
                                          --object_cache_exclude_types ''
+                                         --object_cache_max_bytes 0
+                                         --object_cache_invalidation timestamp
         '''
         self._args, _ = utils.parse_args(args_str)
     # end _parse_args
@@ -2409,6 +2613,8 @@ class VncApiServer(object):
         obj_cache_exclude_types = \
             [t.replace('-', '_').strip() for t in
              self._args.object_cache_exclude_types.split(',')]
+        obj_cache_max_bytes = int(self._args.object_cache_max_bytes)
+        obj_cache_invalidation = self._args.object_cache_invalidation
 
         rdbms_server_list = self._args.rdbms_server_list
         rdbms_user = self._args.rdbms_user
@@ -2440,7 +2646,12 @@ class VncApiServer(object):
             kombu_ssl_certfile=self._args.kombu_ssl_certfile,
             kombu_ssl_ca_certs=self._args.kombu_ssl_ca_certs,
             obj_cache_entries=obj_cache_entries,
-            obj_cache_exclude_types=obj_cache_exclude_types, connection=rdbms_connection)
+            obj_cache_exclude_types=obj_cache_exclude_types,
+            obj_cache_max_bytes=obj_cache_max_bytes,
+            obj_cache_invalidation=obj_cache_invalidation,
+            db_resync_concurrency=int(self._args.db_resync_concurrency),
+            db_resync_chunk_size=int(self._args.db_resync_chunk_size),
+            connection=rdbms_connection)
 
         #TODO refacter db connection management.
         self._addr_mgmt._get_db_conn()
@@ -2716,7 +2927,8 @@ class VncApiServer(object):
                          back_ref_uuids=None, obj_uuids=None,
                          is_count=False, is_detail=False, filters=None,
                          req_fields=None, include_shared=False,
-                         exclude_hrefs=False):
+                         exclude_hrefs=False, page_marker=None,
+                         page_limit=None, is_stream=False):
         resource_type, r_class = self._validate_resource_type(obj_type)
         is_admin = self.is_admin_request()
         if is_admin:
@@ -2724,19 +2936,115 @@ class VncApiServer(object):
         else:
             field_names = [u'id_perms'] + (req_fields or [])
 
-        (ok, result) = self._db_conn.dbe_list(obj_type,
+        stream_limit = None
+        if is_count:
+            # counting is not paginated
+            page_limit = None
+            is_stream = False
+        elif is_stream:
+            # streamed lists are read in chunks of at most
+            # _LIST_STREAM_PAGE_SIZE, a page_limit still bounds the whole
+            # list and a marker is returned to continue from
+            stream_limit = page_limit
+            page_limit = min(page_limit or self._LIST_STREAM_PAGE_SIZE,
+                             self._LIST_STREAM_PAGE_SIZE)
+
+        def dbe_list(marker, count=None):
+            ret = self._db_conn.dbe_list(obj_type,
                              parent_uuids, back_ref_uuids, obj_uuids, is_count and self.is_admin_request(),
-                             filters, is_detail=is_detail, field_names=field_names,
+                             filters, paginate_start=marker,
+                             paginate_count=count or page_limit,
+                             is_detail=is_detail,
+                             field_names=field_names,
                              include_shared=include_shared)
-        if not ok:
-            self.config_object_error(None, None, '%ss' %(obj_type),
-                                     'dbe_list', result)
-            raise cfgm_common.exceptions.HttpError(404, result)
+            if page_limit is None:
+                ret = ret + (None,)
+            (ok, result, marker) = ret
+            if not ok:
+                self.config_object_error(None, None, '%ss' %(obj_type),
+                                         'dbe_list', result)
+                raise cfgm_common.exceptions.HttpError(404, result)
+            return result, marker
+        # end dbe_list
+
+        (result, marker) = dbe_list(page_marker)
 
         # If only counting, return early
         if is_count and self.is_admin_request():
             return {'%ss' %(resource_type): {'count': result}}
 
+        if is_stream:
+            return self._list_collection_stream(resource_type, result,
+                marker, dbe_list, is_admin, is_detail, req_fields,
+                exclude_hrefs, page_limit, stream_limit)
+
+        obj_dicts = self._list_collection_filter(resource_type, result,
+            is_admin, is_detail, req_fields, exclude_hrefs)
+
+        if is_count:
+            return {'%ss' %(resource_type): {'count': len(obj_dicts)}}
+        if page_limit:
+            return {'%ss' %(resource_type): obj_dicts, 'marker': marker}
+        return {'%ss' %(resource_type): obj_dicts}
+    # end _list_collection
+
+    def _list_collection_stream(self, resource_type, result, marker,
+                                dbe_list, is_admin, is_detail, req_fields,
+                                exclude_hrefs, chunk_size, limit=None):
+        # yield the same body as a non-streamed list one chunk at a time.
+        # With a limit the list stops after that many objects and, as for
+        # a non-streamed page, ends with the 'marker' to continue from.
+        # Errors after the first chunk can't change the response status
+        # anymore, the body then ends with the 'marker' of the chunk that
+        # failed and an 'error' member so that the client can tell a cut
+        # short list from a complete one and resume it.
+        api_ctx = get_context()
+        bottle.response.content_type = 'application/json; charset="UTF-8"'
+
+        def stream_pages(result, marker):
+            set_context(api_ctx)
+            try:
+                yield '{"%ss": [' %(resource_type)
+                first = True
+                remaining = limit
+                while True:
+                    for obj_dict in self._list_collection_filter(
+                            resource_type, result, is_admin, is_detail,
+                            req_fields, exclude_hrefs):
+                        if first:
+                            first = False
+                            yield json.dumps(obj_dict)
+                        else:
+                            yield ', ' + json.dumps(obj_dict)
+                    if marker is None:
+                        break
+                    count = chunk_size
+                    if remaining is not None:
+                        remaining -= len(result)
+                        if remaining <= 0:
+                            break
+                        count = min(chunk_size, remaining)
+                    try:
+                        (result, marker) = dbe_list(marker, count)
+                    except Exception as e:
+                        err_msg = cfgm_common.utils.detailed_traceback()
+                        self.config_log(err_msg, level=SandeshLevel.SYS_ERR)
+                        yield '], "marker": %s, "error": %s}' %(
+                            json.dumps(marker), json.dumps(str(e)))
+                        return
+                if limit:
+                    yield '], "marker": %s}' %(json.dumps(marker))
+                else:
+                    yield ']}'
+            finally:
+                clear_context()
+        # end stream_pages
+
+        return stream_pages(result, marker)
+    # end _list_collection_stream
+
+    def _list_collection_filter(self, resource_type, result, is_admin,
+                                is_detail, req_fields, exclude_hrefs):
         allowed_fields = ['uuid', 'href', 'fq_name'] + (req_fields or [])
         obj_dicts = []
         if is_admin:
@@ -2789,10 +3097,8 @@ class VncApiServer(object):
                 if not exclude_hrefs:
                     obj_dict['href'] = self.generate_url(resource_type, obj_result['uuid'])
 
-        if is_count:
-            return {'%ss' %(resource_type): {'count': len(obj_dicts)}}
-        return {'%ss' %(resource_type): obj_dicts}
-    # end _list_collection
+        return obj_dicts
+    # end _list_collection_filter
 
     def get_db_connection(self):
         return self._db_conn
@@ -2893,6 +3199,37 @@ class VncApiServer(object):
                 sandesh=self._sandesh)
     # end config_log
 
+    def sandesh_obj_cache_stats_handle_request(self, req):
+        resp = sandesh_introspect.ObjectCacheStatsResp()
+        stats = self._db_conn.obj_cache_stats()
+        if stats is not None:
+            resp.stats = sandesh_introspect.ObjectCacheStats(**stats)
+        resp.response(req.context())
+    # end sandesh_obj_cache_stats_handle_request
+
+    def sandesh_rbac_rule_cache_stats_handle_request(self, req):
+        resp = sandesh_introspect.RbacRuleCacheStatsResp()
+        resp.stats = sandesh_introspect.RbacRuleCacheStats(
+            **self._rbac.get_rule_cache_stats())
+        resp.response(req.context())
+    # end sandesh_rbac_rule_cache_stats_handle_request
+
+    def sandesh_db_resync_progress_handle_request(self, req):
+        resp = sandesh_introspect.DbResyncProgressResp()
+        db_conn = getattr(self, '_db_conn', None)
+        if db_conn is not None:
+            resp.progress = sandesh_introspect.DbResyncProgress(
+                **db_conn.db_resync_progress())
+        resp.response(req.context())
+    # end sandesh_db_resync_progress_handle_request
+
+    def invalidate_rbac_rule_cache(self):
+        # notifications can get processed before rbac is initialized
+        rbac = getattr(self, '_rbac', None)
+        if rbac:
+            rbac.invalidate_rule_cache()
+    # end invalidate_rbac_rule_cache
+
     def _set_api_audit_info(self, apiConfig):
         apiConfig.url = get_request().url
         apiConfig.remote_ip = get_request().headers.get('Host')
@@ -46,19 +46,25 @@ def _parse_rt(rt):
 class ResourceDbMixin(object):
 
     @classmethod
-    def get_quota_for_resource(cls, obj_type, obj_dict, db_conn):
+    def _get_quota_project_uuid(cls, obj_type, obj_dict, db_conn):
         user_visible = obj_dict['id_perms'].get('user_visible', True)
         if not user_visible or obj_type not in QuotaType.attr_fields:
-            return True, -1, None
+            return None
 
-        if 'project_refs' in obj_dict:
+        if obj_dict.get('project_refs'):
             proj_dict = obj_dict['project_refs'][0]
             proj_uuid = proj_dict.get('uuid')
             if not proj_uuid:
                 proj_uuid = db_conn.fq_name_to_uuid('project', proj_dict['to'])
+            return proj_uuid
         elif 'parent_type' in obj_dict and obj_dict['parent_type'] == 'project':
-            proj_uuid = obj_dict['parent_uuid']
-        else:
+            return obj_dict['parent_uuid']
+        return None
+
+    @classmethod
+    def get_quota_for_resource(cls, obj_type, obj_dict, db_conn):
+        proj_uuid = cls._get_quota_project_uuid(obj_type, obj_dict, db_conn)
+        if not proj_uuid:
             return True, -1, None
 
         (ok, proj_dict) = QuotaHelper.get_project_dict_for_quota(proj_uuid, db_conn)
@@ -78,6 +84,14 @@ class ResourceDbMixin(object):
         else:
             return True, ''
 
+    @classmethod
+    def release_quota(cls, obj_type, obj_dict, db_conn):
+        # resource deleted, uncount it from project quota counter if any
+        proj_uuid = cls._get_quota_project_uuid(obj_type, obj_dict, db_conn)
+        if proj_uuid:
+            QuotaHelper.release_quota_for_resource(db_conn, obj_type,
+                                                   proj_uuid)
+
     @classmethod
     def pre_dbe_create(cls, tenant_name, obj_dict, db_conn):
         return True, ''
@@ -1962,6 +1976,89 @@ class DomainServer(Resource, Domain):
         return (True, "")
     # end pre_dbe_create
 
+    @classmethod
+    def dbe_create_notification(cls, db_conn, obj_id):
+        cls.server.invalidate_rbac_rule_cache()
+    # end dbe_create_notification
+
+    @classmethod
+    def dbe_delete_notification(cls, obj_id, obj_dict):
+        cls.server.invalidate_rbac_rule_cache()
+    # end dbe_delete_notification
+
+# end class DomainServer
+
+
+class ProjectServer(Resource, Project):
+
+    @classmethod
+    def post_dbe_update(cls, id, fq_name, obj_dict, db_conn, **kwargs):
+        # counters are kept only for resources under quota, recount after
+        # quota changes
+        if 'quota' in obj_dict:
+            db_conn.quota_counter_delete(id)
+        return True, ''
+    # end post_dbe_update
+
+    @classmethod
+    def post_dbe_delete(cls, id, obj_dict, db_conn):
+        db_conn.quota_counter_delete(id)
+        return True, ''
+    # end post_dbe_delete
+
+    @classmethod
+    def dbe_create_notification(cls, db_conn, obj_id):
+        cls.server.invalidate_rbac_rule_cache()
+    # end dbe_create_notification
+
+    @classmethod
+    def dbe_delete_notification(cls, obj_id, obj_dict):
+        cls.server.invalidate_rbac_rule_cache()
+    # end dbe_delete_notification
+
+# end class ProjectServer
+
+
+class ApiAccessListServer(Resource, ApiAccessList):
+    # rules are invalidated right away on the server handling the
+    # request and on notification in the other servers
+
+    @classmethod
+    def post_dbe_create(cls, tenant_name, obj_dict, db_conn):
+        cls.server.invalidate_rbac_rule_cache()
+        return True, ''
+    # end post_dbe_create
+
+    @classmethod
+    def post_dbe_update(cls, id, fq_name, obj_dict, db_conn, **kwargs):
+        cls.server.invalidate_rbac_rule_cache()
+        return True, ''
+    # end post_dbe_update
+
+    @classmethod
+    def post_dbe_delete(cls, id, obj_dict, db_conn):
+        cls.server.invalidate_rbac_rule_cache()
+        return True, ''
+    # end post_dbe_delete
+
+    @classmethod
+    def dbe_create_notification(cls, db_conn, obj_id):
+        cls.server.invalidate_rbac_rule_cache()
+    # end dbe_create_notification
+
+    @classmethod
+    def dbe_update_notification(cls, obj_id):
+        cls.server.invalidate_rbac_rule_cache()
+    # end dbe_update_notification
+
+    @classmethod
+    def dbe_delete_notification(cls, obj_id, obj_dict):
+        cls.server.invalidate_rbac_rule_cache()
+    # end dbe_delete_notification
+
+# end class ApiAccessListServer
+
+
 class ServiceTemplateServer(Resource, ServiceTemplate):
     generate_default_instance = False
 
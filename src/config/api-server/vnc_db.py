@@ -10,6 +10,7 @@ from gevent import monkey
 monkey.patch_all()
 import gevent
 import gevent.event
+import gevent.pool
 
 import time
 from pprint import pformat
@@ -41,6 +42,7 @@ import os
 from provision_defaults import *
 from cfgm_common.exceptions import *
 from vnc_quota import *
+from utils import DB_RESYNC_CONCURRENCY, DB_RESYNC_CHUNK_SIZE
 from pysandesh.gen_py.sandesh.ttypes import SandeshLevel
 from sandesh_common.vns.constants import USERAGENT_KEYSPACE_NAME
 from sandesh.traces.ttypes import DBRequestTrace, MessageBusNotifyTrace
@@ -79,7 +81,8 @@ class VncServerCassandraClient(VncCassandraClient):
 
     def __init__(self, db_client_mgr, cass_srv_list, reset_config, db_prefix,
                       cassandra_credential, walk, obj_cache_entries,
-                      obj_cache_exclude_types):
+                      obj_cache_exclude_types, obj_cache_max_bytes=0,
+                      obj_cache_invalidation=None):
         self._db_client_mgr = db_client_mgr
         keyspaces = self._UUID_KEYSPACE.copy()
         keyspaces[self._USERAGENT_KEYSPACE_NAME] = {
@@ -89,7 +92,9 @@ class VncServerCassandraClient(VncCassandraClient):
             generate_url=db_client_mgr.generate_url, reset_config=reset_config,
             credential=cassandra_credential, walk=walk,
             obj_cache_entries=obj_cache_entries,
-            obj_cache_exclude_types=obj_cache_exclude_types)
+            obj_cache_exclude_types=obj_cache_exclude_types,
+            obj_cache_max_bytes=obj_cache_max_bytes,
+            obj_cache_invalidation=obj_cache_invalidation)
     # end __init__
 
     def config_log(self, msg, level):
@@ -132,7 +137,11 @@ class VncServerCassandraClient(VncCassandraClient):
         # end for all updates
 
         self.update_last_modified(bch, obj_type, obj_uuid)
-        bch.send()
+        try:
+            bch.send()
+        finally:
+            # don't serve stale collections till the notification comes
+            self._obj_cache_mgr.evict([obj_uuid])
     # end prop_collection_update
 
     def ref_update(self, obj_type, obj_uuid, ref_obj_type, ref_uuid,
@@ -146,7 +155,11 @@ class VncServerCassandraClient(VncCassandraClient):
         else:
             pass
         self.update_last_modified(bch, obj_type, obj_uuid)
-        bch.send()
+        try:
+            bch.send()
+        finally:
+            # both ends of the ref changed, don't wait for the notification
+            self._obj_cache_mgr.evict([obj_uuid, ref_uuid])
     # end ref_update
 
     def ref_relax_for_delete(self, obj_uuid, ref_uuid):
@@ -270,6 +283,11 @@ class VncServerKombuClient(VncKombuClient):
         self._db_client_mgr.config_log(msg, level)
     # end config_log
 
+    def prepare_to_consume(self):
+        # notifications may have been missed while disconnected
+        self._db_client_mgr.obj_cache_reset()
+    # end prepare_to_consume
+
     @ignore_exceptions
     def _generate_msgbus_notify_trace(self, oper_info):
         req_id = oper_info.get('request-id',
@@ -290,6 +308,11 @@ class VncServerKombuClient(VncKombuClient):
             self.config_log(msg, level=SandeshLevel.SYS_DEBUG)
             trace = self._generate_msgbus_notify_trace(oper_info)
 
+            self._db_client_mgr.obj_cache_notify(oper_info['oper'],
+                                                 oper_info['uuid'])
+            if 'ref_uuid' in oper_info:
+                self._db_client_mgr.obj_cache_notify(oper_info['oper'],
+                                                     oper_info['ref_uuid'])
             self._db_client_mgr.dbe_uve_trace(**oper_info)
             if oper_info['oper'] == 'CREATE':
                 self._dbe_create_notification(oper_info)
@@ -310,7 +333,8 @@ class VncServerKombuClient(VncKombuClient):
                       sandesh=self._sandesh, error_msg=errmsg)
     # end _dbe_subscribe_callback
 
-    def dbe_publish(self, oper, obj_type, obj_id, fq_name, obj_dict=None):
+    def dbe_publish(self, oper, obj_type, obj_id, fq_name, obj_dict=None,
+                    ref_uuid=None):
         req_id = get_trace_id()
         oper_info = {
             'request-id': req_id,
@@ -321,7 +345,29 @@ class VncServerKombuClient(VncKombuClient):
         }
         if obj_dict is not None:
             oper_info['obj_dict'] = obj_dict
-        self.publish(oper_info)
+        if ref_uuid is not None:
+            # the update is a ref-update, referred object changed too
+            oper_info['ref_uuid'] = ref_uuid
+        held = getattr(gevent.getcurrent(), 'held_notifications', None)
+        if held is not None:
+            held.append(oper_info)
+        else:
+            self.publish(oper_info)
+    # end dbe_publish
+
+    def hold_notifications(self):
+        # notifications of the current greenlet's request are kept till
+        # release_notifications(), to be published in one burst
+        gevent.getcurrent().held_notifications = []
+    # end hold_notifications
+
+    def release_notifications(self):
+        held = gevent.getcurrent().held_notifications
+        del gevent.getcurrent().held_notifications
+        for oper_info in held:
+            self.publish(oper_info)
+        return len(held)
+    # end release_notifications
 
     def _dbe_create_notification(self, obj_info):
         obj_type = obj_info['type']
@@ -375,6 +421,7 @@ class VncServerKombuClient(VncKombuClient):
 class VncZkClient(object):
     _SUBNET_PATH = "/api-server/subnets"
     _FQ_NAME_TO_UUID_PATH = "/fq-name-to-uuid"
+    _QUOTA_COUNTER_PATH = "/api-server/quota-counters"
     _MAX_SUBNET_ADDR_ALLOC = 65535
 
     _VN_ID_ALLOC_PATH = "/id/virtual-networks/"
@@ -396,6 +443,7 @@ class VncZkClient(object):
         client_name = '%sapi-%s' %(client_pfx, instance_id)
         self._subnet_path = zk_path_pfx + self._SUBNET_PATH
         self._fq_name_to_uuid_path = zk_path_pfx + self._FQ_NAME_TO_UUID_PATH
+        self._quota_counter_path = zk_path_pfx + self._QUOTA_COUNTER_PATH
         _vn_id_alloc_path = zk_path_pfx + self._VN_ID_ALLOC_PATH
         _sg_id_alloc_path = zk_path_pfx + self._SG_ID_ALLOC_PATH
         self._zk_path_pfx = zk_path_pfx
@@ -415,6 +463,7 @@ class VncZkClient(object):
         if reset_config:
             self._zk_client.delete_node(self._subnet_path, True)
             self._zk_client.delete_node(self._fq_name_to_uuid_path, True)
+            self._zk_client.delete_node(self._quota_counter_path, True)
             self._zk_client.delete_node(_vn_id_alloc_path, True)
             self._zk_client.delete_node(_sg_id_alloc_path, True)
 
@@ -544,6 +593,51 @@ class VncZkClient(object):
         return self._zk_client.is_connected()
     # end is_connected
 
+    def quota_counter_add(self, proj_uuid, obj_type, delta, max_value=None):
+        zk_path = '%s/%s/%s' %(self._quota_counter_path, proj_uuid, obj_type)
+        return self._zk_client.add_to_counter(zk_path, delta, max_value)
+    # end quota_counter_add
+
+    def quota_counter_init(self, proj_uuid, obj_type, count):
+        zk_path = '%s/%s/%s' %(self._quota_counter_path, proj_uuid, obj_type)
+        try:
+            self._zk_client.create_node(zk_path, count)
+        except ResourceExistsError:
+            # initialized meanwhile by another request, keep its counter
+            pass
+    # end quota_counter_init
+
+    def quota_counter_delete(self, proj_uuid):
+        zk_path = '%s/%s' %(self._quota_counter_path, proj_uuid)
+        self._zk_client.delete_node(zk_path, True)
+    # end quota_counter_delete
+
+    def quota_counters(self):
+        for proj_uuid in self._zk_client.get_children(
+                self._quota_counter_path):
+            for obj_type in self._zk_client.get_children(
+                    '%s/%s' %(self._quota_counter_path, proj_uuid)):
+                yield proj_uuid, obj_type
+    # end quota_counters
+
+    def quota_counter_reseed(self, proj_uuid, obj_type, get_count,
+                             min_idle_secs):
+        # set counter to get_count() unless it changed within min_idle_secs
+        # (a create may have counted itself but not be in db yet) or while
+        # counting. Returns True if counter was corrected.
+        zk_path = '%s/%s/%s' %(self._quota_counter_path, proj_uuid, obj_type)
+        node = self._zk_client.read_node(zk_path, include_timestamp=True)
+        if node is None:
+            return False
+        value, stat = node
+        if time.time() - stat.mtime / 1000.0 < min_idle_secs:
+            return False
+        count = get_count()
+        if count is None or count == int(value):
+            return False
+        return self._zk_client.set_node(zk_path, count, version=stat.version)
+    # end quota_counter_reseed
+
     def alloc_vn_id(self, name):
         if name is not None:
             return self._vn_id_allocator.alloc(name)
@@ -575,12 +669,34 @@ class VncZkClient(object):
 
 
 class VncDbClient(object):
+    # fields read at resync for types with upgrade fixups, other types only
+    # need perms2 unless an UVE is sent for them
+    _RESYNC_FIELDS = {
+        'virtual_network': ['logical_router_refs', 'network_ipam_refs'],
+        'virtual_machine_interface':
+            ['virtual_machine_interface_device_owner'],
+        'access_control_list':
+            ['access_control_list_hash', 'access_control_list_entries'],
+        'bgp_router': ['bgp_router_parameters'],
+        'instance_ip':
+            ['subnet_uuid', 'instance_ip_address', 'virtual_network_refs'],
+    }
+    # types resynced before the others, instance_ip fixup uses the subnet
+    # uuids set on networks
+    _RESYNC_FIRST_TYPES = ['virtual_network']
+    # quota counters modified more recently than this at resync are left
+    # alone, their creates/deletes may not have reached the db yet
+    _QUOTA_COUNTER_RESEED_IDLE = 300
+
     def __init__(self, api_svr_mgr, db_srv_list, rabbit_servers, rabbit_port,
                  rabbit_user, rabbit_password, rabbit_vhost, rabbit_ha_mode,
                  reset_config=False, zk_server_ip=None, db_prefix='',
                  db_credential=None, obj_cache_entries=0,
                  obj_cache_exclude_types=None, db_engine='cassandra',
-                 connection=None, **kwargs):
+                 connection=None, obj_cache_max_bytes=0,
+                 obj_cache_invalidation=None,
+                 db_resync_concurrency=DB_RESYNC_CONCURRENCY,
+                 db_resync_chunk_size=DB_RESYNC_CHUNK_SIZE, **kwargs):
         self._db_engine = db_engine
         self._api_svr_mgr = api_svr_mgr
         self._sandesh = api_svr_mgr._sandesh
@@ -600,6 +716,16 @@ class VncDbClient(object):
         }
 
         self._db_resync_done = gevent.event.Event()
+        self._db_resync_concurrency = max(db_resync_concurrency, 1)
+        self._db_resync_chunk_size = max(db_resync_chunk_size, 1)
+        self._db_resync_progress = {
+            'start_time': None,
+            'end_time': None,
+            'types_total': 0,
+            'types_done': 0,
+            'objects_total': 0,
+            'objects_done': 0,
+        }
 
         msg = "Connecting to zookeeper on %s" % (zk_server_ip)
         self.config_log(msg, level=SandeshLevel.SYS_NOTICE)
@@ -619,7 +745,8 @@ class VncDbClient(object):
                 self._object_db = VncServerCassandraClient(
                     self, db_srv_list, reset_config, db_prefix,
                     db_credential, walk, obj_cache_entries,
-                    obj_cache_exclude_types)
+                    obj_cache_exclude_types, obj_cache_max_bytes,
+                    obj_cache_invalidation)
 
             self._zk_db.master_election("/api-server-election", db_client_init)
         elif db_engine == 'rdbms':
@@ -668,16 +795,106 @@ class VncDbClient(object):
     def db_resync(self):
         # Read contents from cassandra and perform DB update if required
         start_time = datetime.datetime.utcnow()
-        self._object_db.walk(self._dbe_resync)
+        self._db_resync_progress['start_time'] = time.time()
+        if self._db_engine == 'cassandra':
+            self._db_resync_objects(self._object_db.get_obj_uuids_by_type())
+        else:
+            self._object_db.walk(self._dbe_resync)
+        self._db_resync_progress['end_time'] = time.time()
         self.config_log("Cassandra DB walk completed.",
             level=SandeshLevel.SYS_INFO)
         self._update_default_quota()
+        self._quota_counters_reseed()
         end_time = datetime.datetime.utcnow()
         msg = "Time elapsed in resyncing db: %s" % (str(end_time - start_time))
         self.config_log(msg, level=SandeshLevel.SYS_DEBUG)
         self._db_resync_done.set()
     # end db_resync
 
+    def _db_resync_objects(self, type_to_uuids):
+        # resync chunks of objects with a bounded pool of greenlets, types
+        # that others depend on first
+        progress = self._db_resync_progress
+        progress['types_total'] = len(type_to_uuids)
+        progress['objects_total'] = sum(
+            len(uuids) for uuids in type_to_uuids.values())
+        progress['types_done'] = 0
+        progress['objects_done'] = 0
+
+        chunk_size = self._db_resync_chunk_size
+        type_chunks_pending = {}
+        def chunks_of(obj_types):
+            chunks = []
+            for obj_type in obj_types:
+                obj_uuids = type_to_uuids[obj_type]
+                type_chunks_pending[obj_type] = 0
+                for i in range(0, len(obj_uuids), chunk_size):
+                    chunks.append((obj_type, obj_uuids[i:i+chunk_size]))
+                    type_chunks_pending[obj_type] += 1
+                if not obj_uuids:
+                    progress['types_done'] += 1
+            return chunks
+        # end chunks_of
+
+        def resync_chunk(chunk):
+            obj_type, obj_uuids = chunk
+            try:
+                self._dbe_resync(obj_type, obj_uuids)
+            except Exception as e:
+                tb = cfgm_common.utils.detailed_traceback()
+                self.config_log(tb, level=SandeshLevel.SYS_ERR)
+            progress['objects_done'] += len(obj_uuids)
+            type_chunks_pending[obj_type] -= 1
+            if type_chunks_pending[obj_type] == 0:
+                progress['types_done'] += 1
+                resync_progress = self.db_resync_progress()
+                self.config_log('Resync: obj_type %s len %s done, '
+                    '%d/%d objects, %.1f objects/sec, eta %.1f secs' %(
+                    obj_type, len(type_to_uuids[obj_type]),
+                    resync_progress['objects_done'],
+                    resync_progress['objects_total'],
+                    resync_progress['objects_per_sec'],
+                    resync_progress['eta_secs']),
+                    level=SandeshLevel.SYS_INFO)
+        # end resync_chunk
+
+        first_types = [t for t in self._RESYNC_FIRST_TYPES
+                       if t in type_to_uuids]
+        other_types = [t for t in type_to_uuids if t not in first_types]
+        resync_pool = gevent.pool.Pool(self._db_resync_concurrency)
+        for obj_types in (first_types, other_types):
+            for _ in resync_pool.imap_unordered(resync_chunk,
+                                                chunks_of(obj_types)):
+                pass
+    # end _db_resync_objects
+
+    def db_resync_progress(self):
+        progress = self._db_resync_progress
+        start_time = progress['start_time']
+        end_time = progress['end_time']
+        if start_time is None:
+            elapsed_secs = 0.0
+        else:
+            elapsed_secs = (end_time or time.time()) - start_time
+        objects_per_sec = 0.0
+        eta_secs = 0.0
+        if elapsed_secs > 0:
+            objects_per_sec = progress['objects_done'] / elapsed_secs
+        if objects_per_sec > 0:
+            eta_secs = (progress['objects_total'] -
+                        progress['objects_done']) / objects_per_sec
+        return {
+            'done': self._db_resync_done.is_set(),
+            'types_total': progress['types_total'],
+            'types_done': progress['types_done'],
+            'objects_total': progress['objects_total'],
+            'objects_done': progress['objects_done'],
+            'elapsed_secs': elapsed_secs,
+            'objects_per_sec': objects_per_sec,
+            'eta_secs': eta_secs,
+        }
+    # end db_resync_progress
+
     def wait_for_resync_done(self):
         self._db_resync_done.wait()
     # end wait_for_resync_done
@@ -813,8 +1030,14 @@ class VncDbClient(object):
                         return
 
     def _dbe_resync(self, obj_type, obj_uuids):
-        obj_class = cfgm_common.utils.obj_type_to_vnc_class(obj_type, __name__)
-        obj_fields = list(obj_class.prop_fields) + list(obj_class.ref_fields)
+        if obj_type in self._UVEMAP:
+            obj_class = cfgm_common.utils.obj_type_to_vnc_class(
+                obj_type, __name__)
+            obj_fields = (list(obj_class.prop_fields) +
+                          list(obj_class.ref_fields))
+        else:
+            # only what upgrade fixups look at
+            obj_fields = ['perms2'] + self._RESYNC_FIELDS.get(obj_type, [])
         (ok, obj_dicts) = self._object_db.object_read(
                                obj_type, obj_uuids, field_names=obj_fields)
         uve_trace_list = []
@@ -841,7 +1064,7 @@ class VncDbClient(object):
                                 if not do_update:
                                     do_update = True
                         if do_update:
-                            self.cassandra_db.object_update(
+                            self._object_db.object_update(
                                 'virtual_network', obj_uuid, obj_dict)
 
                 elif obj_type == 'virtual_machine_interface':
@@ -1177,34 +1400,70 @@ class VncDbClient(object):
                  obj_uuids=None, is_count=False, filters=None,
                  paginate_start=None, paginate_count=None, is_detail=False,
                  field_names=None, include_shared=False):
+        # When paginate_count is given, (ok, result, marker) is returned
+        # where marker is to be passed as paginate_start to fetch the next
+        # page, None if there are no more objects.
         if self._db_engine == 'rdbms':
-            return self.dbe_list_rdbms(obj_type, parent_uuids, back_ref_uuids,
+            ret = self.dbe_list_rdbms(obj_type, parent_uuids, back_ref_uuids,
                  obj_uuids, is_count, filters,
                  paginate_start, paginate_count, is_detail,
                  field_names, include_shared)
-        (ok, result) = self._object_db.object_list(
-            obj_type, parent_uuids=parent_uuids,
-            back_ref_uuids=back_ref_uuids, obj_uuids=obj_uuids,
-            count=is_count, filters=filters)
+        else:
+            ret = self._dbe_list_cassandra(obj_type, parent_uuids,
+                back_ref_uuids, obj_uuids, is_count, filters,
+                paginate_start, paginate_count, is_detail, field_names,
+                include_shared)
+            if paginate_count is None:
+                ret = ret[:2]
+        if paginate_count is not None and len(ret) == 2:
+            # backend returned everything in one page
+            ret = ret + (None,)
+        return ret
+    # end dbe_list
+
+    def _dbe_list_cassandra(self, obj_type, parent_uuids, back_ref_uuids,
+                            obj_uuids, is_count, filters, paginate_start,
+                            paginate_count, is_detail, field_names,
+                            include_shared):
+        if paginate_count is not None and not is_count:
+            (ok, result, marker) = self._object_db.object_list(
+                obj_type, parent_uuids=parent_uuids,
+                back_ref_uuids=back_ref_uuids, obj_uuids=obj_uuids,
+                filters=filters, paginate_start=paginate_start,
+                paginate_count=paginate_count)
+        else:
+            (ok, result) = self._object_db.object_list(
+                obj_type, parent_uuids=parent_uuids,
+                back_ref_uuids=back_ref_uuids, obj_uuids=obj_uuids,
+                count=is_count, filters=filters)
+            marker = None
 
         if not ok or is_count:
-            return (ok, result)
+            return (ok, result, marker)
 
-        # include objects shared with tenant
+        # include objects shared with tenant. They are not part of the
+        # marker order, so with pagination all of them go out with the first
+        # page, which can then hold more than paginate_count objects, and
+        # are left out of the following pages.
         if include_shared:
             domain, tenant_uuid = self._owner_id()
             shares = self.get_shared_objects(obj_type, tenant_uuid, domain)
-            owned_objs = set([obj_uuid for (fq_name, obj_uuid) in result])
-            for (obj_uuid, obj_perm) in shares:
-                # skip owned objects already included in results
-                if obj_uuid in owned_objs:
-                    continue
-                try:
-                    fq_name = self.uuid_to_fq_name(obj_uuid)
-                    result.append((fq_name, obj_uuid))
-                except NoIdError:
-                    # uuid no longer valid. Delete?
-                    pass
+            if paginate_start:
+                shared_objs = set([obj_uuid for (obj_uuid, _) in shares])
+                result = [(fq_name, obj_uuid) for (fq_name, obj_uuid) in result
+                          if obj_uuid not in shared_objs]
+            else:
+                owned_objs = set([obj_uuid for (fq_name, obj_uuid) in result])
+                for (obj_uuid, obj_perm) in shares:
+                    # skip owned objects already included in results
+                    if obj_uuid in owned_objs:
+                        continue
+                    try:
+                        fq_name = self.uuid_to_fq_name(obj_uuid)
+                        result.append((fq_name, obj_uuid))
+                    except NoIdError:
+                        # uuid no longer valid. Delete?
+                        pass
         # end shared
 
         if is_detail:
@@ -1218,14 +1477,15 @@ class VncDbClient(object):
 
         if not obj_fields:
             return (True, [{'uuid': obj_uuid, 'fq_name': fq_name}
-                           for fq_name, obj_uuid in result])
+                           for fq_name, obj_uuid in result], marker)
         obj_ids_list = [obj_uuid for _, obj_uuid in result]
         try:
-            return self._object_db.object_read(
+            (ok, result) = self._object_db.object_read(
                 obj_type, obj_ids_list, obj_fields, ret_readonly=True)
+            return (ok, result, marker)
         except NoIdError as e:
-            return (False, str(e))
-    # end dbe_list
+            return (False, str(e), marker)
+    # end _dbe_list_cassandra
 
     @dbe_trace('delete')
     def dbe_delete(self, obj_type, obj_uuid, obj_dict):
@@ -1247,10 +1507,36 @@ class VncDbClient(object):
         self._zk_db.delete_fq_name_to_uuid_mapping(obj_type, obj_fq_name)
     # end dbe_release
 
+    def obj_cache_notify(self, oper, obj_uuid):
+        if self._db_engine != 'cassandra':
+            return
+        self._object_db.obj_cache_notify(oper, obj_uuid)
+    # end obj_cache_notify
+
+    def obj_cache_reset(self):
+        if self._db_engine != 'cassandra':
+            return
+        self._object_db.obj_cache_reset()
+    # end obj_cache_reset
+
+    def obj_cache_stats(self):
+        if self._db_engine != 'cassandra':
+            return None
+        return self._object_db.obj_cache_stats()
+    # end obj_cache_stats
+
     def dbe_oper_publish_pending(self):
         return self._msgbus.num_pending_messages()
     # end dbe_oper_publish_pending
 
+    def dbe_hold_notifications(self):
+        self._msgbus.hold_notifications()
+    # end dbe_hold_notifications
+
+    def dbe_release_notifications(self):
+        return self._msgbus.release_notifications()
+    # end dbe_release_notifications
+
     def useragent_kv_store(self, key, value):
         self._object_db.useragent_kv_store(key, value)
     # end useragent_kv_store
@@ -1263,6 +1549,50 @@ class VncDbClient(object):
         return self._object_db.useragent_kv_delete(key)
     # end useragent_kv_delete
 
+    # Per project count of resources of a type, maintained only while a
+    # quota applies to it. None is returned if counter isn't present.
+    def quota_counter_add(self, proj_uuid, obj_type, delta, max_value=None):
+        if self._db_engine != 'cassandra':
+            return None
+        return self._zk_db.quota_counter_add(proj_uuid, obj_type, delta,
+                                             max_value)
+    # end quota_counter_add
+
+    def quota_counter_init(self, proj_uuid, obj_type, count):
+        if self._db_engine != 'cassandra':
+            return
+        self._zk_db.quota_counter_init(proj_uuid, obj_type, count)
+    # end quota_counter_init
+
+    def quota_counter_delete(self, proj_uuid):
+        if self._db_engine != 'cassandra':
+            return
+        self._zk_db.quota_counter_delete(proj_uuid)
+    # end quota_counter_delete
+
+    def has_quota_counters(self):
+        return self._db_engine == 'cassandra'
+    # end has_quota_counters
+
+    def _quota_counters_reseed(self):
+        # correct counters that drifted from the db (e.g. an api-server died
+        # between counting a create and its undo) one by one, other
+        # api-servers keep serving and updating them meanwhile
+        if not self.has_quota_counters():
+            return
+        for proj_uuid, obj_type in list(self._zk_db.quota_counters()):
+            def get_count():
+                (ok, count) = QuotaHelper.get_resource_count(
+                    self, obj_type, proj_uuid)
+                return count if ok else None
+            if self._zk_db.quota_counter_reseed(
+                    proj_uuid, obj_type, get_count,
+                    self._QUOTA_COUNTER_RESEED_IDLE):
+                self.config_log('Quota counter of %s in project %s reseeded '
+                                'from db' %(obj_type, proj_uuid),
+                                level=SandeshLevel.SYS_NOTICE)
+    # end _quota_counters_reseed
+
     def subnet_is_addr_allocated(self, subnet, addr):
         return self._zk_db.subnet_is_addr_allocated(subnet, addr)
     # end subnet_is_addr_allocated
@@ -1349,7 +1679,8 @@ class VncDbClient(object):
         self._object_db.ref_update(obj_type, obj_uuid, ref_obj_type,
                                    ref_uuid, ref_data, operation)
         fq_name = self.uuid_to_fq_name(obj_uuid)
-        self._msgbus.dbe_publish('UPDATE', obj_type, obj_uuid, fq_name)
+        self._msgbus.dbe_publish('UPDATE', obj_type, obj_uuid, fq_name,
+                                 ref_uuid=ref_uuid)
         if obj_type == ref_obj_type:
             self._dbe_publish_update_implicit(obj_type, [ref_uuid])
     # ref_update
@@ -40,12 +40,7 @@ class QuotaHelper(object):
         return (True, quota_limit)
 
     @classmethod
-    def verify_quota_for_resource(cls, db_conn, obj_dict, obj_type,
-                                  quota_limit, proj_uuid=None):
-        # Quota limit is not enabled for this resource
-        if quota_limit < 0:
-            return True, ""
-
+    def get_resource_count(cls, db_conn, obj_type, proj_uuid):
         if obj_type+'s' in Project.children_fields:
             # Number of resources created under this project.
             # Resouce is a child ref under project object
@@ -62,9 +57,38 @@ class QuotaHelper(object):
                                 'resource list' % obj_type))
             quota_count = len(res_list)
 
-        if quota_count >= quota_limit:
+        return (True, quota_count)
+
+    @classmethod
+    def verify_quota_for_resource(cls, db_conn, obj_dict, obj_type,
+                                  quota_limit, proj_uuid=None):
+        # Quota limit is not enabled for this resource
+        if quota_limit < 0:
+            return True, ""
+
+        # Count the resource in the project counter, it is seeded from db
+        # on first use and then kept up to date on create/delete
+        try:
+            quota_count = db_conn.quota_counter_add(proj_uuid, obj_type, 1,
+                                                    quota_limit)
+            if quota_count is None:
+                (ok, quota_count) = cls.get_resource_count(
+                    db_conn, obj_type, proj_uuid)
+                if not ok:
+                    return (False, quota_count)
+                db_conn.quota_counter_init(proj_uuid, obj_type, quota_count)
+                if (db_conn.quota_counter_add(proj_uuid, obj_type, 1,
+                                              quota_limit) is None and
+                        quota_count >= quota_limit):
+                    # no counter support in db, go by current count
+                    raise cfgm_common.exceptions.ResourceExhaustionError()
+        except cfgm_common.exceptions.ResourceExhaustionError:
             msg = ('quota limit (%d) exceeded for resource %s'
                    % (quota_limit, obj_type))
             return (False, (QUOTA_OVER_ERROR_CODE, pformat(obj_dict['fq_name']) + ' : ' + msg))
 
         return True, ""
+
+    @classmethod
+    def release_quota_for_resource(cls, db_conn, obj_type, proj_uuid):
+        db_conn.quota_counter_add(proj_uuid, obj_type, -1)
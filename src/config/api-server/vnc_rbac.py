@@ -7,6 +7,7 @@ import uuid
 import string
 import re
 import ConfigParser
+from collections import OrderedDict
 from provision_defaults import *
 from cfgm_common.exceptions import *
 from pysandesh.gen_py.sandesh.ttypes import SandeshLevel
@@ -16,11 +17,39 @@ class VncRbac(object):
     op_str = {'GET': 'R', 'POST': 'C', 'PUT': 'U', 'DELETE': 'D'}
     op_str2 = {'GET': 'read', 'POST': 'create', 'PUT': 'update', 'DELETE': 'delete'}
 
+    # max number of (domain, project) rule tables kept
+    _RULE_CACHE_MAX_ENTRIES = 10000
+
     def __init__(self, server_mgr, db_conn):
         self._db_conn = db_conn
         self._server_mgr = server_mgr
+        # (domain-id, project-id) as in request headers => compiled rules,
+        # least recently used first
+        self._rule_cache = OrderedDict()
+        # bumped on invalidation so that rules read concurrently with an
+        # invalidation don't get cached
+        self._rule_cache_gen = 0
+        self._rule_cache_hits = 0
+        self._rule_cache_misses = 0
+        self._rule_cache_invalidations = 0
     # end __init__
 
+    def invalidate_rule_cache(self):
+        # rules of any domain/project may be affected
+        self._rule_cache_gen += 1
+        self._rule_cache_invalidations += 1
+        self._rule_cache.clear()
+    # end invalidate_rule_cache
+
+    def get_rule_cache_stats(self):
+        return {
+            'entries': len(self._rule_cache),
+            'hits': self._rule_cache_hits,
+            'misses': self._rule_cache_misses,
+            'invalidations': self._rule_cache_invalidations,
+        }
+    # end get_rule_cache_stats
+
     @property
     def cloud_admin_role(self):
         return self._server_mgr.cloud_admin_role
@@ -94,11 +123,48 @@ class VncRbac(object):
         return api_access_list_entries['rbac_rule']
 
     def get_rbac_rules(self, request):
-        rule_list = []
         env = request.headers.environ
         domain_id = env.get('HTTP_X_DOMAIN_ID', None)
         project_id = env.get('HTTP_X_PROJECT_ID', None)
+        return self._get_compiled_rbac_rules(domain_id, project_id)[0]
+    # end get_rbac_rules
+
+    def _get_compiled_rbac_rules(self, domain_id, project_id):
+        # returns (rule list, {rule object: [rules applicable to object]}),
+        # applicable rules being the object's and wildcard ones in rule
+        # list order
+        key = (domain_id, project_id)
+        try:
+            compiled_rules = self._rule_cache.pop(key)
+            self._rule_cache[key] = compiled_rules
+            self._rule_cache_hits += 1
+            return compiled_rules
+        except KeyError:
+            self._rule_cache_misses += 1
+
+        cache_gen = self._rule_cache_gen
+        rule_list = self._read_rbac_rules(domain_id, project_id)
+        rules_by_object = {'*': []}
+        for rule in rule_list:
+            rules_by_object.setdefault(rule['rule_object'], [])
+        for rule in rule_list:
+            o = rule['rule_object']
+            if o == '*':
+                for obj_rules in rules_by_object.values():
+                    obj_rules.append(rule)
+            else:
+                rules_by_object[o].append(rule)
+        compiled_rules = (rule_list, rules_by_object)
+
+        if cache_gen == self._rule_cache_gen:
+            if len(self._rule_cache) >= self._RULE_CACHE_MAX_ENTRIES:
+                self._rule_cache.popitem(last=False)
+            self._rule_cache[key] = compiled_rules
+        return compiled_rules
+    # end _get_compiled_rbac_rules
 
+    def _read_rbac_rules(self, domain_id, project_id):
+        rule_list = []
         if project_id:
             project_id = str(uuid.UUID(project_id))
 
@@ -142,31 +208,32 @@ class VncRbac(object):
 
         # collapse of rules might be needed as same object/field might be present in
         # domain as well project rules
-        rule_dict = {}
+        rule_dict = OrderedDict()
         for rule in rule_list:
             o = rule['rule_object']
             f = rule['rule_field']
-            p = rule['rule_perms']
             o_f = "%s.%s" % (o,f) if f else o
             if o_f not in rule_dict:
-                rule_dict[o_f] = rule
-            else:
-                role_to_crud_dict = {rp['role_name']:rp['role_crud'] for rp in rule_dict[o_f]['rule_perms']}
-                for incoming in rule['rule_perms']:
-                    role_name = incoming['role_name']
-                    role_crud = incoming['role_crud']
-                    if role_name in role_to_crud_dict:
-                        x = set(list(role_to_crud_dict[role_name])) | set(list(role_crud))
-                        role_to_crud_dict[role_name] = ''.join(x)
-                    else:
-                        role_to_crud_dict[role_name] = role_crud
-                # update perms in existing rule
-                rule_dict[o_f]['rule_perms'] = [{'role_crud': rc, 'role_name':rn} for rn,rc in role_to_crud_dict.items()]
-                # remove duplicate rule from list
-                rule_list.remove(rule)
-
-        return rule_list
-    # end
+                rule_dict[o_f] = (rule, OrderedDict())
+            role_to_crud_dict = rule_dict[o_f][1]
+            for incoming in rule['rule_perms']:
+                role_name = incoming['role_name']
+                role_crud = incoming['role_crud']
+                if role_name in role_to_crud_dict:
+                    x = set(list(role_to_crud_dict[role_name])) | set(list(role_crud))
+                    role_to_crud_dict[role_name] = ''.join(x)
+                else:
+                    role_to_crud_dict[role_name] = role_crud
+
+        # build merged rules afresh as the ones read may be shared
+        merged_rule_list = []
+        for rule, role_to_crud_dict in rule_dict.values():
+            merged_rule = dict(rule)
+            merged_rule['rule_perms'] = [{'role_crud': rc, 'role_name':rn} for rn,rc in role_to_crud_dict.items()]
+            merged_rule_list.append(merged_rule)
+
+        return merged_rule_list
+    # end _read_rbac_rules
 
     def request_path_to_obj_type(self, path):
         if path == "/":
@@ -203,9 +270,13 @@ class VncRbac(object):
             return (True, '')
         if self.global_read_only_role in roles and request.method == 'GET':
             return (True, '')
+        # each operation of a bulk request is validated on its own
+        if request.path == '/bulk':
+            return (True, '')
 
         # rule list for project/domain of the request
-        rule_list = self.get_rbac_rules(request)
+        (rule_list, rules_by_object) = self._get_compiled_rbac_rules(
+            domain_id, project_id)
         if len(rule_list) == 0:
             msg = 'rbac: rule list empty!!'
             self._server_mgr.config_log(msg, level=SandeshLevel.SYS_NOTICE)
@@ -226,10 +297,13 @@ class VncRbac(object):
             % (user, roles, obj_type, api_op, len(rule_list), project_id, project_name, domain_id)
         self._server_mgr.config_log(msg, level=SandeshLevel.SYS_DEBUG)
 
-        # match all rules - longest prefix match wins
+        # match all rules of the object or wildcard, in rule list order -
+        # longest prefix match wins
+        candidate_rules = rules_by_object.get(obj_type,
+                                              rules_by_object['*'])
         result = {}
         idx = 1
-        for rule in rule_list:
+        for rule in candidate_rules:
             o = rule['rule_object']
             f = rule['rule_field']
             p = rule['rule_perms']
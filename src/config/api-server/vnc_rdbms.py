@@ -11,6 +11,7 @@ reload(sys)
 sys.setdefaultencoding('UTF8')
 import logging
 import logging.config
+from gevent.lock import BoundedSemaphore
 import cfgm_common
 from cfgm_common import jsonutils as json
 
@@ -25,8 +26,15 @@ class VncServerRDBMSClient(VncRDBMSClient):
     def __init__(self, db_client_mgr, *args, **kwargs):
         self._db_client_mgr = db_client_mgr
         self._subnet_path = "/api-server/subnets"
+        self._election_locks = {}
         super(VncServerRDBMSClient, self).__init__(*args, **kwargs)
 
+    def master_election(self, path, func, *args):
+        # no zookeeper with this backend, serialize within this server
+        lock = self._election_locks.setdefault(path, BoundedSemaphore())
+        with lock:
+            func(*args)
+
     def config_log(self, msg, level):
         self._db_client_mgr.config_log(msg, level)
 
@@ -52,6 +52,38 @@ class Client(object):
 
         return resp.json()
 
+    def request_stream(self, path, fqdn_uuid, user_token=None):
+        """Yield the (event, data) messages of a server-sent events
+        stream, until the server closes it."""
+        req_params = self._get_req_params(user_token, data=dict(self.data))
+        req_params['headers']['Accept'] = 'text/event-stream'
+        req_params['stream'] = True
+
+        url = urlparse.urljoin(self.endpoint, path + fqdn_uuid)
+        resp = requests.get(url, **req_params)
+
+        if resp.status_code != 200:
+            raise OpenContrailAPIFailed(
+                ('Opencontrail API returned %(status)s %(reason)s') %
+                {'status': resp.status_code, 'reason': resp.reason})
+
+        event = None
+        data = []
+        for line in resp.iter_lines():
+            if not line:
+                if event is not None or data:
+                    yield event, '\n'.join(data)
+                event = None
+                data = []
+                continue
+            field, _, value = line.partition(':')
+            if value.startswith(' '):
+                value = value[1:]
+            if field == 'event':
+                event = value
+            elif field == 'data':
+                data.append(value)
+
     def _get_req_params(self, user_token, data=None):
         req_params = {
             'headers': {
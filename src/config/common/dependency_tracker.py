@@ -7,6 +7,7 @@ This file contains implementation of dependency tracker
 for contrail config daemons
 """
 
+import time
 from collections import OrderedDict
 
 # This class tracks dependencies among different objects based on a reaction map.
@@ -18,25 +19,39 @@ class DependencyTracker(object):
         self._reaction_map = reaction_map
         self._object_class_map = object_class_map
         self.resources = OrderedDict()
+        # same content as resources, for constant time visited checks
+        self._visited = {}
+        self._visited_resources = self.resources
+        # cost of the evaluations done with this tracker
+        self.stats = {'evaluations': 0, 'resources': 0, 'max_depth': 0,
+                      'elapsed_secs': 0.0}
     # end __init__
 
+    def _sync_visited(self):
+        # resources may have been reset by the caller since last evaluation
+        if self._visited_resources is self.resources:
+            return
+        self._visited = dict((obj_type, set(obj_keys))
+                             for obj_type, obj_keys in self.resources.items())
+        self._visited_resources = self.resources
+    # end _sync_visited
+
     def _add_resource(self, obj_type, obj_key):
-        if obj_type in self.resources:
-            if obj_key in self.resources[obj_type]:
-                # already visited
-                return False
-            self.resources[obj_type].append(obj_key)
-        else:
+        visited = self._visited.get(obj_type)
+        if visited is None:
+            self._visited[obj_type] = set([obj_key])
             self.resources[obj_type] = [obj_key]
+        elif obj_key in visited:
+            # already visited
+            return False
+        else:
+            visited.add(obj_key)
+            self.resources[obj_type].append(obj_key)
+        self.stats['resources'] += 1
         return True
     # end _add_resource
 
-    def evaluate(self, obj_type, obj, from_type='self'):
-        if obj_type not in self._reaction_map:
-            return
-        if not self._add_resource(obj_type, obj.get_key()):
-            return
-
+    def _get_refs(self, obj_type, obj, from_type):
         for ref_type in self._reaction_map[obj_type][from_type]:
             ref = getattr(obj, ref_type, None)
             if ref is None:
@@ -46,9 +61,55 @@ class DependencyTracker(object):
 
             ref_class = self._object_class_map[ref_type]
             for ref in refs:
-                ref_obj = ref_class.get(ref)
-                if ref_obj is None:
-                    return
-                self.evaluate(ref_type, ref_obj, obj_type)
+                yield ref_type, ref_class.get(ref)
+    # end _get_refs
+
+    def evaluate(self, obj_type, obj, from_type='self'):
+        # Depth first walk of the reaction map driven by an explicit stack
+        # of (obj_type, refs iterator) so long reaction chains do not hit
+        # the recursion limit. Resources are recorded in the same order as
+        # a recursive walk would record them.
+        start_time = time.time()
+        self._sync_visited()
+        stack = []
+
+        def visit(obj_type, obj, from_type):
+            if obj_type not in self._reaction_map:
+                return
+            if not self._add_resource(obj_type, obj.get_key()):
+                return
+            stack.append((obj_type, self._get_refs(obj_type, obj, from_type)))
+            if len(stack) > self.stats['max_depth']:
+                self.stats['max_depth'] = len(stack)
+        # end visit
+
+        visit(obj_type, obj, from_type)
+        while stack:
+            cur_type, refs = stack[-1]
+            try:
+                ref_type, ref_obj = next(refs)
+            except StopIteration:
+                stack.pop()
+                continue
+            if ref_obj is None:
+                # stop evaluating the remaining refs of this object
+                stack.pop()
+                continue
+            visit(ref_type, ref_obj, cur_type)
+
+        self.stats['evaluations'] += 1
+        self.stats['elapsed_secs'] += time.time() - start_time
     # end evaluate
+
+    def merge(self, other):
+        # add the resources found by another tracker
+        self._sync_visited()
+        for obj_type, obj_keys in other.resources.items():
+            for obj_key in obj_keys:
+                self._add_resource(obj_type, obj_key)
+        self.stats['evaluations'] += other.stats['evaluations']
+        self.stats['max_depth'] = max(self.stats['max_depth'],
+                                      other.stats['max_depth'])
+        self.stats['elapsed_secs'] += other.stats['elapsed_secs']
+    # end merge
 # end DependencyTracker
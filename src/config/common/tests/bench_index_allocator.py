@@ -0,0 +1,156 @@
+#
+# Copyright (c) 2017 Juniper Networks, Inc. All rights reserved.
+#
+"""Microbenchmark of IndexAllocator against the previous bitarray backend
+
+Usage: python bench_index_allocator.py [--size N] [--used N] [--allocs N]
+
+Both allocators run against an in-memory zookeeper stand-in, so numbers
+only reflect the in-process bookkeeping (startup population, alloc/free
+and the memory used to track in-use indexes).
+"""
+import argparse
+import random
+import sys
+import time
+
+from bitarray import bitarray
+
+from cfgm_common.exceptions import ResourceExhaustionError
+from cfgm_common.zkclient import IndexAllocator
+from test_index_allocator import FakeZookeeperClient
+
+
+class BitarrayIndexAllocator(object):
+    # in-memory part of the bitarray based IndexAllocator this replaces
+
+    def __init__(self, zookeeper_client, path, size=0, start_idx=0,
+                 reverse=False, alloc_list=None, max_alloc=0):
+        self._alloc_list = alloc_list or [{'start': start_idx,
+                                           'end': start_idx + size}]
+        self._max_alloc = max_alloc or size + 1
+        self._zookeeper_client = zookeeper_client
+        self._path = path
+        self._reverse = reverse
+        self._in_use = bitarray('0')
+        for idx in self._zookeeper_client.get_children(path):
+            bit_idx = self._get_bit_from_zk_index(int(idx))
+            if bit_idx >= 0:
+                self._set_in_use(bit_idx)
+
+    def _get_zk_index_from_bit(self, idx):
+        size = idx
+        for alloc in self._alloc_list:
+            size -= alloc['end'] - alloc['start'] + 1
+            if size < 0:
+                return alloc['end'] + size + 1
+        raise ResourceExhaustionError()
+
+    def _get_bit_from_zk_index(self, idx):
+        size = 0
+        for alloc in self._alloc_list:
+            if alloc['start'] <= idx <= alloc['end']:
+                return idx - alloc['start'] + size
+            size += alloc['end'] - alloc['start'] + 1
+        return -1
+
+    def _set_in_use(self, bitnum):
+        if bitnum > self._max_alloc:
+            return
+        if bitnum >= self._in_use.length():
+            temp = bitarray(bitnum - self._in_use.length())
+            temp.setall(0)
+            temp.append('1')
+            self._in_use.extend(temp)
+        else:
+            self._in_use[bitnum] = 1
+
+    def alloc(self, value=None):
+        if self._in_use.all():
+            idx = self._in_use.length()
+            if idx > self._max_alloc:
+                raise ResourceExhaustionError()
+            self._in_use.append(1)
+        else:
+            idx = self._in_use.index(0)
+            self._in_use[idx] = 1
+        idx = self._get_zk_index_from_bit(idx)
+        self._zookeeper_client.create_node(
+            self._path + "%(#)010d" % {'#': idx}, value)
+        return idx
+
+    def delete(self, idx):
+        self._zookeeper_client.delete_node(
+            self._path + "%(#)010d" % {'#': idx})
+        bit_idx = self._get_bit_from_zk_index(idx)
+        if 0 <= bit_idx < self._in_use.length():
+            self._in_use[bit_idx] = 0
+
+    def get_alloc_count(self):
+        return self._in_use.count()
+
+    def tracking_bytes(self):
+        return self._in_use.buffer_info()[1]
+# end class BitarrayIndexAllocator
+
+
+def _tracking_bytes(allocator):
+    if isinstance(allocator, BitarrayIndexAllocator):
+        return allocator.tracking_bytes()
+    ranges = allocator.get_free_ranges()
+    return sum(sys.getsizeof(x) for x in
+               [allocator._free_starts, allocator._free_ends]) + \
+        sum(sys.getsizeof(s) + sys.getsizeof(e) for s, e in ranges)
+
+
+def _populate_zk(args):
+    zk = FakeZookeeperClient()
+    rand = random.Random(0)
+    # mostly dense with some holes, like a long lived id pool
+    for idx in xrange(args.used):
+        if rand.random() > args.hole_ratio:
+            zk.create_node('/bench/%(#)010d' % {'#': idx})
+    return zk
+
+
+def run(cls, args):
+    zk = _populate_zk(args)
+    start = time.time()
+    allocator = cls(zk, '/bench/', size=args.size, start_idx=0)
+    allocator.get_alloc_count()
+    init_secs = time.time() - start
+
+    start = time.time()
+    allocated = [allocator.alloc() for _ in xrange(args.allocs)]
+    alloc_secs = time.time() - start
+
+    start = time.time()
+    for idx in allocated:
+        allocator.delete(idx)
+    free_secs = time.time() - start
+
+    return {'init_secs': init_secs,
+            'alloc_usecs': alloc_secs * 1e6 / args.allocs,
+            'free_usecs': free_secs * 1e6 / args.allocs,
+            'tracking_bytes': _tracking_bytes(allocator)}
+
+
+def main(args_str=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=1 << 24)
+    parser.add_argument('--used', type=int, default=200000)
+    parser.add_argument('--hole-ratio', type=float, default=0.01)
+    parser.add_argument('--allocs', type=int, default=5000)
+    args = parser.parse_args(args_str)
+
+    print '%-24s %10s %12s %12s %14s' % (
+        'backend', 'init(s)', 'alloc(us)', 'free(us)', 'tracking(B)')
+    for cls in (BitarrayIndexAllocator, IndexAllocator):
+        result = run(cls, args)
+        print '%-24s %10.3f %12.2f %12.2f %14d' % (
+            cls.__name__, result['init_secs'], result['alloc_usecs'],
+            result['free_usecs'], result['tracking_bytes'])
+# end main
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#
+# Copyright (c) 2017 Juniper Networks, Inc. All rights reserved.
+#
+"""Benchmark of VncCassandraClient.multiget against the previous serial one
+
+Usage: python bench_vnc_cassandra_multiget.py [--keys N] [--columns N]
+                                              [--latency SECS]
+                                              [--key-latency SECS]
+
+Rows are read from an in-memory column family that sleeps for a fixed
+round trip time plus a per key time on each request, as a local cassandra
+stand-in. The lazy run only reads a couple of columns of each row, like a
+field filtered object read does.
+"""
+import argparse
+import json
+import time
+
+import gevent
+
+from cfgm_common.vnc_cassandra import VncCassandraClient
+from test_vnc_cassandra import FakeColumnFamily
+
+
+class SlowColumnFamily(FakeColumnFamily):
+    def __init__(self, rows, latency, key_latency):
+        super(SlowColumnFamily, self).__init__(rows)
+        self.key_latency = key_latency
+        self.round_trip = latency
+
+    def multiget(self, keys, *args, **kwargs):
+        self.latency = self.round_trip + self.key_latency * len(keys)
+        return super(SlowColumnFamily, self).multiget(keys, *args, **kwargs)
+
+
+def serial_multiget(client, cf_name, keys, timestamp=False):
+    # multiget before its chunks were pipelined: chunks are read one after
+    # the other and all the columns are decoded in a second pass
+    cf = client.get_cf(cf_name)
+    results = {}
+    for x in xrange(0, len(keys), 1024):
+        results.update(cf.multiget(keys[x:x+1024],
+                                   include_timestamp=timestamp))
+    for key in results:
+        for col, val in results[key].items():
+            if timestamp:
+                results[key][col] = (json.loads(val[0]), val[1])
+            else:
+                results[key][col] = json.loads(val)
+    return results
+
+
+def _rows(args):
+    rows = {}
+    for i in xrange(args.keys):
+        cols = {'type': json.dumps('virtual_network'),
+                'fq_name': json.dumps(['default-domain', 'bench', 'vn%d' % i])}
+        for j in xrange(args.columns):
+            cols['prop:p%d' % j] = json.dumps({'index': j, 'value': 'x' * 40})
+        rows['uuid%d' % i] = cols
+    return rows
+
+
+def run(name, args, rows):
+    cf = SlowColumnFamily(rows, args.latency, args.key_latency)
+    client = VncCassandraClient.__new__(VncCassandraClient)
+    client._cf_dict = {'obj_uuid_table': cf}
+    client._logger = lambda *args, **kwargs: None
+    keys = sorted(rows)
+
+    start = time.time()
+    if name == 'serial':
+        results = serial_multiget(client, 'obj_uuid_table', keys,
+                                  timestamp=True)
+    else:
+        results = client.multiget('obj_uuid_table', keys, timestamp=True,
+                                  lazy=(name == 'pipelined-lazy'))
+    for cols in results.values():
+        cols['type'], cols['fq_name']
+    return time.time() - start, len(cf.requests)
+
+
+def main(args_str=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--keys', type=int, default=20000)
+    parser.add_argument('--columns', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.002)
+    parser.add_argument('--key-latency', type=float, default=0.00005)
+    args = parser.parse_args(args_str)
+
+    rows = _rows(args)
+    print '%-20s %10s %10s' % ('multiget', 'time(s)', 'requests')
+    for name in ('serial', 'pipelined', 'pipelined-lazy'):
+        elapsed, requests = gevent.spawn(run, name, args, rows).get()
+        print '%-20s %10.3f %10d' % (name, elapsed, requests)
+# end main
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+import random
+import unittest
+
+import gevent
+
+from cfgm_common.exceptions import ResourceExhaustionError, ResourceExistsError
+from cfgm_common.zkclient import IndexAllocator
+
+
+class FakeZookeeperClient(object):
+    def __init__(self, latency=0):
+        self.nodes = {}
+        self.get_children_calls = 0
+        self.latency = latency
+
+    def create_node(self, path, value=None):
+        if path in self.nodes:
+            raise ResourceExistsError(path, str(self.nodes[path]), 'zookeeper')
+        self.nodes[path] = value
+
+    def delete_node(self, path, recursive=False):
+        self.nodes.pop(path, None)
+
+    def read_node(self, path):
+        return self.nodes.get(path)
+
+    def get_children(self, path):
+        self.get_children_calls += 1
+        children = [node[len(path):] for node in self.nodes
+                    if node.startswith(path)]
+        gevent.sleep(self.latency)
+        return children
+
+    def syslog(self, msg, *args, **kwargs):
+        pass
+
+
+class TestIndexAllocator(unittest.TestCase):
+    def setUp(self):
+        self.zk = FakeZookeeperClient()
+
+    def test_alloc_in_order(self):
+        alloc = IndexAllocator(self.zk, '/id/', size=10, start_idx=100)
+        self.assertEqual([alloc.alloc() for _ in range(3)], [100, 101, 102])
+        alloc.delete(101)
+        self.assertEqual(alloc.alloc(), 101)
+        self.assertEqual(alloc.get_alloc_count(), 3)
+
+    def test_alloc_reverse_alloc_list(self):
+        alloc = IndexAllocator(self.zk, '/id/', size=20, start_idx=0,
+                               reverse=True,
+                               alloc_list=[{'start': 10, 'end': 12},
+                                           {'start': 2, 'end': 3}])
+        self.assertEqual([alloc.alloc() for _ in range(5)],
+                         [12, 11, 10, 3, 2])
+        self.assertRaises(ResourceExhaustionError, alloc.alloc)
+
+    def test_exhaustion_and_free_ranges(self):
+        alloc = IndexAllocator(self.zk, '/id/', size=4, start_idx=0,
+                               max_alloc=3)
+        for _ in range(4):
+            alloc.alloc()
+        self.assertRaises(ResourceExhaustionError, alloc.alloc)
+        self.assertEqual(alloc.get_free_ranges(), [])
+        alloc.delete(1)
+        alloc.delete(2)
+        self.assertEqual(alloc.get_free_ranges(), [(1, 2)])
+        alloc.delete(0)
+        self.assertEqual(alloc.get_free_ranges(), [(0, 2)])
+        alloc.delete(3)
+        self.assertTrue(alloc.empty())
+
+    def test_lazy_population(self):
+        for idx in (0, 1, 5):
+            self.zk.create_node('/id/%(#)010d' % {'#': idx})
+        alloc = IndexAllocator(self.zk, '/id/', size=10, start_idx=0)
+        self.assertEqual(self.zk.get_children_calls, 0)
+        self.assertEqual(alloc.alloc(), 2)
+        self.assertEqual(self.zk.get_children_calls, 1)
+        self.assertEqual(alloc.get_alloc_count(), 4)
+        self.assertEqual(self.zk.get_children_calls, 1)
+
+    def test_concurrent_population(self):
+        self.zk.latency = 0.01
+        for idx in (0, 1, 2, 5):
+            self.zk.create_node('/id/%(#)010d' % {'#': idx})
+        alloc = IndexAllocator(self.zk, '/id/', size=10, start_idx=0)
+        # deleted while the children are being read
+        deleter = gevent.spawn_later(0.005, alloc.delete, 1)
+        allocs = [gevent.spawn(alloc.alloc) for _ in range(3)]
+        gevent.joinall(allocs + [deleter])
+        self.assertEqual(self.zk.get_children_calls, 1)
+        self.assertEqual(sorted(g.value for g in allocs), [1, 3, 4])
+        self.assertEqual(alloc.alloc(), 6)
+        self.assertEqual(alloc.get_alloc_count(), 7)
+
+    def test_reserve_bulk(self):
+        alloc = IndexAllocator(self.zk, '/id/', size=10, start_idx=0)
+        alloc.reserve(4, 'x')
+        self.assertEqual(alloc.reserve_bulk([0, 1, 2, 4, 50], 'x'),
+                         [0, 1, 2, 4])
+        self.assertEqual(alloc.alloc(), 3)
+        self.assertEqual(alloc.alloc(), 5)
+        self.assertRaises(ResourceExistsError, alloc.reserve_bulk, [6, 4],
+                          'y')
+        self.assertEqual(alloc.alloc(), 7)
+
+    def test_matches_bitmap_model(self):
+        size = 200
+        alloc = IndexAllocator(self.zk, '/id/', size=size, start_idx=1000,
+                               alloc_list=[{'start': 1000, 'end': 1099},
+                                           {'start': 1150, 'end': 1199}])
+        bits = [1000 + i for i in range(100)] + [1150 + i for i in range(50)]
+        in_use = set()
+        rand = random.Random(0)
+        for _ in range(2000):
+            if in_use and rand.random() < 0.4:
+                idx = rand.choice(sorted(in_use))
+                alloc.delete(idx)
+                in_use.discard(idx)
+            elif len(in_use) < len(bits):
+                idx = alloc.alloc()
+                self.assertEqual(idx, min(set(bits) - in_use))
+                in_use.add(idx)
+            self.assertEqual(alloc.get_alloc_count(), len(in_use))
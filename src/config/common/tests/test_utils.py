@@ -1117,8 +1117,11 @@ def Fake_uuid_to_time(time_uuid_in_db):
 # end of Fake_uuid_to_time
 
 
-class ZnodeStat(namedtuple('ZnodeStat', 'ctime')):
-    pass
+class ZnodeStat(namedtuple('ZnodeStat', 'ctime version mtime')):
+    def __new__(cls, ctime, version=0, mtime=None):
+        if mtime is None:
+            mtime = ctime
+        return super(ZnodeStat, cls).__new__(cls, ctime, version, mtime)
 
 def zk_scrub_path(path):
     # remove trailing slashes if not root
@@ -1173,9 +1176,24 @@ class FakeKazooClient(object):
     # end create
 
     def get(self, path):
-        return self._values[zk_scrub_path(path)]
+        try:
+            return self._values[zk_scrub_path(path)]
+        except KeyError:
+            raise kazoo.exceptions.NoNodeError()
     # end get
 
+    def set(self, path, value, version=-1):
+        scrubbed_path = zk_scrub_path(path)
+        try:
+            stat = self._values[scrubbed_path][1]
+        except KeyError:
+            raise kazoo.exceptions.NoNodeError()
+        if version != -1 and version != stat.version:
+            raise kazoo.exceptions.BadVersionError()
+        self._values[scrubbed_path] = (
+            value, ZnodeStat(stat.ctime, stat.version + 1, time.time()*1000))
+    # end set
+
     def get_children(self, path):
         if not path:
             return []
@@ -0,0 +1,90 @@
+import json
+import unittest
+
+import gevent
+
+from cfgm_common.vnc_cassandra import VncCassandraClient, LazyJsonRow
+
+
+class FakeColumnFamily(object):
+    def __init__(self, rows, latency=0):
+        self.rows = rows
+        self.latency = latency
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def multiget(self, keys, columns=None, column_start='', column_finish='',
+                 include_timestamp=False, column_count=None):
+        self.requests.append((list(keys), columns))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            gevent.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+        results = {}
+        for key in keys:
+            cols = dict((col, val)
+                        for col, val in self.rows.get(key, {}).items()
+                        if (columns is None and col >= column_start) or
+                        (columns and col in columns))
+            if include_timestamp:
+                cols = dict((col, (val, 1)) for col, val in cols.items())
+            if cols:
+                results[key] = cols
+        return results
+
+
+def _client(cf):
+    client = VncCassandraClient.__new__(VncCassandraClient)
+    client._cf_dict = {'obj_uuid_table': cf}
+    client._logger = lambda *args, **kwargs: None
+    return client
+
+
+class TestMultiget(unittest.TestCase):
+    def setUp(self):
+        self.rows = dict(('uuid%d' % i, {'type': json.dumps('vn'),
+                                         'prop:name': json.dumps('vn%d' % i)})
+                         for i in range(25))
+
+    def test_chunks_issued_concurrently(self):
+        cf = FakeColumnFamily(self.rows, latency=0.01)
+        client = _client(cf)
+        client._MULTIGET_KEY_CHUNK = 4
+        client._MULTIGET_PARALLELISM = 3
+
+        rows = client.multiget('obj_uuid_table', sorted(self.rows) + ['none'])
+        self.assertEqual(len(cf.requests), 7)
+        self.assertEqual(cf.max_in_flight, 3)
+        self.assertEqual(len(rows), 25)
+        self.assertEqual(rows['uuid7'], {'type': 'vn', 'prop:name': 'vn7'})
+
+    def test_columns_chunked_by_thrift_limit(self):
+        cf = FakeColumnFamily(self.rows)
+        client = _client(cf)
+        columns = ['prop:%d' % i for i in range(5001)] + ['prop:name']
+
+        rows = client.multiget('obj_uuid_table', ['uuid1', 'uuid2'],
+                               columns=columns)
+        # one key per request when the columns exceed half the limit
+        self.assertEqual([keys for keys, _ in cf.requests],
+                         [['uuid1'], ['uuid2']])
+        self.assertEqual(rows, {'uuid1': {'prop:name': 'vn1'},
+                                'uuid2': {'prop:name': 'vn2'}})
+
+    def test_lazy_decode(self):
+        self.rows['uuid3']['prop:bad'] = '{not json'
+        client = _client(FakeColumnFamily(self.rows))
+
+        rows = client.multiget('obj_uuid_table', ['uuid3'], timestamp=True,
+                               lazy=True)
+        row = rows['uuid3']
+        self.assertIsInstance(row, LazyJsonRow)
+        self.assertEqual(dict.__getitem__(row, 'type'), ('"vn"', 1))
+        self.assertEqual(row.pop('type'), ('vn', 1))
+        self.assertNotIn('type', row)
+        self.assertEqual(row['prop:bad'], ('{not json', 1))
+        self.assertEqual(dict(row.items()), {'prop:name': ('vn3', 1),
+                                             'prop:bad': ('{not json', 1)})
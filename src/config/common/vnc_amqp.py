@@ -1,19 +1,29 @@
 import socket
+import time
 import gevent
+import gevent.queue
 import cStringIO
 from pprint import pformat
 from requests.exceptions import ConnectionError
 
+from pysandesh.gen_py.sandesh.ttypes import SandeshLevel
+
 from cfgm_common.utils import cgitb_hook
 from cfgm_common.exceptions import NoIdError
 from cfgm_common.vnc_kombu import VncKombuClient
+from cfgm_common.vnc_greenlets import VncGreenlet
 from cfgm_common.dependency_tracker import DependencyTracker
 from cfgm_common.uve.msg_traces.ttypes import MessageBusNotifyTrace,\
-                        DependencyTrackerResource
+                        DependencyTrackerResource, DependencyTrackerStats,\
+                        MessageBusNotifyBatchTrace
 
 
 class VncAmqpHandle(object):
 
+    # notifications whose dependency evaluation visits more resources than
+    # this are logged as a warning
+    _DEPENDENCY_TRACKER_WARN_RESOURCES = 10000
+
     def __init__(self, logger, db_cls, reaction_map, q_name_prefix, args=None):
         self.logger = logger
         self.db_cls = db_cls
@@ -21,14 +31,36 @@ class VncAmqpHandle(object):
         self.q_name_prefix = q_name_prefix
         self._db_resync_done = gevent.event.Event()
         self._args = args
+        # when notification_batch_window (secs) is set, notifications are
+        # queued and handled in batches with a single dependency evaluation
+        self._batch_window = float(
+            getattr(args, 'notification_batch_window', 0) or 0)
+        self._batch_max = int(
+            getattr(args, 'notification_batch_max', 0) or 1000)
+        self._notification_queue = None
+        self._batch_greenlet = None
+        self._batch_dependency_tracker = None
+        self.notification_batch_stats = {
+            'batches': 0,
+            'received': 0,
+            'processed': 0,
+            'max_batch_size': 0,
+            'max_queue_depth': 0,
+        }
 
     def establish(self):
         q_name = '.'.join([self.q_name_prefix, socket.gethostname()])
+        subscribe_cb = self._vnc_subscribe_callback
+        if self._batch_window > 0:
+            self._notification_queue = gevent.queue.Queue()
+            self._batch_greenlet = VncGreenlet(
+                'VncAmqp Notification Batch', self._notification_batch_worker)
+            subscribe_cb = self._vnc_subscribe_enqueue
         self._vnc_kombu = VncKombuClient(
                 self._args.rabbit_server, self._args.rabbit_port,
                 self._args.rabbit_user, self._args.rabbit_password,
                 self._args.rabbit_vhost, self._args.rabbit_ha_mode,
-                q_name, self._vnc_subscribe_callback,
+                q_name, subscribe_cb,
                 self.logger.log, rabbit_use_ssl=self._args.rabbit_use_ssl,
                 kombu_ssl_version=self._args.kombu_ssl_version,
                 kombu_ssl_keyfile=self._args.kombu_ssl_keyfile,
@@ -56,14 +88,17 @@ class VncAmqpHandle(object):
 
     def _vnc_subscribe_callback(self, oper_info):
         self._db_resync_done.wait()
+        self._run_subscribe_actions(oper_info, self.vnc_subscribe_actions)
+
+    def _run_subscribe_actions(self, oper_info, subscribe_actions):
         try:
             self.oper_info = oper_info
-            self.vnc_subscribe_actions()
+            subscribe_actions()
 
         except ConnectionError:
             try:
                 # retry write during api-server ConnectionError
-                self.vnc_subscribe_actions()
+                subscribe_actions()
             except ConnectionError:
                 # log the exception, and exit during api-server
                 # ConnectionError on retry to let standby to become active.
@@ -90,16 +125,113 @@ class VncAmqpHandle(object):
         self.msg_tracer = MessageBusNotifyTrace(request_id=request_id,
                                                 operation=oper, uuid=uuid)
 
+    def _vnc_subscribe_enqueue(self, oper_info):
+        self._notification_queue.put(oper_info)
+        stats = self.notification_batch_stats
+        stats['received'] += 1
+        stats['max_queue_depth'] = max(stats['max_queue_depth'],
+                                       self._notification_queue.qsize())
+
+    def _notification_batch_worker(self):
+        self._db_resync_done.wait()
+        while True:
+            # drain the queue for at most the batch window after the first
+            # notification of a batch
+            batch = [self._notification_queue.get()]
+            deadline = time.time() + self._batch_window
+            while len(batch) < self._batch_max:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._notification_queue.get(timeout=timeout))
+                except gevent.queue.Empty:
+                    break
+            self._process_notification_batch(batch)
+
+    @staticmethod
+    def _coalesce_notifications(batch):
+        # an UPDATE following an UPDATE of the same uuid is redundant since
+        # the first one reads the latest object from the db
+        last_oper = {}
+        notifications = []
+        for oper_info in batch:
+            obj_uuid = oper_info.get('uuid')
+            oper = oper_info.get('oper')
+            if oper == 'UPDATE' and last_oper.get(obj_uuid) == 'UPDATE':
+                continue
+            last_oper[obj_uuid] = oper
+            notifications.append(oper_info)
+        return notifications
+
+    def _process_notification_batch(self, batch):
+        start_time = time.time()
+        notifications = self._coalesce_notifications(batch)
+        batch_dt = DependencyTracker(self.db_cls.get_obj_type_map(),
+                                     self.reaction_map)
+        self._batch_dependency_tracker = batch_dt
+        try:
+            for oper_info in notifications:
+                self._run_subscribe_actions(oper_info,
+                                            self._batch_subscribe_actions)
+        finally:
+            self._batch_dependency_tracker = None
+        if batch_dt.resources:
+            self._run_subscribe_actions(
+                {'oper': 'BATCH', 'uuid': ''},
+                lambda: self._batch_evaluate_dependency(batch_dt))
+
+        stats = self.notification_batch_stats
+        stats['batches'] += 1
+        stats['processed'] += len(notifications)
+        stats['max_batch_size'] = max(stats['max_batch_size'], len(batch))
+        batch_trace = MessageBusNotifyBatchTrace(
+            batch_size=len(batch), processed=len(notifications),
+            queue_depth=(self._notification_queue.qsize()
+                         if self._notification_queue else 0),
+            elapsed_secs=time.time() - start_time)
+        try:
+            batch_trace.trace_msg(name='MessageBusNotifyTraceBuf',
+                                  sandesh=self.logger._sandesh)
+        except Exception:
+            pass
+
+    def _batch_subscribe_actions(self):
+        if not self._handle_notification() or not self.dependency_tracker:
+            return
+        self.init_msgbus_fq_name()
+        self.init_msgbus_dtr()
+        for res_type, res_id_list in self.dependency_tracker.resources.items():
+            if res_id_list:
+                self.add_msgbus_dtr(res_type, res_id_list)
+        self._batch_dependency_tracker.merge(self.dependency_tracker)
+
+    def _batch_evaluate_dependency(self, batch_dt):
+        self.obj = None
+        self.obj_type = None
+        self.obj_class = None
+        self.dependency_tracker = batch_dt
+        self.create_msgbus_trace(None, 'BATCH', '')
+        self.evaluate_dependency()
+
     def vnc_subscribe_actions(self):
-        msg = "Notification Message: %s" % (pformat(self.oper_info))
-        self.logger.debug(msg)
+        if self._handle_notification():
+            self.evaluate_dependency()
+
+    def _handle_notification(self):
+        # handle the notification in oper_info, returns True if the
+        # resources found by the dependency tracker must be evaluated
+        # notifications do not pay for pformat when debug logging is off
+        if self.logger.is_enabled_for(SandeshLevel.SYS_DEBUG):
+            self.logger.debug("Notification Message: %s" %
+                              (pformat(self.oper_info)))
 
         self.obj = None
         self.dependency_tracker = None
         self.obj_type = self.oper_info['type'].replace('-', '_')
         self.obj_class = self.db_cls.get_obj_type_map().get(self.obj_type)
         if self.obj_class is None:
-            return
+            return False
 
         oper = self.oper_info['oper']
         obj_id = self.oper_info['uuid']
@@ -113,16 +245,17 @@ class VncAmqpHandle(object):
             self.handle_delete()
         elif oper == 'UPDATE-IMPLICIT':
             # Ignore this operation
-            return
+            return False
         else:
             self.handle_unknown()
-            return
+            return False
         if self.obj is None:
             self.logger.warning(
                     "Object %s uuid %s was not found for operation %s" %
                     (self. obj_type, obj_id, oper))
-            return
-        self.evaluate_dependency()
+            return False
+        self.add_msgbus_dt_stats()
+        return True
 
     def _get_key_from_oper_info(self):
         if self.db_cls._indexed_by_name:
@@ -176,13 +309,7 @@ class VncAmqpHandle(object):
                 self.db_cls.get_obj_type_map(), self.reaction_map)
         self.dependency_tracker.evaluate(self.obj_type, self.obj)
         if old_dt:
-            for resource, ids in old_dt.resources.items():
-                if resource not in self.dependency_tracker.resources:
-                    self.dependency_tracker.resources[resource] = ids
-                else:
-                    self.dependency_tracker.resources[resource] = list(
-                        set(self.dependency_tracker.resources[resource]) |
-                        set(ids))
+            self.dependency_tracker.merge(old_dt)
 
     def handle_delete(self):
         obj_id = self.oper_info['uuid']
@@ -201,7 +328,8 @@ class VncAmqpHandle(object):
         self.logger.error('Unknown operation %s' % self.oper_info['oper'])
 
     def init_msgbus_fq_name(self):
-        self.msg_tracer.fq_name = self.obj.name
+        if self.obj is not None:
+            self.msg_tracer.fq_name = self.obj.name
 
     def init_msgbus_dtr(self):
         self.msg_tracer.dependency_tracker_resources = []
@@ -211,6 +339,20 @@ class VncAmqpHandle(object):
                                         obj_keys=res_id_list)
         self.msg_tracer.dependency_tracker_resources.append(dtr)
 
+    def add_msgbus_dt_stats(self):
+        if not self.dependency_tracker:
+            return
+        stats = self.dependency_tracker.stats
+        self.msg_tracer.dependency_tracker_stats = DependencyTrackerStats(
+            **stats)
+        if stats['resources'] > self._DEPENDENCY_TRACKER_WARN_RESOURCES:
+            self.logger.warning(
+                "Dependency evaluation of %s %s %s visited %d resources "
+                "(depth %d) in %.3f secs" % (
+                    self.oper_info['oper'], self.obj_type,
+                    self.oper_info['uuid'], stats['resources'],
+                    stats['max_depth'], stats['elapsed_secs']))
+
     def evaluate_dependency(self):
         if not self.dependency_tracker:
             return
@@ -231,4 +373,6 @@ class VncAmqpHandle(object):
                     res_obj.evaluate()
 
     def close(self):
+        if self._batch_greenlet:
+            self._batch_greenlet.kill()
         self._vnc_kombu.shutdown()
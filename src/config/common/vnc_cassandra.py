@@ -8,6 +8,7 @@ from pycassa.batch import Mutator
 from pycassa.system_manager import SystemManager, SIMPLE_STRATEGY
 from pycassa.pool import AllServersUnavailable, MaximumRetryException
 import gevent
+import gevent.pool
 
 from vnc_api import vnc_api
 from exceptions import NoIdError, DatabaseUnavailableError, VncError
@@ -22,8 +23,10 @@ import utils
 import datetime
 from operator import itemgetter
 import itertools
+import heapq
 import sys
-from collections import Mapping
+import functools
+from collections import Mapping, OrderedDict, deque
 
 
 def merge_dict(orig_dict, new_dict):
@@ -39,6 +42,64 @@ def merge_dict(orig_dict, new_dict):
     return orig_dict
 
 
+class LazyJsonRow(dict):
+    """Columns of a row read from cassandra, json decoded on first access.
+
+    Values are decoded by the mapping methods only, dict() or dict.update()
+    of a row still see the raw column values.
+    """
+    __slots__ = ('_decode', '_decoded')
+
+    def __init__(self, columns, decode):
+        super(LazyJsonRow, self).__init__(columns)
+        self._decode = decode
+        self._decoded = set()
+
+    def __getitem__(self, col):
+        val = dict.__getitem__(self, col)
+        if col not in self._decoded:
+            val = self._decode(col, val)
+            dict.__setitem__(self, col, val)
+            self._decoded.add(col)
+        return val
+
+    def __setitem__(self, col, val):
+        dict.__setitem__(self, col, val)
+        self._decoded.add(col)
+
+    def get(self, col, default=None):
+        if col in self:
+            return self[col]
+        return default
+
+    def pop(self, col, *default):
+        if col not in self:
+            if default:
+                return default[0]
+            raise KeyError(col)
+        val = self[col]
+        dict.__delitem__(self, col)
+        return val
+
+    def iteritems(self):
+        for col in self.keys():
+            yield col, self[col]
+
+    def itervalues(self):
+        for col in self.keys():
+            yield self[col]
+
+    def items(self):
+        return list(self.iteritems())
+
+    def values(self):
+        return list(self.itervalues())
+
+    def copy(self):
+        return dict(self.iteritems())
+# end class LazyJsonRow
+
+
 class VncCassandraClient(object):
     # Name to ID mapping keyspace + tables
     _UUID_KEYSPACE_NAME = vns_constants.API_SERVER_KEYSPACE_NAME
@@ -71,6 +132,10 @@ class VncCassandraClient(object):
     }
 
     _MAX_COL = 10000000
+    # keys per request of a multiget and how many of these requests are
+    # in flight at once, each of them holding a pool connection
+    _MULTIGET_KEY_CHUNK = 1000
+    _MULTIGET_PARALLELISM = 8
 
     @classmethod
     def get_db_info(cls):
@@ -114,7 +179,8 @@ class VncCassandraClient(object):
 
     def __init__(self, server_list, db_prefix, rw_keyspaces, ro_keyspaces,
             logger, generate_url=None, reset_config=False, credential=None,
-            walk=True, obj_cache_entries=0, obj_cache_exclude_types=None):
+            walk=True, obj_cache_entries=0, obj_cache_exclude_types=None,
+            obj_cache_max_bytes=0, obj_cache_invalidation=None):
         self._reset_config = reset_config
         if db_prefix:
             self._db_prefix = '%s_' % (db_prefix)
@@ -141,7 +207,10 @@ class VncCassandraClient(object):
         self._obj_fq_name_cf = self._cf_dict[self._OBJ_FQ_NAME_CF_NAME]
         self._obj_shared_cf = self._cf_dict[self._OBJ_SHARED_CF_NAME]
         self._obj_cache_mgr = ObjectCacheManager(
-            self, max_entries=obj_cache_entries)
+            self, max_entries=obj_cache_entries,
+            max_bytes=obj_cache_max_bytes,
+            invalidation=(obj_cache_invalidation or
+                          ObjectCacheManager.INVALIDATION_TIMESTAMP))
         self._obj_cache_exclude_types = obj_cache_exclude_types or []
 
         # these functions make calls to pycassa xget() and get_range()
@@ -185,72 +254,113 @@ class VncCassandraClient(object):
         return result.get(key)
 
     def multiget(self, cf_name, keys, columns=None, start='', finish='',
-                 timestamp=False):
+                 timestamp=False, lazy=False):
+        # With lazy, rows are returned as LazyJsonRow and a column is json
+        # decoded when the caller first reads it
         _thrift_limit_size = 10000
-        results = {}
         cf = self.get_cf(cf_name)
+        keys = list(keys)
+        key_chunk = self._MULTIGET_KEY_CHUNK
+        requests = []
 
         if not columns or start or finish:
-            try:
-                results = cf.multiget(keys,
-                                      column_start=start,
-                                      column_finish=finish,
-                                      include_timestamp=timestamp,
-                                      column_count=self._MAX_COL)
-            except OverflowError:
-                for key in keys:
-                    rows = dict(cf.xget(key,
-                                        column_start=start,
-                                        column_finish=finish,
-                                        include_timestamp=timestamp))
-                    if rows:
-                        results[key] = rows
+            requests.extend(
+                functools.partial(self._multiget_range, cf,
+                                  keys[x:x+key_chunk], start, finish,
+                                  timestamp)
+                for x in xrange(0, len(keys), key_chunk))
 
         if columns:
             max_key_range, _ = divmod(_thrift_limit_size, len(columns))
-            if max_key_range > 1:
-                for key_chunk in [keys[x:x+max_key_range] for x in
-                                  xrange(0, len(keys), max_key_range)]:
-                    rows = cf.multiget(key_chunk,
-                                       columns=columns,
-                                       include_timestamp=timestamp,
-                                       column_count=self._MAX_COL)
-                    merge_dict(results, rows)
-            elif max_key_range == 0:
-                for column_chunk in [columns[x:x+(_thrift_limit_size - 1)] for x in
-                                     xrange(0, len(columns), _thrift_limit_size - 1)]:
-                    rows = cf.multiget(keys,
-                                       columns=column_chunk,
-                                       include_timestamp=timestamp,
-                                       column_count=self._MAX_COL)
-                    merge_dict(results, rows)
-            elif max_key_range == 1:
-                for key in keys:
-                    try:
-                        cols = cf.get(key,
-                                      columns=column_chunk,
+            if max_key_range > 0:
+                key_chunk = min(key_chunk, max_key_range)
+                requests.extend(
+                    functools.partial(cf.multiget, keys[x:x+key_chunk],
+                                      columns=columns,
                                       include_timestamp=timestamp,
                                       column_count=self._MAX_COL)
-                    except pycassa.NotFoundException:
-                        continue
-                    results.setdefault(key, {}).update(cols)
+                    for x in xrange(0, len(keys), key_chunk))
+            else:
+                col_chunk = _thrift_limit_size - 1
+                requests.extend(
+                    functools.partial(cf.multiget, keys,
+                                      columns=columns[x:x+col_chunk],
+                                      include_timestamp=timestamp,
+                                      column_count=self._MAX_COL)
+                    for x in xrange(0, len(columns), col_chunk))
+
+        def fetch(request):
+            rows = request()
+            if not lazy:
+                for key, cols in rows.iteritems():
+                    for col, val in cols.items():
+                        cols[col] = self._decode_column(cf_name, key,
+                                                        timestamp, col, val)
+            return rows
+        # end fetch
+
+        results = self._multiget_chunks(fetch, requests)
+        if lazy:
+            for key in results:
+                results[key] = LazyJsonRow(
+                    results[key], functools.partial(
+                        self._decode_column, cf_name, key, timestamp))
+        return results
+    # end multiget
 
-        for key in results:
-            for col, val in results[key].items():
-                try:
-                    if timestamp:
-                        results[key][col] = (json.loads(val[0]), val[1])
-                    else:
-                        results[key][col] = json.loads(val)
-                except ValueError as e:
-                    msg = ("Cannot json load the value of cf: %s, key:%s "
-                           "(error: %s). Use it as is: %s" %
-                           (cf_name, key, str(e),
-                            val if not timestamp else val[0]))
-                    self._logger(msg, level=SandeshLevel.SYS_INFO)
-                    results[key][col] = val
+    def _multiget_range(self, cf, keys, start, finish, timestamp):
+        try:
+            return cf.multiget(keys,
+                               column_start=start,
+                               column_finish=finish,
+                               include_timestamp=timestamp,
+                               column_count=self._MAX_COL)
+        except OverflowError:
+            results = {}
+            for key in keys:
+                rows = dict(cf.xget(key,
+                                    column_start=start,
+                                    column_finish=finish,
+                                    include_timestamp=timestamp))
+                if rows:
+                    results[key] = rows
+            return results
+    # end _multiget_range
+
+    def _multiget_chunks(self, fetch, requests):
+        # Issue the chunk requests of a multiget concurrently, at most
+        # _MULTIGET_PARALLELISM at a time, decoding the rows of a chunk
+        # while the next ones are still in flight
+        results = {}
+        if len(requests) <= 1:
+            for request in requests:
+                merge_dict(results, fetch(request))
+            return results
 
+        pool = gevent.pool.Pool(self._MULTIGET_PARALLELISM)
+        greenlets = [pool.spawn(fetch, request) for request in requests]
+        try:
+            gevent.joinall(greenlets, raise_error=True)
+        except Exception:
+            gevent.killall(greenlets)
+            raise
+        for greenlet in greenlets:
+            merge_dict(results, greenlet.value)
         return results
+    # end _multiget_chunks
+
+    def _decode_column(self, cf_name, key, timestamp, col, val):
+        try:
+            if timestamp:
+                return (json.loads(val[0]), val[1])
+            return json.loads(val)
+        except ValueError as e:
+            msg = ("Cannot json load the value of cf: %s, key:%s "
+                   "(error: %s). Use it as is: %s" %
+                   (cf_name, key, str(e), val if not timestamp else val[0]))
+            self._logger(msg, level=SandeshLevel.SYS_INFO)
+            return val
+    # end _decode_column
 
     def delete(self, cf_name, key, columns=None):
         try:
@@ -748,6 +858,7 @@ class VncCassandraClient(object):
         #   1. pick the hits, and for the misses..
         #   2. read from db, cache, filter with fields
         #      else read from db with specified field filters
+        read_seq = self._obj_cache_mgr.read_seq
         if (field_names is None or
             set(field_names) & (backref_fields | children_fields)):
             # atleast one backref/children field is needed
@@ -759,7 +870,7 @@ class VncCassandraClient(object):
                 hit_obj_dicts, miss_uuids = self._obj_cache_mgr.read(
                     obj_uuids, field_names, include_backrefs_children)
             miss_obj_rows = self.multiget(self._OBJ_UUID_CF_NAME, miss_uuids,
-                                          timestamp=True)
+                                          timestamp=True, lazy=True)
         else:
             # ignore reading backref + children columns
             include_backrefs_children = False
@@ -772,7 +883,8 @@ class VncCassandraClient(object):
             miss_obj_rows = self.multiget(self._OBJ_UUID_CF_NAME,
                                           miss_uuids,
                                           start='d',
-                                          timestamp=True)
+                                          timestamp=True,
+                                          lazy=True)
 
         if (ignore_cache or
                 self._obj_cache_mgr.max_entries < len(miss_uuids)):
@@ -793,7 +905,7 @@ class VncCassandraClient(object):
                 include_backrefs_children)
             field_filtered_objs = self._obj_cache_mgr.set(
                 obj_class, rendered_objs_to_cache, req_fields,
-                include_backrefs_children)
+                include_backrefs_children, read_seq)
             obj_dicts = hit_obj_dicts + field_filtered_objs
 
         if not obj_dicts:
@@ -980,7 +1092,8 @@ class VncCassandraClient(object):
     # end object_update
 
     def object_list(self, obj_type, parent_uuids=None, back_ref_uuids=None,
-                     obj_uuids=None, count=False, filters=None):
+                     obj_uuids=None, count=False, filters=None,
+                     paginate_start=None, paginate_count=None):
         obj_class = self._get_resource_class(obj_type)
 
         children_fq_names_uuids = []
@@ -1027,6 +1140,99 @@ class VncCassandraClient(object):
             return ret_list
         # end get_fq_name_uuid_list
 
+        if paginate_count is not None and not count:
+            # marker based pagination, returns (True, page, next-marker).
+            # Candidates are walked in column order of the anchor rows (or
+            # of the fq_name table row for the type) so that only as many
+            # columns as needed to fill the page are read.
+            def anchor_candidates(anchor_uuid, col_type):
+                col_prefix = '%s:%s:' % (col_type, obj_type)
+                col_start = col_prefix
+                if paginate_start:
+                    col_start = col_prefix + paginate_start
+                for col_name, _ in self._obj_uuid_cf.xget(
+                        anchor_uuid, column_start=col_start,
+                        column_finish='%s:%s;' % (col_type, obj_type),
+                        buffer_size=paginate_count + 1):
+                    yield col_name[len(col_prefix):]
+            # end anchor_candidates
+
+            obj_uuid_set = set(obj_uuids or [])
+
+            def anchored_candidates():
+                # merge of per anchor sorted uuids, without duplicates
+                streams = []
+                for anchor_uuids, col_type in [
+                        (parent_uuids, 'children'),
+                        (back_ref_uuids, 'backref')]:
+                    if anchor_uuids:
+                        streams.extend(anchor_candidates(a, col_type)
+                                       for a in anchor_uuids)
+                prev_uuid = None
+                for obj_uuid in heapq.merge(*streams):
+                    if obj_uuid == prev_uuid:
+                        continue
+                    prev_uuid = obj_uuid
+                    if obj_uuid == paginate_start:
+                        continue
+                    if obj_uuid_set and obj_uuid not in obj_uuid_set:
+                        continue
+                    yield obj_uuid, obj_uuid, {'uuid': obj_uuid}
+            # end anchored_candidates
+
+            def uuid_candidates():
+                for obj_uuid in sorted(set(obj_uuids)):
+                    if paginate_start and obj_uuid <= paginate_start:
+                        continue
+                    yield obj_uuid, obj_uuid, {'uuid': obj_uuid}
+            # end uuid_candidates
+
+            def fq_name_candidates():
+                for col_name, _ in self._obj_fq_name_cf.xget(
+                        obj_type, column_start=paginate_start or '',
+                        buffer_size=paginate_count + 1):
+                    if col_name == paginate_start:
+                        continue
+                    col_name_arr = utils.decode_string(col_name).split(':')
+                    obj_uuid = col_name_arr[-1]
+                    yield col_name, obj_uuid, (col_name_arr[:-1], obj_uuid)
+            # end fq_name_candidates
+
+            if parent_uuids or back_ref_uuids:
+                candidates = anchored_candidates()
+            elif obj_uuids:
+                candidates = uuid_candidates()
+            else:
+                candidates = fq_name_candidates()
+
+            page_infos = []
+            marker = None
+            while len(page_infos) < paginate_count:
+                batch = list(itertools.islice(
+                    candidates, paginate_count - len(page_infos)))
+                if not batch:
+                    marker = None
+                    break
+                filt_infos = filter_rows(
+                    dict((obj_uuid, info) for _, obj_uuid, info in batch),
+                    filters)
+                for cand_marker, obj_uuid, info in batch:
+                    marker = cand_marker
+                    if obj_uuid in filt_infos:
+                        page_infos.append(info)
+            else:
+                # page is full, check if anything is left beyond it
+                try:
+                    next(candidates)
+                except StopIteration:
+                    marker = None
+
+            if parent_uuids or back_ref_uuids or obj_uuids:
+                page = get_fq_name_uuid_list(i['uuid'] for i in page_infos)
+            else:
+                page = page_infos
+            return (True, page, marker)
+
         if parent_uuids:
             # go from parent to child
             obj_rows = self.multiget(self._OBJ_UUID_CF_NAME,
@@ -1216,6 +1422,18 @@ class VncCassandraClient(object):
         return (True, result)
     # end prop_collection_read
 
+    def obj_cache_notify(self, oper, obj_uuid):
+        self._obj_cache_mgr.notify(oper, obj_uuid)
+    # end obj_cache_notify
+
+    def obj_cache_reset(self):
+        self._obj_cache_mgr.evict_all()
+    # end obj_cache_reset
+
+    def obj_cache_stats(self):
+        return self._obj_cache_mgr.get_stats()
+    # end obj_cache_stats
+
     def cache_uuid_to_fq_name_add(self, id, fq_name, obj_type):
         self._cache_uuid_to_fq_name[id] = (fq_name, obj_type)
     # end cache_uuid_to_fq_name_add
@@ -1522,7 +1740,8 @@ class VncCassandraClient(object):
         result['%s_back_refs' % (back_ref_obj_type)].append(back_ref_info)
     # end _read_back_ref
 
-    def walk(self, fn=None):
+    def get_obj_uuids_by_type(self):
+        # one pass over all objects, returns obj_type => [uuids]
         type_to_object = {}
         for obj_uuid, obj_col in self._obj_uuid_cf.get_range(
                 columns=['type', 'fq_name']):
@@ -1541,6 +1760,11 @@ class VncCassandraClient(object):
                              level=SandeshLevel.SYS_ERR)
                 continue
 
+        return type_to_object
+    # end get_obj_uuids_by_type
+
+    def walk(self, fn=None):
+        type_to_object = self.get_obj_uuids_by_type()
         if fn is None:
             return []
         walk_results = []
@@ -1563,6 +1787,20 @@ class VncCassandraClient(object):
 
 
 class ObjectCacheManager(object):
+    # staleness of a cached entry is detected either by comparing its
+    # timestamps against the db on every hit ('timestamp'), or by relying on
+    # the object-update notifications published on the message bus to evict
+    # it ('notify'). In 'notify' mode, reads of props/refs are served purely
+    # from memory; reads that need backrefs/children are still validated
+    # against META:latest_col_ts as those columns change without a
+    # notification for the object itself.
+    INVALIDATION_TIMESTAMP = 'timestamp'
+    INVALIDATION_NOTIFY = 'notify'
+
+    # number of recent invalidations remembered to detect an invalidation
+    # racing with a db read of the same object
+    _MAX_RECENT_INVALIDATIONS = 1024
+
     class CachedObject(object):
         # provide a read-only copy in so far as
         # top level keys cannot be add/mod/del
@@ -1579,14 +1817,16 @@ class ObjectCacheManager(object):
             del __readonly__
         # end RODict
 
-        def __init__(self, obj_dict, id_perms_ts, row_latest_ts):
+        def __init__(self, obj_dict, id_perms_ts, row_latest_ts, size=0):
             self.obj_dict = self.RODict(obj_dict)
             self.id_perms_ts = id_perms_ts
             self.row_latest_ts = row_latest_ts
+            self.size = size
         # end __init__
 
-        def update_obj_dict(self, new_obj_dict):
+        def update_obj_dict(self, new_obj_dict, size=0):
             self.obj_dict = self.RODict(new_obj_dict)
+            self.size = size
         # end update_obj_dict
 
         def get_filtered_copy(self, field_names=None):
@@ -1600,28 +1840,113 @@ class ObjectCacheManager(object):
 
     # end class CachedObject
 
-    def __init__(self, db_client, max_entries):
+    def __init__(self, db_client, max_entries, max_bytes=0,
+                 invalidation=INVALIDATION_TIMESTAMP):
+        if invalidation not in (self.INVALIDATION_TIMESTAMP,
+                                self.INVALIDATION_NOTIFY):
+            raise VncError('Invalid object cache invalidation mode: %s'
+                           % (invalidation))
+        # 0 means the cache is disabled
         self.max_entries = max_entries
+        # 0 means no budget on (estimated) size of cached objects
+        self.max_bytes = max_bytes
+        self.invalidation = invalidation
         self._db_client = db_client
-        self._cache = {}
+        # least recently used entry first
+        self._cache = OrderedDict()
+        self._cached_bytes = 0
+
+        self._invalidation_seq = 0
+        self._recent_invalidations = deque(
+            maxlen=self._MAX_RECENT_INVALIDATIONS)
+
+        self._hits = 0
+        self._misses = 0
+        self._stale_hits = 0
+        self._evictions = 0
+        self._invalidations = 0
     # end __init__
 
+    @property
+    def read_seq(self):
+        # token to be taken before reading from db and passed to set() so
+        # that entries invalidated during the db read are not cached
+        return self._invalidation_seq
+    # end read_seq
+
+    def _uuids_invalidated_since(self, read_seq):
+        # None if too many invalidations happened to know which uuids
+        num_invalidations = self._invalidation_seq - read_seq
+        if num_invalidations == 0:
+            return set()
+        if num_invalidations > len(self._recent_invalidations):
+            return None
+        return set(itertools.islice(reversed(self._recent_invalidations),
+                                    num_invalidations))
+    # end _uuids_invalidated_since
+
+    def _remove(self, obj_uuid):
+        cached_obj = self._cache.pop(obj_uuid)
+        self._cached_bytes -= cached_obj.size
+    # end _remove
+
+    def _shrink_to_fit(self, incoming_entries=0, incoming_bytes=0):
+        # evict least recently used entries till budgets are met
+        while self._cache and (
+                len(self._cache) + incoming_entries > self.max_entries or
+                (self.max_bytes and
+                 self._cached_bytes + incoming_bytes > self.max_bytes)):
+            _, cached_obj = self._cache.popitem(last=False)
+            self._cached_bytes -= cached_obj.size
+            self._evictions += 1
+    # end _shrink_to_fit
+
     def evict(self, obj_uuids):
         for obj_uuid in obj_uuids:
+            self._invalidation_seq += 1
+            self._recent_invalidations.append(obj_uuid)
             try:
-                del self._cache[obj_uuid]
+                self._remove(obj_uuid)
+                self._invalidations += 1
             except KeyError:
                 continue
     # end evict
 
+    def evict_all(self):
+        # e.g. notifications may have been lost, nothing cached can be trusted
+        self._invalidations += len(self._cache)
+        self._cache.clear()
+        self._cached_bytes = 0
+        # make any db read in progress skip populating the cache
+        self._invalidation_seq += self._MAX_RECENT_INVALIDATIONS + 1
+    # end evict_all
+
+    def notify(self, oper, obj_uuid):
+        if self.invalidation != self.INVALIDATION_NOTIFY:
+            return
+        self.evict([obj_uuid])
+    # end notify
+
+    def get_stats(self):
+        return {
+            'invalidation': self.invalidation,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'entries': len(self._cache),
+            'bytes': self._cached_bytes,
+            'hits': self._hits,
+            'misses': self._misses,
+            'stale_hits': self._stale_hits,
+            'evictions': self._evictions,
+            'invalidations': self._invalidations,
+        }
+    # end get_stats
+
     def set(self, obj_class, db_rendered_objs, req_fields,
-            include_backrefs_children):
-        # evict to accomodate new entries
-        new_size = len(set(self._cache.keys()) |
-                       set(db_rendered_objs.keys()))
-        if new_size > self.max_entries:
-            for i in range(new_size - self.max_entries):
-                self._cache.popitem()
+            include_backrefs_children, read_seq=None):
+        skip_uuids = set()
+        if read_seq is not None:
+            skip_uuids = self._uuids_invalidated_since(read_seq)
 
         # build up results with field filter
         result_obj_dicts = []
@@ -1631,10 +1956,34 @@ class ObjectCacheManager(object):
         for obj_uuid, render_info in db_rendered_objs.items():
             id_perms_ts = render_info.get('id_perms_ts', 0)
             row_latest_ts = render_info.get('row_latest_ts', 0)
+            if self.max_bytes:
+                obj_size = len(json.dumps(render_info['obj_dict']))
+            else:
+                obj_size = 0
+            if (skip_uuids is None or obj_uuid in skip_uuids or
+                    self.max_entries <= 0 or
+                    (self.max_bytes and obj_size > self.max_bytes)):
+                # invalidated while we were reading from db, value read
+                # may be stale so don't cache it. Same when the cache is
+                # disabled or the object alone exceeds the byte budget.
+                try:
+                    self._remove(obj_uuid)
+                except KeyError:
+                    pass
+                cached_obj = self.CachedObject(
+                    render_info['obj_dict'], id_perms_ts, row_latest_ts)
+                if req_fields:
+                    result_obj_dicts.append(
+                        cached_obj.get_filtered_copy(result_fields))
+                else:
+                    result_obj_dicts.append(cached_obj.get_filtered_copy())
+                continue
+
             try:
                 # if we had stale, just update from new db value
-                cached_obj = self._cache[obj_uuid]
-                cached_obj.update_obj_dict(render_info['obj_dict'])
+                cached_obj = self._cache.pop(obj_uuid)
+                self._cached_bytes -= cached_obj.size
+                cached_obj.update_obj_dict(render_info['obj_dict'], obj_size)
                 cached_obj.id_perms_ts = id_perms_ts
                 if include_backrefs_children:
                     cached_obj.row_latest_ts = row_latest_ts
@@ -1643,15 +1992,19 @@ class ObjectCacheManager(object):
                 cached_obj = self.CachedObject(
                     render_info['obj_dict'],
                     id_perms_ts,
-                    row_latest_ts)
+                    row_latest_ts,
+                    obj_size)
 
+            # evict to accomodate new entry
+            self._shrink_to_fit(1, obj_size)
             self._cache[obj_uuid] = cached_obj
+            self._cached_bytes += obj_size
 
             if req_fields:
                 result_obj_dicts.append(
-                    self._cache[obj_uuid].get_filtered_copy(result_fields))
+                    cached_obj.get_filtered_copy(result_fields))
             else:
-                result_obj_dicts.append(self._cache[obj_uuid].get_filtered_copy())
+                result_obj_dicts.append(cached_obj.get_filtered_copy())
         # end for all rendered objects
 
         return result_obj_dicts
@@ -1660,10 +2013,11 @@ class ObjectCacheManager(object):
     def read(self, obj_uuids, req_fields, include_backrefs_children):
         # find which keys are a hit, find which hit keys are not stale
         # return hit entries and miss+stale uuids.
-        cached_uuid_set = set(self._cache.keys())
         request_uuid_set = set(obj_uuids)
-        hit_uuid_set = set(obj_uuids) & cached_uuid_set
-        miss_uuid_set = set(obj_uuids) - cached_uuid_set
+        hit_uuid_set = set(
+            [obj_uuid for obj_uuid in request_uuid_set
+             if obj_uuid in self._cache])
+        miss_uuid_set = request_uuid_set - hit_uuid_set
         stale_uuids = []
 
         # staleness when include_backrefs_children is False = id_perms tstamp
@@ -1675,9 +2029,18 @@ class ObjectCacheManager(object):
             stale_check_col_name = 'prop:id_perms'
             stale_check_ts_attr = 'id_perms_ts'
 
-        hit_rows_in_db = self._db_client.multiget(
-            self._db_client._OBJ_UUID_CF_NAME, list(hit_uuid_set),
-            columns=[stale_check_col_name], timestamp=True)
+        if (self.invalidation == self.INVALIDATION_NOTIFY and
+                not include_backrefs_children):
+            # cached entries are evicted on update notifications,
+            # no need to go to db
+            stale_check_col_name = None
+            hit_rows_in_db = None
+        elif hit_uuid_set:
+            hit_rows_in_db = self._db_client.multiget(
+                self._db_client._OBJ_UUID_CF_NAME, list(hit_uuid_set),
+                columns=[stale_check_col_name], timestamp=True)
+        else:
+            hit_rows_in_db = {}
 
         obj_dicts = []
         if req_fields:
@@ -1685,8 +2048,9 @@ class ObjectCacheManager(object):
                 'parent_type', 'parent_uuid'])
         for hit_uuid in hit_uuid_set:
             try:
-                obj_cols = hit_rows_in_db[hit_uuid]
                 cached_obj = self._cache[hit_uuid]
+                if stale_check_col_name is not None:
+                    obj_cols = hit_rows_in_db[hit_uuid]
             except KeyError:
                 # Either stale check column missing, treat as miss
                 # Or entry could have been evicted while context switched
@@ -1694,19 +2058,29 @@ class ObjectCacheManager(object):
                 miss_uuid_set.add(hit_uuid)
                 continue
 
-            if (getattr(cached_obj, stale_check_ts_attr) !=
+            if (stale_check_col_name is not None and
+                    getattr(cached_obj, stale_check_ts_attr) !=
                     obj_cols[stale_check_col_name][1]):
                 miss_uuid_set.add(hit_uuid)
                 stale_uuids.append(hit_uuid)
                 continue
 
+            # mark as most recently used
+            self._cache[hit_uuid] = self._cache.pop(hit_uuid)
             if req_fields:
                 obj_dicts.append(cached_obj.get_filtered_copy(result_fields))
             else:
                 obj_dicts.append(cached_obj.get_filtered_copy())
         # end for all hit in cache
 
-        self.evict(stale_uuids)
+        self._hits += len(obj_dicts)
+        self._stale_hits += len(stale_uuids)
+        self._misses += len(miss_uuid_set)
+        for stale_uuid in stale_uuids:
+            try:
+                self._remove(stale_uuid)
+            except KeyError:
+                continue
         return obj_dicts, list(miss_uuid_set)
     # end read
 # end class ObjectCacheManager
@@ -10,6 +10,96 @@ from vnc_api.gen.resource_client import *
 from utils import obj_type_to_vnc_class, compare_refs
 
 
+# object type map of each module, computed once by DBBase.get_obj_type_map
+# and dropped whenever a new DBBase class is defined
+_obj_type_maps = {}
+
+
+class ObjectDict(dict):
+    # dict of the objects of a DBBase class, also indexing them by name so
+    # that find_by_name_or_uuid does not scan all the objects. Object names
+    # are expected to not change once set.
+
+    def __init__(self, *args, **kwargs):
+        super(ObjectDict, self).__init__()
+        self._name_index = {}
+        self._key_names = {}
+        self._unnamed_keys = set()
+        self.update(*args, **kwargs)
+    # end __init__
+
+    def _add_name(self, key, obj):
+        name = getattr(obj, 'name', None)
+        if name is None:
+            self._unnamed_keys.add(key)
+            return
+        self._key_names[key] = name
+        self._name_index.setdefault(name, set()).add(key)
+    # end _add_name
+
+    def _remove_name(self, key):
+        name = self._key_names.pop(key, None)
+        if name is None:
+            self._unnamed_keys.discard(key)
+            return
+        keys = self._name_index[name]
+        keys.discard(key)
+        if not keys:
+            del self._name_index[name]
+    # end _remove_name
+
+    def __setitem__(self, key, obj):
+        if key in self:
+            self._remove_name(key)
+        super(ObjectDict, self).__setitem__(key, obj)
+        self._add_name(key, obj)
+
+    def __delitem__(self, key):
+        super(ObjectDict, self).__delitem__(key)
+        self._remove_name(key)
+
+    def pop(self, key, *default):
+        if key in self:
+            self._remove_name(key)
+        return super(ObjectDict, self).pop(key, *default)
+
+    def popitem(self):
+        key, obj = super(ObjectDict, self).popitem()
+        self._remove_name(key)
+        return key, obj
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, obj in dict(*args, **kwargs).iteritems():
+            self[key] = obj
+
+    def clear(self):
+        super(ObjectDict, self).clear()
+        self._name_index.clear()
+        self._key_names.clear()
+        self._unnamed_keys.clear()
+
+    def find_by_name(self, name):
+        for key in self._name_index.get(name, ()):
+            return self[key]
+        # objects which did not have a name yet when they were added
+        for key in list(self._unnamed_keys):
+            obj = self[key]
+            if getattr(obj, 'name', None) is None:
+                continue
+            self._unnamed_keys.discard(key)
+            self._add_name(key, obj)
+            if obj.name == name:
+                return obj
+        return None
+    # end find_by_name
+# end class ObjectDict
+
+
 class DBBase(object):
     # This is the base class for all DB objects. All derived objects must
     # have a class member called _dict of dictionary type.
@@ -23,6 +113,9 @@ class DBBase(object):
     # set _indexed_by_name to True in the derived class to use fq-name as index
     _indexed_by_name = False
 
+    # number of objects read from the database at a time when listing
+    _list_chunk_size = 1000
+
     @classmethod
     def init(cls, manager, logger, object_db):
         cls._logger = logger
@@ -39,6 +132,19 @@ class DBBase(object):
 
     class __metaclass__(type):
 
+        def __init__(cls, name, bases, attrs):
+            type.__init__(cls, name, bases, attrs)
+            if '_dict' in attrs:
+                cls._dict = attrs['_dict']
+            _obj_type_maps.clear()
+        # end __init__
+
+        def __setattr__(cls, name, value):
+            if name == '_dict' and type(value) is dict:
+                value = ObjectDict(value)
+            type.__setattr__(cls, name, value)
+        # end __setattr__
+
         def __iter__(cls):
             for i in cls._dict:
                 yield i
@@ -370,10 +476,50 @@ class DBBase(object):
         return objs
 
     @classmethod
-    def list_vnc_obj(cls, obj_type=None, fields=None):
+    def list_uuids(cls, obj_type=None):
+        obj_type = obj_type or cls.obj_type
+        ok, result = cls._object_db.object_list(obj_type)
+        if not ok:
+            return []
+        return [uuid for _, uuid in result]
+    # end list_uuids
+
+    @classmethod
+    def iter_obj(cls, obj_type=None, fields=None, uuids=None,
+                 chunk_size=None):
+        # generates the objects, reading _list_chunk_size of them at a time
+        # from the database so that only one chunk is held in memory
+        obj_type = obj_type or cls.obj_type
+        if uuids is None:
+            uuids = cls.list_uuids(obj_type)
+        chunk_size = chunk_size or cls._list_chunk_size or len(uuids) or 1
+        for i in xrange(0, len(uuids), chunk_size):
+            chunk = uuids[i:i + chunk_size]
+            try:
+                ok, objs = cls._object_db.object_read(obj_type, chunk,
+                                                      field_names=fields)
+            except NoIdError:
+                # deleted since listed, left to its delete notification
+                if len(chunk) == 1:
+                    continue
+                # read the rest of the chunk one by one
+                for obj_dict in cls.iter_obj(obj_type, fields, chunk,
+                                             chunk_size=1):
+                    yield obj_dict
+                continue
+            if not ok:
+                cls._logger.error('Cannot read %d %s objects: %s' % (
+                    len(chunk), obj_type, objs))
+                continue
+            for obj_dict in objs:
+                yield obj_dict
+    # end iter_obj
+
+    @classmethod
+    def list_vnc_obj(cls, obj_type=None, fields=None, uuids=None):
         obj_type = obj_type or cls.obj_type
         vnc_cls = obj_type_to_vnc_class(obj_type, __name__)
-        obj_dicts = cls.list_obj(obj_type, fields)
+        obj_dicts = cls.iter_obj(obj_type, fields, uuids)
         for obj_dict in obj_dicts:
             obj = vnc_cls.from_dict(**obj_dict)
             obj.clear_pending_updates()
@@ -394,6 +540,8 @@ class DBBase(object):
         if obj:
             return obj
 
+        if isinstance(cls._dict, ObjectDict):
+            return cls._dict.find_by_name(name_or_uuid)
         for obj in cls.values():
             if obj.name == name_or_uuid:
                 return obj
@@ -406,9 +554,14 @@ class DBBase(object):
 
     @classmethod
     def get_obj_type_map(cls):
-        module_base = [x for x in DBBase.__subclasses__()
-                       if cls.__module__ == x.obj_type]
-        return dict((x.obj_type, x) for x in module_base[0].__subclasses__())
+        obj_type_map = _obj_type_maps.get(cls.__module__)
+        if obj_type_map is None:
+            module_base = [x for x in DBBase.__subclasses__()
+                           if cls.__module__ == x.obj_type]
+            obj_type_map = dict((x.obj_type, x)
+                                for x in module_base[0].__subclasses__())
+            _obj_type_maps[cls.__module__] = obj_type_map
+        return obj_type_map
 
     @classmethod
     def get_by_uuid(cls, uuid, *args):
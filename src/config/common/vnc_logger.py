@@ -66,6 +66,12 @@ class ConfigServiceLogger(object):
             self._sandesh.logger().log(
                     SandeshLogger.get_py_logger_level(level), log_msg)
 
+    def is_enabled_for(self, level):
+        """ Whether messages of the sandesh level are logged, to skip
+        formatting the messages that would be dropped """
+        return self._sandesh.logger().isEnabledFor(
+            SandeshLogger.get_py_logger_level(level))
+
     def emergency(self, log_msg, log_fun=None):
         self.log(log_msg, level=SandeshLevel.SYS_EMERG, fun=log_fun)
 
@@ -2,6 +2,7 @@
 # Copyright (c) 2013 Juniper Networks, Inc. All rights reserved.
 #
 import os
+import bisect
 import gevent
 import logging
 import kazoo.client
@@ -11,7 +12,6 @@ import kazoo.recipe.election
 from kazoo.client import KazooState
 from kazoo.retry import KazooRetry
 
-from bitarray import bitarray
 from cfgm_common.exceptions import ResourceExhaustionError, ResourceExistsError
 from gevent.lock import BoundedSemaphore
 
@@ -21,6 +21,12 @@ LOG_DIR = '/var/log/contrail/'
 
 class IndexAllocator(object):
 
+    # In-use state is kept as sorted, non-adjacent free ranges of bits
+    # (_free_starts[i].._free_ends[i] inclusive) instead of a bitmap, so
+    # memory follows the fragmentation of the pool rather than its size and
+    # the lowest free bit is always _free_starts[0]. Bits are positions in
+    # the concatenation of alloc_list ranges (reversed when reverse=True).
+
     def __init__(self, zookeeper_client, path, size=0, start_idx=0, 
                  reverse=False,alloc_list=None, max_alloc=0):
         self._size = size
@@ -53,73 +59,154 @@ class IndexAllocator(object):
 
         self._zookeeper_client = zookeeper_client
         self._path = path
-        self._in_use = bitarray('0')
         self._reverse = reverse
-        for idx in self._zookeeper_client.get_children(path):
-            idx_int = self._get_bit_from_zk_index(int(idx))
-            if idx_int >= 0:
-                self._set_in_use(idx_int)
-        # end for idx
+
+        # first bit of each alloc range, both in zk index order (to map an
+        # index to its bit) and in bit order (to map a bit to its index)
+        self._zk_starts = [alloc['start'] for alloc in self._alloc_list]
+        self._bit_allocs = list(self._alloc_list)
+        if reverse:
+            self._bit_allocs.reverse()
+        self._bit_offsets = []
+        offset = 0
+        for alloc in self._bit_allocs:
+            self._bit_offsets.append(offset)
+            offset += alloc['end'] - alloc['start'] + 1
+        self._total_bits = offset
+        if reverse:
+            self._zk_bit_offsets = list(reversed(self._bit_offsets))
+        else:
+            self._zk_bit_offsets = list(self._bit_offsets)
+
+        self._free_starts = [0]
+        self._free_ends = [self._max_alloc]
+        self._free_count = self._max_alloc + 1
+        # indexes already created in zookeeper are read on first use, bits
+        # released before that must not be resurrected by the read
+        self._populated = False
+        self._released_bits = set()
+        # the read yields, callers arriving meanwhile wait for it to be
+        # merged rather than allocating from the partial state
+        self._populate_lock = BoundedSemaphore()
     # end __init__
 
+    def _populate(self):
+        if self._populated:
+            return
+        with self._populate_lock:
+            if self._populated:
+                return
+            bits = []
+            for idx in self._zookeeper_client.get_children(self._path):
+                bit_idx = self._get_bit_from_zk_index(int(idx))
+                if bit_idx >= 0 and bit_idx not in self._released_bits:
+                    bits.append(bit_idx)
+            self._set_in_use_bits(bits)
+            self._released_bits = None
+            self._populated = True
+    # end _populate
+
     def _get_zk_index_from_bit(self, idx):
-        size = idx
-        if self._reverse:
-            for alloc in reversed(self._alloc_list):
-                size -= alloc['end'] - alloc['start'] + 1
-                if size < 0:
-                   return alloc['start']-size - 1
-        else:
-            for alloc in self._alloc_list:
-                size -= alloc['end'] - alloc['start'] + 1
-                if size < 0:
-                   return alloc['end']+size + 1
+        if 0 <= idx < self._total_bits:
+            pos = bisect.bisect_right(self._bit_offsets, idx) - 1
+            alloc = self._bit_allocs[pos]
+            if self._reverse:
+                return alloc['end'] - (idx - self._bit_offsets[pos])
+            return alloc['start'] + (idx - self._bit_offsets[pos])
 
         raise ResourceExhaustionError(
             'Cannot get zk index from bit %s' %(idx))
     # end _get_zk_index
 
     def _get_bit_from_zk_index(self, idx):
-        size = 0
+        pos = bisect.bisect_right(self._zk_starts, idx) - 1
+        if pos < 0:
+            return -1
+        alloc = self._alloc_list[pos]
+        if idx > alloc['end']:
+            return -1
         if self._reverse:
-            for alloc in reversed(self._alloc_list):
-                if alloc['start'] <= idx <= alloc['end']:
-                    return alloc['end'] - idx + size
-                size += alloc['end'] - alloc['start'] + 1
-            pass
-        else:
-            for alloc in self._alloc_list:
-                if alloc['start'] <= idx <= alloc['end']:
-                    return idx - alloc['start'] + size
-                size += alloc['end'] - alloc['start'] + 1
-        return -1
+            return alloc['end'] - idx + self._zk_bit_offsets[pos]
+        return idx - alloc['start'] + self._zk_bit_offsets[pos]
     # end _get_bit_from_zk_index
 
     def _set_in_use(self, bitnum):
-        # if the index is higher than _max_alloc, do not use the bitarray, in
-        # order to reduce the size of the bitarray. Otherwise, set the bit
-        # corresponding to idx to 1 and extend the _in_use bitarray if needed
-        if bitnum > self._max_alloc:
+        # indexes higher than _max_alloc are never handed out by alloc, so
+        # they are not tracked
+        if not 0 <= bitnum <= self._max_alloc:
+            return
+        if not self._populated:
+            self._released_bits.discard(bitnum)
+        pos = bisect.bisect_right(self._free_starts, bitnum) - 1
+        if pos < 0 or self._free_ends[pos] < bitnum:
+            # already in use
             return
-        if bitnum >= self._in_use.length():
-            temp = bitarray(bitnum - self._in_use.length())
-            temp.setall(0)
-            temp.append('1')
-            self._in_use.extend(temp)
+        self._free_count -= 1
+        start = self._free_starts[pos]
+        end = self._free_ends[pos]
+        if start == end:
+            del self._free_starts[pos]
+            del self._free_ends[pos]
+        elif bitnum == start:
+            self._free_starts[pos] = bitnum + 1
+        elif bitnum == end:
+            self._free_ends[pos] = bitnum - 1
         else:
-            self._in_use[bitnum] = 1
+            self._free_ends[pos] = bitnum - 1
+            self._free_starts.insert(pos + 1, bitnum + 1)
+            self._free_ends.insert(pos + 1, end)
     # end _set_in_use
 
+    def _set_in_use_bits(self, bits):
+        # mark a batch of bits in a single pass over the free ranges
+        bits = sorted(set(bit for bit in bits if 0 <= bit <= self._max_alloc))
+        if not bits:
+            return
+        free_starts = []
+        free_ends = []
+        bit_pos = 0
+        for start, end in zip(self._free_starts, self._free_ends):
+            while bit_pos < len(bits) and bits[bit_pos] < start:
+                bit_pos += 1
+            while bit_pos < len(bits) and bits[bit_pos] <= end:
+                bit = bits[bit_pos]
+                if bit > start:
+                    free_starts.append(start)
+                    free_ends.append(bit - 1)
+                self._free_count -= 1
+                start = bit + 1
+                bit_pos += 1
+            if start <= end:
+                free_starts.append(start)
+                free_ends.append(end)
+        self._free_starts = free_starts
+        self._free_ends = free_ends
+    # end _set_in_use_bits
+
     def _reset_in_use(self, bitnum):
-        # if the index is higher than _max_alloc, do not use the bitarray, in
-        # order to reduce the size of the bitarray. Otherwise, set the bit
-        # corresponding to idx to 1 and extend the _in_use bitarray if needed
-        if bitnum > self._max_alloc:
+        if not 0 <= bitnum <= self._max_alloc:
             return
-        if bitnum >= self._in_use.length():
+        if not self._populated:
+            self._released_bits.add(bitnum)
+        pos = bisect.bisect_right(self._free_starts, bitnum) - 1
+        if pos >= 0 and self._free_ends[pos] >= bitnum:
+            # already free
             return
+        self._free_count += 1
+        merge_prev = pos >= 0 and self._free_ends[pos] == bitnum - 1
+        merge_next = (pos + 1 < len(self._free_starts) and
+                      self._free_starts[pos + 1] == bitnum + 1)
+        if merge_prev and merge_next:
+            self._free_ends[pos] = self._free_ends[pos + 1]
+            del self._free_starts[pos + 1]
+            del self._free_ends[pos + 1]
+        elif merge_prev:
+            self._free_ends[pos] = bitnum
+        elif merge_next:
+            self._free_starts[pos + 1] = bitnum
         else:
-            self._in_use[bitnum] = 0
+            self._free_starts.insert(pos + 1, bitnum)
+            self._free_ends.insert(pos + 1, bitnum)
     # end _reset_in_use
 
     def set_in_use(self, idx):
@@ -137,19 +224,23 @@ class IndexAllocator(object):
     # end reset_in_use
 
     def get_alloc_count(self):
-        return self._in_use.count()
+        self._populate()
+        return self._max_alloc + 1 - self._free_count
     # end get_alloc_count
 
+    def get_free_ranges(self):
+        # free indexes as a list of (start, end) bit ranges, for introspection
+        self._populate()
+        return zip(self._free_starts, self._free_ends)
+    # end get_free_ranges
+
     def alloc(self, value=None):
         # Allocates a index from the allocation list
-        if self._in_use.all():
-            idx = self._in_use.length()
-            if idx > self._max_alloc:
-                raise ResourceExhaustionError()
-            self._in_use.append(1)
-        else:
-            idx = self._in_use.index(0)
-            self._in_use[idx] = 1
+        self._populate()
+        if not self._free_starts:
+            raise ResourceExhaustionError()
+        idx = self._free_starts[0]
+        self._set_in_use(idx)
 
         idx = self._get_zk_index_from_bit(idx)
         try:
@@ -184,12 +275,40 @@ class IndexAllocator(object):
             raise
     # end reserve
 
+    def reserve_bulk(self, idx_list, value=None):
+        # Reserves all requested indexes, returns the ones reserved (indexes
+        # out of range are skipped). In-use state is updated in one pass.
+        reserved = []
+        try:
+            for idx in idx_list:
+                if not self._start_idx <= idx < self._start_idx + self._size:
+                    continue
+                id_str = "%(#)010d" % {'#': idx}
+                try:
+                    self._zookeeper_client.create_node(self._path + id_str,
+                                                       value)
+                except ResourceExistsError:
+                    existing_value = self._zookeeper_client.read_node(
+                        self._path + id_str)
+                    if value != existing_value:
+                        msg = 'For index %s reserve conflicts with existing '\
+                              'value %s.' %(idx, existing_value)
+                        self._zookeeper_client.syslog(msg, level='notice')
+                        self.set_in_use(idx)
+                        raise
+                reserved.append(idx)
+        finally:
+            self._set_in_use_bits([self._get_bit_from_zk_index(idx)
+                                   for idx in reserved])
+        return reserved
+    # end reserve_bulk
+
     def delete(self, idx):
         id_str = "%(#)010d" % {'#': idx}
         self._zookeeper_client.delete_node(self._path + id_str)
         bit_idx = self._get_bit_from_zk_index(idx)
-        if 0 <= bit_idx < self._in_use.length():
-            self._in_use[bit_idx] = 0
+        if bit_idx >= 0:
+            self._reset_in_use(bit_idx)
     # end delete
 
     def read(self, idx):
@@ -203,7 +322,8 @@ class IndexAllocator(object):
     # end read
 
     def empty(self):
-        return not self._in_use.any()
+        self._populate()
+        return self._free_count == self._max_alloc + 1
     # end empty
 
     @classmethod
@@ -369,6 +489,44 @@ class ZookeeperClient(object):
             raise e
     # end delete_node
 
+    def add_to_counter(self, path, delta, max_value=None):
+        # atomically add delta to the integer counter in node, failing if
+        # that takes it above max_value. Returns the new value or None if
+        # the counter node doesn't exist.
+        retry = self._retry.copy()
+        while True:
+            try:
+                value, stat = retry(self._zk_client.get, path)
+            except kazoo.exceptions.NoNodeError:
+                return None
+            new_value = max(int(value) + delta, 0)
+            if (max_value is not None and delta > 0 and
+                    new_value > max_value):
+                raise ResourceExhaustionError(
+                    'Counter %s at %s' %(path, value))
+            try:
+                retry(self._zk_client.set, path, str(new_value),
+                      version=stat.version)
+                return new_value
+            except kazoo.exceptions.BadVersionError:
+                # raced with another update, retry on the latest value
+                continue
+            except kazoo.exceptions.NoNodeError:
+                return None
+    # end add_to_counter
+
+    def set_node(self, path, value, version=-1):
+        # returns False if the node is gone or, when version is given, if
+        # it changed since that version
+        try:
+            retry = self._retry.copy()
+            retry(self._zk_client.set, path, str(value), version=version)
+            return True
+        except (kazoo.exceptions.BadVersionError,
+                kazoo.exceptions.NoNodeError):
+            return False
+    # end set_node
+
     def read_node(self, path, include_timestamp=False):
         try:
             retry = self._retry.copy()
@@ -8,6 +8,7 @@ configuration manager
 """
 from device_conf import DeviceConf
 from dm_utils import PushConfigState
+from dm_utils import PushConfigScheduler
 from dm_utils import DMUtils
 from sandesh.dm_introspect import ttypes as sandesh
 from cfgm_common.vnc_db import DBBase
@@ -15,13 +16,9 @@ from cfgm_common.uve.physical_router.ttypes import *
 from vnc_api.vnc_api import *
 import copy
 import socket
-import gevent
-import traceback
-from gevent import queue
 from cfgm_common.vnc_object_db import VncObjectDBClient
 from netaddr import IPAddress
 from cfgm_common.zkclient import IndexAllocator
-from cfgm_common import vnc_greenlets
 from sandesh_common.vns.constants import DEVICE_MANAGER_KEYSPACE_NAME
 
 
@@ -84,13 +81,13 @@ class PhysicalRouterDM(DBBaseDM):
     _dict = {}
     obj_type = 'physical_router'
     _sandesh = None
+    _push_scheduler = None
 
     def __init__(self, uuid, obj_dict=None):
         self.uuid = uuid
         self.virtual_networks = set()
         self.bgp_router = None
         self.config_manager = None
-        self.nc_q = queue.Queue(maxsize=1)
         self.vn_ip_map = {'irb': {}, 'lo0': {}}
         self.config_sent = False
         self.init_cs_state()
@@ -103,8 +100,6 @@ class PhysicalRouterDM(DBBaseDM):
         if self.config_manager:
             self.set_conf_sent_state(False)
             self.config_repush_interval = PushConfigState.get_repush_interval()
-            self.nc_handler_gl = vnc_greenlets.VncGreenlet("VNC Device Manager",
-                                                       self.nc_handler)
             self.uve_send()
     # end __init__
 
@@ -150,6 +145,8 @@ class PhysicalRouterDM(DBBaseDM):
         obj = cls._dict[uuid]
         if obj.is_vnc_managed() and obj.is_conf_sent():
             obj.config_manager.push_conf(is_delete=True)
+        if cls._push_scheduler:
+            cls._push_scheduler.remove(uuid)
         obj._object_db.delete_pr(uuid)
         obj.uve_send(True)
         obj.update_single_ref('bgp_router', {})
@@ -164,28 +161,17 @@ class PhysicalRouterDM(DBBaseDM):
         return False
     # end is_junos_service_ports_enabled
 
-    def block_and_set_config_state(self, timeout):
-        try:
-            if self.nc_q.get(True, timeout) is not None:
-                self.set_config_state()
-        except queue.Empty:
-            self.set_config_state()
-    # end block_and_set_config_state
-
-    def set_config_state(self):
-        try:
-            self.nc_q.put_nowait(1)
-        except queue.Full:
-            pass
-    # end
-
-    def nc_handler(self):
-        while self.nc_q.get() is not None:
-            try:
-                self.push_config()
-            except Exception as e:
-                tb = traceback.format_exc()
-                self._logger.error("Exception: " + str(e) + tb)
+    def set_config_state(self, delay=0):
+        # queue a config push, a push with a delay is brought forward
+        # by any later change. Devices without a plugin are not pushed.
+        if not self.config_manager or not self._push_scheduler:
+            return
+        if not self.is_conf_sent() or self.is_delete_pending():
+            priority = PushConfigScheduler.PRIORITY_HIGH
+        else:
+            priority = PushConfigScheduler.PRIORITY_NORMAL
+        self._push_scheduler.schedule(self.uuid, self.push_config,
+                                      priority, delay)
     # end
 
     def is_valid_ip(self, ip_str):
@@ -335,6 +321,11 @@ class PhysicalRouterDM(DBBaseDM):
         return self.config_sent
     # end is_conf_sent
 
+    def is_delete_pending(self):
+        return self.is_conf_sent() and (not self.vnc_managed or
+                                        not self.bgp_router)
+    # end is_delete_pending
+
     def delete_config(self):
         if self.is_conf_sent() and (not self.is_vnc_managed() or not self.bgp_router):
             if not self.config_manager:
@@ -346,7 +337,7 @@ class PhysicalRouterDM(DBBaseDM):
                 # failed commit: set repush interval upto max value
                 self.config_repush_interval = min([2 * self.config_repush_interval,
                                                    PushConfigState.get_repush_max_interval()])
-                self.block_and_set_config_state(self.config_repush_interval)
+                self.set_config_state(self.config_repush_interval)
                 return True
             # succesful commit: reset repush interval
             self.config_repush_interval = PushConfigState.get_repush_interval()
@@ -449,13 +440,15 @@ class PhysicalRouterDM(DBBaseDM):
             # failed commit: set repush interval upto max value
             self.config_repush_interval = min([2 * self.config_repush_interval,
                                                PushConfigState.get_repush_max_interval()])
-            self.block_and_set_config_state(self.config_repush_interval)
+            self.set_config_state(self.config_repush_interval)
         else:
             # successful commit: reset repush interval to base
             self.config_repush_interval = PushConfigState.get_repush_interval()
             if PushConfigState.get_push_delay_enable():
-                # sleep, delay=compute max delay between two successive commits
-                gevent.sleep(self.get_push_config_interval(config_size))
+                # hold next push, delay=compute max delay between two
+                # successive commits
+                self._push_scheduler.hold(
+                    self.uuid, self.get_push_config_interval(config_size))
     # end push_config
 
     def get_push_config_interval(self, last_config_size):
@@ -500,14 +493,42 @@ class PhysicalRouterDM(DBBaseDM):
                    commit_stats.get('commit_status_message', '')
             pr_trace.total_commits_sent_since_up = \
                    commit_stats.get('total_commits_sent_since_up', 0)
+            pr_trace.total_pushes_skipped = \
+                   commit_stats.get('total_pushes_skipped', 0)
+            pr_trace.total_delta_pushes = \
+                   commit_stats.get('total_delta_pushes', 0)
+            pr_trace.total_full_pushes = \
+                   commit_stats.get('total_full_pushes', 0)
         else:
             pr_trace.netconf_enabled_status = False
 
+        if self._push_scheduler:
+            push_stats = self._push_scheduler.get_stats(self.uuid)
+            pr_trace.push_queue_depth = push_stats['queue_depth']
+            pr_trace.push_max_queue_depth = push_stats['max_queue_depth']
+            pr_trace.push_latency_histogram = push_stats['latency_histogram']
+
         pr_msg = UvePhysicalRouterConfigTrace(
             data=pr_trace, sandesh=DBBaseDM._sandesh)
         pr_msg.send(sandesh=DBBaseDM._sandesh)
     # end uve_send
 
+    @classmethod
+    def push_queue_depth_send(cls, uuid, queue_depth):
+        # refresh the push queue depth in the uve as the device's push is
+        # queued and dequeued, other fields are left as they are
+        pr = cls.get(uuid)
+        if pr is None:
+            return
+        pr_trace = UvePhysicalRouterConfig(
+            name=pr.name, push_queue_depth=queue_depth,
+            push_max_queue_depth=cls._push_scheduler.get_stats(
+                uuid)['max_queue_depth'])
+        pr_msg = UvePhysicalRouterConfigTrace(
+            data=pr_trace, sandesh=DBBaseDM._sandesh)
+        pr_msg.send(sandesh=DBBaseDM._sandesh)
+    # end push_queue_depth_send
+
 # end PhysicalRouterDM
 
 
@@ -46,6 +46,9 @@ class DeviceConf(object):
             'last_commit_duration': '',
             'commit_status_message': '',
             'total_commits_sent_since_up': 0,
+            'total_pushes_skipped': 0,
+            'total_delta_pushes': 0,
+            'total_full_pushes': 0,
         }
         self.device_connect()
     # end __init__
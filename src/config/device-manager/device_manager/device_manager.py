@@ -45,6 +45,7 @@ from db import DBBaseDM, BgpRouterDM, PhysicalRouterDM, PhysicalInterfaceDM,\
     GlobalVRouterConfigDM, FloatingIpDM, InstanceIpDM, DMCassandraDB, PortTupleDM
 from dm_amqp import DMAmqpHandle
 from dm_utils import PushConfigState
+from dm_utils import PushConfigScheduler
 from device_conf import DeviceConf
 from cfgm_common.dependency_tracker import DependencyTracker
 from cfgm_common import vnc_cgitb
@@ -204,6 +205,10 @@ class DeviceManager(object):
         self._object_db = DMCassandraDB.get_instance(self, _zookeeper_client)
         DBBaseDM.init(self, self.logger, self._object_db)
         DBBaseDM._sandesh = self.logger._sandesh
+        PhysicalRouterDM._push_scheduler = PushConfigScheduler(
+            self.logger, int(self._args.push_workers),
+            float(self._args.max_push_rate),
+            PhysicalRouterDM.push_queue_depth_send)
 
         for obj in GlobalSystemConfigDM.list_obj():
             GlobalSystemConfigDM.locate(obj['uuid'], obj)
@@ -293,6 +298,9 @@ class DeviceManager(object):
         if not inst:
             return
         inst._vnc_amqp.close()
+        if PhysicalRouterDM._push_scheduler:
+            PhysicalRouterDM._push_scheduler.close()
+            PhysicalRouterDM._push_scheduler = None
         for obj_cls in DBBaseDM.get_obj_type_map().values():
             obj_cls.reset()
         DBBase.clear()
@@ -353,6 +361,8 @@ def parse_args(args_str):
                          --push_delay_per_kb 0.01
                          --push_delay_max 100
                          --push_delay_enable True
+                         --push_workers 10
+                         --max_push_rate 0
                          [--reset_config]
     '''
 
@@ -393,11 +403,15 @@ def parse_args(args_str):
         'push_delay_per_kb': '0.01',
         'push_delay_max': '100',
         'push_delay_enable': True,
+        'push_workers': 10,
+        'max_push_rate': 0,
         'rabbit_use_ssl': False,
         'kombu_ssl_version': '',
         'kombu_ssl_keyfile': '',
         'kombu_ssl_certfile': '',
         'kombu_ssl_ca_certs': '',
+        'notification_batch_window': 0,
+        'notification_batch_max': 1000,
     }
     defaults.update(SandeshConfig.get_default_options(['DEFAULTS']))
     secopts = {
@@ -506,10 +520,20 @@ def parse_args(args_str):
                         help="max time delay between two successful commits")
     parser.add_argument("--push_delay_enable",
                         help="enable delay between two successful commits")
+    parser.add_argument("--push_workers", type=int,
+                        help="max number of devices being pushed at once")
+    parser.add_argument("--max_push_rate", type=float,
+                        help="max config pushes started per second across "
+                             "all devices, 0 for no limit")
     parser.add_argument("--cassandra_user",
                         help="Cassandra user name")
     parser.add_argument("--cassandra_password",
                         help="Cassandra password")
+    parser.add_argument("--notification_batch_window", type=float,
+                        help="Seconds to collect config notifications into "
+                             "one batch, 0 handles them one by one")
+    parser.add_argument("--notification_batch_max", type=int,
+                        help="Max config notifications in one batch")
     SandeshConfig.add_parser_arguments(parser)
     args = parser.parse_args(remaining_argv)
     if type(args.cassandra_server_list) is str:
@@ -6,7 +6,12 @@
 This file contains  utility methods used by device manager module
 """
 
+import time
+import traceback
+import gevent
+from gevent.event import Event
 from netaddr import IPNetwork
+from cfgm_common import vnc_greenlets
 
 class PushConfigState(object):
     PUSH_STATE_INIT = 0
@@ -70,6 +75,174 @@ class PushConfigState(object):
 
 # end PushConfigState
 
+class PushConfigScheduler(object):
+    """Runs config pushes of all devices from a bounded pool of workers
+
+    Pending pushes are coalesced per device, a device is never pushed by
+    two workers at once, high priority pushes go first and pushes are
+    started at most max_push_rate times per second. queue_depth_cb, if
+    given, is called with the device key and the queue depth whenever a
+    push of the device is queued or taken off the queue.
+    """
+    PRIORITY_HIGH = 0
+    PRIORITY_NORMAL = 1
+    # upper bounds in seconds of the push latency histogram buckets
+    LATENCY_BUCKETS = [1, 5, 15, 60, 300]
+
+    def __init__(self, logger, workers=10, max_push_rate=0,
+                 queue_depth_cb=None):
+        self._logger = logger
+        self._queue_depth_cb = queue_depth_cb
+        # key -> [priority, not_before, queued_at, callback]
+        self._pending = {}
+        self._running = set()
+        self._removed = set()
+        self._hold_until = {}
+        self._latency = {}
+        self._max_queue_depth = 0
+        self._push_interval = 1.0 / max_push_rate if max_push_rate else 0
+        self._next_push_time = 0
+        self._wakeup = Event()
+        self._workers = [vnc_greenlets.VncGreenlet("VNC Device Manager",
+                                                   self._worker)
+                         for _ in range(max(workers, 1))]
+    # end __init__
+
+    def schedule(self, key, callback, priority=PRIORITY_NORMAL, delay=0):
+        now = time.time()
+        not_before = max(now + delay, self._hold_until.get(key, 0))
+        entry = self._pending.get(key)
+        if entry is None:
+            self._pending[key] = [priority, not_before, now, callback]
+            self._max_queue_depth = max(self._max_queue_depth,
+                                        len(self._pending))
+            self._queue_depth_changed(key)
+        else:
+            entry[0] = min(entry[0], priority)
+            entry[1] = min(entry[1], not_before)
+            entry[3] = callback
+        self._wakeup.set()
+    # end schedule
+
+    def hold(self, key, delay):
+        # do not start another push of this device for delay seconds
+        self._hold_until[key] = time.time() + delay
+    # end hold
+
+    def remove(self, key):
+        if key in self._running:
+            self._removed.add(key)
+        self._pending.pop(key, None)
+        self._hold_until.pop(key, None)
+        self._latency.pop(key, None)
+    # end remove
+
+    def queue_depth(self):
+        return len(self._pending)
+    # end queue_depth
+
+    def get_stats(self, key):
+        return {
+            'queue_depth': len(self._pending),
+            'max_queue_depth': self._max_queue_depth,
+            'latency_histogram': dict(self._latency.get(key, {})),
+        }
+    # end get_stats
+
+    def _queue_depth_changed(self, key):
+        if not self._queue_depth_cb:
+            return
+        try:
+            self._queue_depth_cb(key, len(self._pending))
+        except Exception as e:
+            tb = traceback.format_exc()
+            self._logger.error("Exception: " + str(e) + tb)
+    # end _queue_depth_changed
+
+    def _record_latency(self, key, latency):
+        for bound in self.LATENCY_BUCKETS:
+            if latency < bound:
+                bucket = '<%ds' % bound
+                break
+        else:
+            bucket = '>=%ds' % self.LATENCY_BUCKETS[-1]
+        histogram = self._latency.setdefault(key, {})
+        histogram[bucket] = histogram.get(bucket, 0) + 1
+    # end _record_latency
+
+    def _get_ready(self):
+        # pick the ready entry with the best priority, oldest first, and
+        # return the time until the next entry gets ready otherwise
+        now = time.time()
+        best = None
+        wait = None
+        for key, entry in self._pending.iteritems():
+            if key in self._running:
+                continue
+            if entry[1] > now:
+                if wait is None or entry[1] - now < wait:
+                    wait = entry[1] - now
+                continue
+            if best is None or (entry[0], entry[2]) < \
+                    (self._pending[best][0], self._pending[best][2]):
+                best = key
+        return best, wait
+    # end _get_ready
+
+    def _wait_ready(self):
+        while True:
+            key, wait = self._get_ready()
+            if key is not None:
+                return
+            self._wakeup.clear()
+            self._wakeup.wait(wait)
+    # end _wait_ready
+
+    def _wait_push_slot(self):
+        if not self._push_interval:
+            return
+        now = time.time()
+        start = max(now, self._next_push_time)
+        self._next_push_time = start + self._push_interval
+        if start > now:
+            gevent.sleep(start - now)
+    # end _wait_push_slot
+
+    def _worker(self):
+        while True:
+            self._wait_ready()
+            self._wait_push_slot()
+            key, _ = self._get_ready()
+            if key is None:
+                continue
+            _, _, queued_at, callback = self._pending.pop(key)
+            self._running.add(key)
+            self._queue_depth_changed(key)
+            try:
+                callback()
+            except Exception as e:
+                tb = traceback.format_exc()
+                self._logger.error("Exception: " + str(e) + tb)
+            finally:
+                self._running.discard(key)
+                if key in self._removed:
+                    self._removed.discard(key)
+                else:
+                    self._record_latency(key, time.time() - queued_at)
+                if key in self._pending:
+                    # coalesced changes that arrived while pushing
+                    entry = self._pending[key]
+                    entry[1] = max(entry[1], self._hold_until.get(key, 0))
+                    self._wakeup.set()
+    # end _worker
+
+    def close(self):
+        gevent.killall(self._workers)
+        self._workers = []
+        self._pending = {}
+    # end close
+# end PushConfigScheduler
+
 class DMUtils(object):
 
     MAX_VRF_NAME_LENGTH = 127
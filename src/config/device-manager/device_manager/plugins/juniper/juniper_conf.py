@@ -10,6 +10,7 @@ from ncclient import manager
 from ncclient.xml_ import new_ele
 import time
 import datetime
+import hashlib
 from cStringIO import StringIO
 from dm_utils import DMUtils
 from device_conf import DeviceConf
@@ -31,6 +32,18 @@ class JuniperConf(DeviceConf):
         'inet6-vpn': FamilyInet6Vpn(unicast=''),
         'e-vpn': FamilyEvpn(signaling='')
     }
+    # sections of the __contrail__ group, compared one by one with the last
+    # committed config to only send the ones that changed
+    _GROUP_SECTIONS = [
+        'routing_instances',
+        'interfaces',
+        'services',
+        'policy_options',
+        'firewall',
+        'forwarding_options',
+        'routing_options',
+        'protocols',
+    ]
 
     @classmethod
     def register(cls, plugin_info):
@@ -45,6 +58,9 @@ class JuniperConf(DeviceConf):
         self.management_ip = self.physical_router.management_ip
         self.timeout = 10
         self.push_config_state = PushConfigState.PUSH_STATE_INIT
+        # digest and class of each group section in the last committed
+        # config, None if the device config is not known
+        self._committed_sections = None
         super(JuniperConf, self).__init__()
     # end __init__
 
@@ -53,6 +69,7 @@ class JuniperConf(DeviceConf):
             return
         self.user_creds = self.physical_router.user_credentials
         self.management_ip = self.physical_router.management_ip
+        self._committed_sections = None
         if self.is_connected():
             self.device_disconnect()
             self.device_connect()
@@ -94,6 +111,7 @@ class JuniperConf(DeviceConf):
     def device_disconnect(self):
         if self._nc_manager and self._nc_manager.connected:
             self._nc_manager = None
+        self._committed_sections = None
     # end device_disconnect
 
     def is_connected(self):
@@ -117,15 +135,68 @@ class JuniperConf(DeviceConf):
         self.external_peers = {}
     # ene initialize
 
+    def _get_group_sections(self, groups):
+        sections = {}
+        for name in self._GROUP_SECTIONS:
+            section = getattr(groups, 'get_' + name)()
+            if section is None:
+                continue
+            xml_data = StringIO()
+            section.export_xml(xml_data, 1)
+            sections[name] = (hashlib.md5(xml_data.getvalue()).hexdigest(),
+                              section.__class__)
+        return sections
+    # end _get_group_sections
+
+    def _build_delta_conf(self, groups, sections):
+        # replace the sections that changed since the last commit and
+        # delete the ones that are gone, leaving the others untouched
+        delta_groups = Groups()
+        delta_groups.set_comment(groups.get_comment())
+        for name in self._GROUP_SECTIONS:
+            new_section = sections.get(name)
+            old_section = self._committed_sections.get(name)
+            if new_section is not None:
+                if old_section is not None and \
+                        old_section[0] == new_section[0]:
+                    continue
+                section = getattr(groups, 'get_' + name)()
+                section.set_operation('replace')
+            elif old_section is not None:
+                section = old_section[1]()
+                section.set_operation('delete')
+            else:
+                continue
+            getattr(delta_groups, 'set_' + name)(section)
+        return self.build_conf(delta_groups, operation=None)
+    # end _build_delta_conf
+
     def device_send(self, conf, default_operation="merge",
                      operation="replace"):
+        sections = None
+        if operation == "replace":
+            groups = conf.get_configuration().get_groups()
+            sections = self._get_group_sections(groups)
+            if sections == self._committed_sections:
+                # device already has this config
+                self.commit_stats['total_pushes_skipped'] += 1
+                self.push_config_state = PushConfigState.PUSH_STATE_SUCCESS
+                return 0
+            if self._committed_sections is not None:
+                conf = self._build_delta_conf(groups, sections)
+                self.commit_stats['total_delta_pushes'] += 1
+            else:
+                self.commit_stats['total_full_pushes'] += 1
+        self._committed_sections = None
         config_str = self.serialize(conf)
         self.push_config_state = PushConfigState.PUSH_STATE_INIT
         start_time = None
         config_size = 0
         try:
             self.device_connect()
-            self._logger.info("\nsend netconf message: %s\n" % config_str)
+            self._logger.info("Router %s: send netconf message of %d bytes" %
+                              (self.management_ip, len(config_str)))
+            self._logger.debug("\nsend netconf message: %s\n" % config_str)
             config_size = len(config_str)
             self._nc_manager.edit_config(
                     target='candidate', config=config_str,
@@ -142,6 +213,7 @@ class JuniperConf(DeviceConf):
             self.commit_stats['last_commit_duration'] = str(
                     end_time - start_time)
             self.push_config_state = PushConfigState.PUSH_STATE_SUCCESS
+            self._committed_sections = sections
         except Exception as e:
             self._logger.error("Router %s: %s" % (self.management_ip,
                                                       e.message))
@@ -225,7 +297,8 @@ class JuniperConf(DeviceConf):
     def build_conf(self, groups, operation='replace'):
         groups.set_name("__contrail__")
         configuraion = Configuration(groups=groups)
-        groups.set_operation(operation)
+        if operation:
+            groups.set_operation(operation)
         apply_groups = ApplyGroups(name="__contrail__")
         configuraion.set_apply_groups(apply_groups)
         if operation == "delete":
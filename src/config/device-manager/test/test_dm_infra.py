@@ -14,7 +14,9 @@ from gevent import monkey
 monkey.patch_all()
 from device_manager.db import DMCassandraDB
 from device_manager.db import DBBaseDM
+from device_manager.db import PhysicalRouterDM
 from device_manager.device_manager import DeviceManager
+from device_manager.juniper_conf import JuniperConf
 from test_common import *
 from test_dm_common import *
 from test_case import DMTestCase
@@ -207,5 +209,94 @@ class TestInfraDM(TestCommonDM):
         self.delete_routers(bgp_router, pr)
         self.wait_for_routers_delete(bgp_router_fq, pr_fq)
 
+    # pending pushes are coalesced per device, high priority ones go first
+    def test_dm_push_scheduler(self):
+        pushed = []
+        depths = []
+        scheduler = PushConfigScheduler(
+            None, workers=1,
+            queue_depth_cb=lambda key, depth: depths.append((key, depth)))
+        for key, priority in [('pr1', PushConfigScheduler.PRIORITY_NORMAL),
+                              ('pr2', PushConfigScheduler.PRIORITY_NORMAL),
+                              ('pr1', PushConfigScheduler.PRIORITY_NORMAL),
+                              ('pr3', PushConfigScheduler.PRIORITY_HIGH)]:
+            scheduler.schedule(key, lambda key=key: pushed.append(key),
+                               priority)
+        self.assertEqual(scheduler.queue_depth(), 3)
+        gevent.sleep(0.1)
+        self.assertEqual(pushed, ['pr3', 'pr1', 'pr2'])
+        # queue depth reported on every queue and dequeue
+        self.assertEqual(depths, [('pr1', 1), ('pr2', 2), ('pr3', 3),
+                                  ('pr3', 2), ('pr1', 1), ('pr2', 0)])
+        self.assertEqual(scheduler.get_stats('pr1')['latency_histogram'],
+                         {'<1s': 1})
+
+        # held device is not pushed until the hold expires
+        scheduler.hold('pr1', 60)
+        scheduler.schedule('pr1', lambda: pushed.append('pr1'))
+        gevent.sleep(0.1)
+        self.assertEqual(len(pushed), 3)
+        self.assertEqual(scheduler.queue_depth(), 1)
+        scheduler.remove('pr1')
+        self.assertEqual(scheduler.queue_depth(), 0)
+        scheduler.close()
+
+    # devices without a plugin are never queued for a push
+    def test_dm_push_scheduler_no_plugin(self):
+        pr = PhysicalRouterDM.__new__(PhysicalRouterDM)
+        pr.uuid = 'pr-no-plugin'
+        pr.config_manager = None
+        orig_scheduler = PhysicalRouterDM._push_scheduler
+        scheduler = PushConfigScheduler(None, workers=1)
+        try:
+            PhysicalRouterDM._push_scheduler = scheduler
+            pr.set_config_state()
+            self.assertEqual(scheduler.queue_depth(), 0)
+            PhysicalRouterDM._push_scheduler = None
+            pr.config_manager = object()
+            pr.set_config_state()
+        finally:
+            PhysicalRouterDM._push_scheduler = orig_scheduler
+            scheduler.close()
+
+    # unchanged config should not be pushed again, changed config should
+    # only carry the modified group sections
+    def test_dm_config_push_skip(self):
+        bgp_router, pr = self.create_router('router1' + self.id(), '1.1.1.1',
+                                                          product=self.product)
+        self.check_if_xml_is_generated()
+        pr_config = FakeDeviceConnect.params.get("pr_config")
+        groups = FakeDeviceConnect.params.get("config")
+        stats = pr_config.get_commit_stats()
+
+        conf = pr_config.build_conf(groups, "replace")
+        self.assertTrue(JuniperConf.device_send(pr_config, conf) > 0)
+        self.assertEqual(stats['total_full_pushes'], 1)
+        full_config = pr_config._nc_manager.configs[-1]
+
+        conf = pr_config.build_conf(groups, "replace")
+        self.assertEqual(JuniperConf.device_send(pr_config, conf), 0)
+        self.assertEqual(stats['total_pushes_skipped'], 1)
+        self.assertFalse(pr_config.retry())
+
+        groups.set_protocols(None)
+        conf = pr_config.build_conf(groups, "replace")
+        self.assertTrue(JuniperConf.device_send(pr_config, conf) > 0)
+        self.assertEqual(stats['total_delta_pushes'], 1)
+        delta_config = pr_config._nc_manager.configs[-1]
+        self.assertIn('<protocols operation="delete"', delta_config)
+        self.assertTrue(len(delta_config) < len(full_config))
+
+        # unknown device config, e.g. after a failed commit, is fully pushed
+        pr_config._committed_sections = None
+        conf = pr_config.build_conf(groups, "replace")
+        JuniperConf.device_send(pr_config, conf)
+        self.assertEqual(stats['total_full_pushes'], 2)
+
+        bgp_router_fq = bgp_router.get_fq_name()
+        pr_fq = pr.get_fq_name()
+        self.delete_routers(bgp_router, pr)
+        self.wait_for_routers_delete(bgp_router_fq, pr_fq)
+
 # end TestInfraDM
 
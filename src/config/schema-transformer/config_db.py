@@ -278,6 +278,8 @@ class VirtualNetworkST(DBBaseST):
         self.acl = None
         self.dynamic_acl = None
         self.acl_rule_count = 0
+        # (policy name, dynamic) -> (policy rules, signature, acl rules)
+        self._acl_fragments = {}
         self.multi_policy_service_chains_enabled = None
         self.update_vnc_obj(obj)
         self.uuid = self.obj.uuid
@@ -350,6 +352,8 @@ class VirtualNetworkST(DBBaseST):
             policy = NetworkPolicyST.get(policy_name)
             if policy:
                 policy.virtual_networks.discard(self.name)
+            self._acl_fragments.pop((policy_name, False), None)
+            self._acl_fragments.pop((policy_name, True), None)
 
         for policy_name in set(self.network_policys.keys()) - old_policies:
             policy = NetworkPolicyST.get(policy_name)
@@ -1124,6 +1128,52 @@ class VirtualNetworkST(DBBaseST):
         return result_acl_rule_list
     # end policy_to_acl_rule
 
+    @staticmethod
+    def _acl_fragment_signature(policy):
+        # acl rules of a policy only depend on its rules and on the networks
+        # of the policies it refers to, unless it applies services or
+        # mirroring which also update other objects. Returns None if the
+        # acl rules of the policy must not be cached.
+        for prule in policy.rules:
+            action = prule.action_list
+            if action is None:
+                continue
+            if action.apply_service or (action.mirror_to and
+                                        action.mirror_to.analyzer_name):
+                return None
+        signature = []
+        for policy_name in sorted(policy.referred_policies):
+            referred_policy = NetworkPolicyST.get(policy_name)
+            if referred_policy is None:
+                return None
+            signature.append((policy_name,
+                              sorted(referred_policy.virtual_networks)))
+        return signature
+    # end _acl_fragment_signature
+
+    def policy_to_acl_rule_lists(self, policy, dynamic):
+        # generates the acl rule list of each rule of the policy, reusing
+        # the rules of the previous evaluation if the policy did not change
+        cache_key = (policy.name, dynamic)
+        signature = self._acl_fragment_signature(policy)
+        cached = self._acl_fragments.pop(cache_key, None)
+        if (signature is not None and cached is not None and
+                cached[0] is policy.rules and cached[1] == signature):
+            self._acl_fragments[cache_key] = cached
+            for acl_rules in cached[2]:
+                yield AclRuleListST(list(acl_rules), dynamic)
+            return
+
+        fragments = []
+        for prule in policy.rules:
+            acl_rule_list = self.policy_to_acl_rule(prule, dynamic)
+            fragments.append(list(acl_rule_list.get_list()))
+            yield acl_rule_list
+        if signature is not None:
+            self._acl_fragments[cache_key] = (policy.rules, signature,
+                                              fragments)
+    # end policy_to_acl_rule_lists
+
     def add_acl_rule(self, sa, sp, da, dp, proto, rule_uuid, action, direction,
                      service_ri=None):
         action_list = copy.deepcopy(action)
@@ -1165,24 +1215,27 @@ class VirtualNetworkST(DBBaseST):
 
         static_acl_entries = None
         dynamic_acl_entries = None
+        # rules of each acl, indexed once for all the policy rules
+        static_rule_list = AclRuleListST(dynamic=False)
+        dynamic_rule_list = AclRuleListST(dynamic=True)
         for policy_name in self.network_policys:
             timer = self.network_policys[policy_name].get_timer()
             if timer is None:
                 if static_acl_entries is None:
                     static_acl_entries = AclEntriesType(dynamic=False)
-                acl_entries = static_acl_entries
+                rule_list = static_rule_list
                 dynamic = False
             else:
                 if dynamic_acl_entries is None:
                     dynamic_acl_entries = AclEntriesType(dynamic=True)
-                acl_entries = dynamic_acl_entries
+                rule_list = dynamic_rule_list
                 dynamic = True
             policy = NetworkPolicyST.get(policy_name)
             if policy is None:
                 continue
-            for prule in policy.rules:
-                acl_rule_list = self.policy_to_acl_rule(prule, dynamic)
-                acl_rule_list.update_acl_entries(acl_entries)
+            for acl_rule_list in self.policy_to_acl_rule_lists(policy,
+                                                               dynamic):
+                acl_rule_list.update_rule_list(rule_list)
                 for arule in acl_rule_list.get_list():
                     match = arule.get_match_condition()
                     action = arule.get_action_list()
@@ -1227,6 +1280,10 @@ class VirtualNetworkST(DBBaseST):
                 # end for acl_rule_list
             # end for policy_rule_entries.policy_rule
         # end for self.network_policys
+        if static_acl_entries is not None:
+            static_acl_entries.set_acl_rule(static_rule_list.get_list())
+        if dynamic_acl_entries is not None:
+            dynamic_acl_entries.set_acl_rule(dynamic_rule_list.get_list())
 
         if static_acl_entries is not None:
             # if a static acl is created, then for each rule, we need to
@@ -2976,10 +3033,15 @@ class ServiceChain(DBBaseST):
 
 
 class AclRuleListST(object):
+    # index key for addresses matched by subnet rather than virtual network
+    _SUBNET_KEY = ('subnet',)
 
     def __init__(self, rule_list=None, dynamic=False):
         self._list = rule_list or []
         self.dynamic = dynamic
+        # (protocol, src key, dst key) -> [(rule, compiled match)]
+        self._index = None
+        self._index_len = 0
     # end __init__
 
     def get_list(self):
@@ -2987,63 +3049,122 @@ class AclRuleListST(object):
     # end get_list
 
     def append(self, rule):
-        if not self._rule_is_subset(rule):
+        match = self._compile_match(rule.match_condition)
+        if not self._rule_is_subset(rule, match):
             self._list.append(rule)
+            self._add_to_index(rule, match)
             return True
         return False
     # end append
 
-    # for types that have start and end integer
+    @classmethod
+    def _address_key(cls, addr):
+        subnets = addr.subnet_list or []
+        if addr.subnet:
+            subnets = subnets + [addr.subnet]
+        if not subnets:
+            return addr.virtual_network, None
+        ranges = []
+        for s in subnets:
+            net = IPNetwork('%s/%d' % (s.ip_prefix, s.ip_prefix_len))
+            ranges.append((net.version, net.first, net.last))
+        return cls._SUBNET_KEY, ranges
+    # end _address_key
+
+    @classmethod
+    def _compile_match(cls, match):
+        src_key, src_ranges = cls._address_key(match.src_address)
+        dst_key, dst_ranges = cls._address_key(match.dst_address)
+        return {
+            'key': (match.protocol, src_key, dst_key),
+            'src_port': (match.src_port.start_port, match.src_port.end_port),
+            'dst_port': (match.dst_port.start_port, match.dst_port.end_port),
+            'src_ranges': src_ranges,
+            'dst_ranges': dst_ranges,
+        }
+    # end _compile_match
+
+    def _get_index(self):
+        # the list is shared with the caller, rebuild if it was modified
+        if self._index is None or self._index_len != len(self._list):
+            self._index = {}
+            self._index_len = 0
+            for rule in self._list:
+                self._add_to_index(
+                    rule, self._compile_match(rule.match_condition))
+        return self._index
+    # end _get_index
+
+    def _add_to_index(self, rule, match):
+        if self._index is None:
+            return
+        self._index.setdefault(match['key'], []).append((rule, match))
+        self._index_len += 1
+    # end _add_to_index
+
+    @classmethod
+    def _candidate_keys(cls, match):
+        # only rules with these keys can contain a rule with this match
+        protocol, src_key, dst_key = match['key']
+        src_keys = set([src_key, 'any'])
+        if src_key is cls._SUBNET_KEY:
+            src_keys = [src_key]
+        dst_keys = set([dst_key, 'any'])
+        if dst_key is cls._SUBNET_KEY:
+            dst_keys = [dst_key]
+        return set(itertools.product(set([protocol, 'any']),
+                                     src_keys, dst_keys))
+    # end _candidate_keys
+
+    # for (start, end) port ranges
     @staticmethod
     def _port_is_subset(lhs, rhs):
-        return (lhs.start_port >= rhs.start_port and
-                (rhs.end_port == -1 or lhs.end_port <= rhs.end_port))
+        return lhs[0] >= rhs[0] and (rhs[1] == -1 or lhs[1] <= rhs[1])
 
+    # for (version, first, last) prefix ranges, true if any lhs prefix is
+    # contained in any rhs prefix
     @staticmethod
     def _address_is_subset(lhs, rhs):
-        if not(rhs.subnet or lhs.subnet or lhs.subnet_list or rhs.subnet_list):
-            return rhs.virtual_network in [lhs.virtual_network, 'any']
-        l_subnets = lhs.subnet_list or []
-        if lhs.subnet:
-            l_subnets.append(lhs.subnet)
-        l_subnets = [IPNetwork('%s/%d'%(s.ip_prefix, s.ip_prefix_len))
-                     for s in l_subnets]
-        r_subnets = rhs.subnet_list or []
-        if rhs.subnet:
-            r_subnets.append(rhs.subnet)
-        r_subnets = [IPNetwork('%s/%d'%(s.ip_prefix, s.ip_prefix_len))
-                     for s in r_subnets]
-        for l_subnet in l_subnets:
-            for r_subnet in r_subnets:
-                if l_subnet in r_subnet:
+        if lhs is None:
+            return True
+        for l_version, l_first, l_last in lhs:
+            for r_version, r_first, r_last in rhs:
+                if (l_version == r_version and r_first <= l_first and
+                        l_last <= r_last):
                     return True
-        else:
-            return False
-        return True
-
-
-    def _rule_is_subset(self, rule):
-        for elem in self._list:
-            lhs = rule.match_condition
-            rhs = elem.match_condition
-            if (self._port_is_subset(lhs.src_port, rhs.src_port) and
-                self._port_is_subset(lhs.dst_port, rhs.dst_port) and
-                rhs.protocol in [lhs.protocol, 'any'] and
-                self._address_is_subset(lhs.src_address, rhs.src_address) and
-                self._address_is_subset(lhs.dst_address, rhs.dst_address)):
+        return False
 
+    def _rule_is_subset(self, rule, match):
+        index = self._get_index()
+        for key in self._candidate_keys(match):
+            for elem, elem_match in index.get(key, []):
+                if not (self._port_is_subset(match['src_port'],
+                                             elem_match['src_port']) and
+                        self._port_is_subset(match['dst_port'],
+                                             elem_match['dst_port']) and
+                        self._address_is_subset(match['src_ranges'],
+                                                elem_match['src_ranges']) and
+                        self._address_is_subset(match['dst_ranges'],
+                                                elem_match['dst_ranges'])):
+                    continue
                 if not self.dynamic:
                     return True
                 if (rule.action_list.mirror_to.analyzer_name ==
                         elem.action_list.mirror_to.analyzer_name):
                     return True
-        # end for elem
+            # end for elem
         return False
     # end _rule_is_subset
 
+    def update_rule_list(self, rule_list):
+        # keep the rules not covered by rule_list and add them to it
+        self._list[:] = [rule for rule in self._list if rule_list.append(rule)]
+        self._index = None
+    # end update_rule_list
+
     def update_acl_entries(self, acl_entries):
         old_list = AclRuleListST(acl_entries.get_acl_rule(), self.dynamic)
-        self._list[:] = [rule for rule in self._list if old_list.append(rule)]
+        self.update_rule_list(old_list)
         acl_entries.set_acl_rule(old_list.get_list())
     # end update_acl_entries
 # end AclRuleListST
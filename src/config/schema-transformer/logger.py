@@ -37,6 +37,8 @@ class SchemaTransformerLogger(ConfigServiceLogger):
             self.sandesh_sc_handle_request
         sandesh.StObjectReq.handle_request = \
             self.sandesh_st_object_handle_request
+        sandesh.ReinitStatsReq.handle_request = \
+            self.sandesh_reinit_stats_handle_request
 
     def sandesh_ri_build(self, vn_name, ri_name):
         vn = VirtualNetworkST.get(vn_name)
@@ -124,3 +126,15 @@ class SchemaTransformerLogger(ConfigServiceLogger):
                     st_resp.objects.append(obj.handle_st_object_req())
         st_resp.response(req.context())
     # end sandesh_st_object_handle_request
+
+    def sandesh_reinit_stats_handle_request(self, req):
+        manager = DBBaseST._manager
+        phases = getattr(manager, 'reinit_phases', None) or []
+        resp = sandesh.ReinitStatsResp(phases=[
+            sandesh.ReinitPhase(name=phase['name'],
+                                object_count=phase['object_count'],
+                                elapsed_secs=phase['elapsed_secs'])
+            for phase in phases])
+        resp.total_secs = getattr(manager, 'reinit_secs', None)
+        resp.response(req.context())
+    # end sandesh_reinit_stats_handle_request
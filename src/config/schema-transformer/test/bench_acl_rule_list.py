@@ -0,0 +1,133 @@
+#
+# Copyright (c) 2017 Juniper Networks, Inc. All rights reserved.
+#
+"""Microbenchmark of AclRuleListST rule deduplication on large policies
+
+Usage: python bench_acl_rule_list.py [--rules N] [--networks N]
+                                     [--subnet-ratio R]
+
+Builds a synthetic policy with a mix of virtual network and subnet rules
+and appends its ACL rules to an AclRuleListST, the way
+VirtualNetworkST.evaluate does, comparing with the previous pairwise scan.
+"""
+import argparse
+import random
+import time
+
+from netaddr import IPNetwork
+from vnc_api.vnc_api import (AclRuleType, MatchConditionType, AddressType,
+                             SubnetType, PortType, ActionListType)
+
+try:
+    from config_db import AclRuleListST
+except ImportError:
+    from schema_transformer.config_db import AclRuleListST
+
+
+class PairwiseAclRuleList(object):
+    # rule dedup used by AclRuleListST before it was indexed
+
+    def __init__(self, rule_list=None, dynamic=False):
+        self._list = rule_list or []
+        self.dynamic = dynamic
+
+    def get_list(self):
+        return self._list
+
+    def append(self, rule):
+        if not self._rule_is_subset(rule):
+            self._list.append(rule)
+            return True
+        return False
+
+    @staticmethod
+    def _port_is_subset(lhs, rhs):
+        return (lhs.start_port >= rhs.start_port and
+                (rhs.end_port == -1 or lhs.end_port <= rhs.end_port))
+
+    @staticmethod
+    def _address_is_subset(lhs, rhs):
+        if not(rhs.subnet or lhs.subnet or lhs.subnet_list or
+               rhs.subnet_list):
+            return rhs.virtual_network in [lhs.virtual_network, 'any']
+        l_subnets = list(lhs.subnet_list or [])
+        if lhs.subnet:
+            l_subnets.append(lhs.subnet)
+        l_subnets = [IPNetwork('%s/%d' % (s.ip_prefix, s.ip_prefix_len))
+                     for s in l_subnets]
+        r_subnets = list(rhs.subnet_list or [])
+        if rhs.subnet:
+            r_subnets.append(rhs.subnet)
+        r_subnets = [IPNetwork('%s/%d' % (s.ip_prefix, s.ip_prefix_len))
+                     for s in r_subnets]
+        for l_subnet in l_subnets:
+            for r_subnet in r_subnets:
+                if l_subnet in r_subnet:
+                    return True
+        return False
+
+    def _rule_is_subset(self, rule):
+        for elem in self._list:
+            lhs = rule.match_condition
+            rhs = elem.match_condition
+            if (self._port_is_subset(lhs.src_port, rhs.src_port) and
+                    self._port_is_subset(lhs.dst_port, rhs.dst_port) and
+                    rhs.protocol in [lhs.protocol, 'any'] and
+                    self._address_is_subset(lhs.src_address,
+                                            rhs.src_address) and
+                    self._address_is_subset(lhs.dst_address,
+                                            rhs.dst_address)):
+                if not self.dynamic:
+                    return True
+                if (rule.action_list.mirror_to.analyzer_name ==
+                        elem.action_list.mirror_to.analyzer_name):
+                    return True
+        return False
+# end class PairwiseAclRuleList
+
+
+def _generate_rules(args):
+    rand = random.Random(0)
+    networks = ['default-domain:bench:vn%d' % i for i in range(args.networks)]
+
+    def address():
+        if rand.random() < args.subnet_ratio:
+            return AddressType(subnet=SubnetType(
+                '10.%d.%d.0' % (rand.randint(0, 255), rand.randint(0, 255)),
+                rand.choice([16, 24])))
+        return AddressType(virtual_network=rand.choice(networks))
+
+    rules = []
+    for _ in xrange(args.rules):
+        port = rand.randint(1, 1024)
+        match = MatchConditionType(
+            rand.choice(['6', '17', '1', 'any']), address(), PortType(),
+            address(), PortType(port, port + rand.choice([0, 10, 100])))
+        rules.append(AclRuleType(match, ActionListType('pass')))
+    return rules
+
+
+def run(cls, rules):
+    start = time.time()
+    acl_list = cls()
+    for rule in rules:
+        acl_list.append(rule)
+    return time.time() - start, len(acl_list.get_list())
+
+
+def main(args_str=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rules', type=int, default=5000)
+    parser.add_argument('--networks', type=int, default=200)
+    parser.add_argument('--subnet-ratio', type=float, default=0.2)
+    args = parser.parse_args(args_str)
+
+    rules = _generate_rules(args)
+    print '%-24s %10s %10s' % ('implementation', 'time(s)', 'rules')
+    for cls in (PairwiseAclRuleList, AclRuleListST):
+        elapsed, count = run(cls, rules)
+        print '%-24s %10.3f %10d' % (cls.__name__, elapsed, count)
+# end main
+
+if __name__ == '__main__':
+    main()
@@ -12,7 +12,7 @@ from vnc_api.vnc_api import (VirtualNetwork, SequenceType,
         VirtualNetworkPolicyType, NoIdError, SecurityLoggingObjectRuleEntryType,
         SecurityLoggingObjectRuleListType, SecurityLoggingObject, SecurityGroup,
         PolicyRuleType, AddressType, SubnetType, PortType, PolicyEntriesType,
-        ActionListType)
+        ActionListType, AclRuleType, MatchConditionType, AclEntriesType)
 
 from test_case import STTestCase, retries, VerifyCommon
 sys.path.append("../common/tests")
@@ -28,6 +28,7 @@ try:
 except ImportError:
     from schema_transformer import config_db
 
+import unittest
 import uuid
 
 class VerifyPolicy(VerifyCommon):
@@ -663,6 +664,55 @@ class TestPolicy(STTestCase, VerifyPolicy):
         self.check_vn_is_deleted(uuid=vn2.uuid)
     # end test_policy_with_cidr_and_vn
 
+    def test_reinit_stats(self):
+        vn_name = self.id() + 'vn'
+        vn = self.create_virtual_network(vn_name, "10.1.1.0/24")
+        self.check_vn_ri_state(fq_name=self.get_ri_name(vn))
+
+        DBBaseST._list_chunk_size = 1
+        try:
+            test_common.reinit_schema_transformer()
+        finally:
+            DBBaseST._list_chunk_size = 1000
+        self.assertIsNotNone(config_db.VirtualNetworkST.get(
+            vn.get_fq_name_str()))
+        phases = dict((phase['name'], phase) for phase in
+                      to_bgp.transformer.reinit_phases)
+        self.assertGreaterEqual(phases['virtual_network']['object_count'], 1)
+        self.assertGreaterEqual(
+            phases['routing_instance']['object_count'], 1)
+        self.assertIsNotNone(to_bgp.transformer.reinit_secs)
+
+        self._vnc_lib.virtual_network_delete(fq_name=vn.get_fq_name())
+        self.check_vn_is_deleted(uuid=vn.uuid)
+    # end test_reinit_stats
+
+    def test_reinit_object_deleted_after_listing(self):
+        vn_name = self.id() + 'vn'
+        vn = self.create_virtual_network(vn_name, "10.1.1.0/24")
+        self.check_vn_ri_state(fq_name=self.get_ri_name(vn))
+
+        # object deleted between its listing and its read
+        def list_deleted_vn(orig_method, obj_type, *args, **kwargs):
+            ok, result = orig_method(obj_type, *args, **kwargs)
+            if ok and obj_type == 'virtual_network':
+                result = list(result) + [(['deleted-vn'], str(uuid.uuid4()))]
+            return ok, result
+        DBBaseST._list_chunk_size = 1
+        try:
+            with test_common.patch(DBBaseST._object_db, 'object_list',
+                                   list_deleted_vn):
+                test_common.reinit_schema_transformer()
+        finally:
+            DBBaseST._list_chunk_size = 1000
+        self.assertIsNotNone(config_db.VirtualNetworkST.get(
+            vn.get_fq_name_str()))
+        self.assertIsNotNone(to_bgp.transformer.reinit_secs)
+
+        self._vnc_lib.virtual_network_delete(fq_name=vn.get_fq_name())
+        self.check_vn_is_deleted(uuid=vn.uuid)
+    # end test_reinit_object_deleted_after_listing
+
     def test_vn_delete(self):
         vn_name = self.id() + 'vn'
         vn = self.create_virtual_network(vn_name, "10.1.1.0/24")
@@ -734,6 +784,62 @@ class TestPolicy(STTestCase, VerifyPolicy):
         self._vnc_lib.virtual_network_delete(fq_name=vn2_obj.get_fq_name())
     # end test_acl_hash_entries
 
+    def test_acl_fragment_cache(self):
+        vn1_name = self.id() + 'vn1'
+        vn2_name = self.id() + 'vn2'
+        vn1_obj = self.create_virtual_network(vn1_name, "10.2.1.0/24")
+        vn2_obj = self.create_virtual_network(vn2_name, "20.2.1.0/24")
+
+        np = self.create_network_policy(vn1_obj, vn2_obj)
+        seq = SequenceType(1, 1)
+        vnp = VirtualNetworkPolicyType(seq)
+        vn1_obj.set_network_policy(np, vnp)
+        vn2_obj.set_network_policy(np, vnp)
+        self._vnc_lib.virtual_network_update(vn1_obj)
+        self._vnc_lib.virtual_network_update(vn2_obj)
+        self.check_ri_ref_present(self.get_ri_name(vn1_obj),
+                                  self.get_ri_name(vn2_obj))
+
+        calls = {'evaluate': 0, 'policy_to_acl_rule': 0}
+        vn_st_cls = config_db.VirtualNetworkST
+        old_evaluate = vn_st_cls.evaluate
+        old_policy_to_acl_rule = vn_st_cls.policy_to_acl_rule
+        def evaluate(vn_st):
+            calls['evaluate'] += 1
+            return old_evaluate(vn_st)
+        def policy_to_acl_rule(vn_st, prule, dynamic):
+            calls['policy_to_acl_rule'] += 1
+            return old_policy_to_acl_rule(vn_st, prule, dynamic)
+        vn_st_cls.evaluate = evaluate
+        vn_st_cls.policy_to_acl_rule = policy_to_acl_rule
+        try:
+            # unchanged policy, acl rules come from the cache
+            vn1_obj.display_name = vn1_name + '-renamed'
+            self._vnc_lib.virtual_network_update(vn1_obj)
+            self.assertTill(lambda: calls['evaluate'] > 0)
+            self.assertEqual(calls['policy_to_acl_rule'], 0)
+
+            # policy rules changed, acl rules are expanded again
+            entries = np.get_network_policy_entries()
+            entries.policy_rule[0].protocol = 'tcp'
+            np.set_network_policy_entries(entries)
+            self._vnc_lib.network_policy_update(np)
+            self.assertTill(lambda: calls['policy_to_acl_rule'] > 0)
+        finally:
+            vn_st_cls.evaluate = old_evaluate
+            vn_st_cls.policy_to_acl_rule = old_policy_to_acl_rule
+        self.check_ri_ref_present(self.get_ri_name(vn1_obj),
+                                  self.get_ri_name(vn2_obj))
+
+        vn1_obj.del_network_policy(np)
+        vn2_obj.del_network_policy(np)
+        self._vnc_lib.virtual_network_update(vn1_obj)
+        self._vnc_lib.virtual_network_update(vn2_obj)
+        self.delete_network_policy(np)
+        self._vnc_lib.virtual_network_delete(fq_name=vn1_obj.get_fq_name())
+        self._vnc_lib.virtual_network_delete(fq_name=vn2_obj.get_fq_name())
+    # end test_acl_fragment_cache
+
 
 class TestCompressPolicy(TestPolicy):
     def setUp(self):
@@ -838,3 +944,43 @@ class TestCompressPolicy(TestPolicy):
 
 
 # end TestPolicy
+
+
+class TestAclRuleList(unittest.TestCase):
+    @staticmethod
+    def _rule(src, dst, protocol='any', dst_port=None):
+        def addr(name):
+            if '/' in name:
+                prefix, prefix_len = name.split('/')
+                return AddressType(subnet=SubnetType(prefix, int(prefix_len)))
+            return AddressType(virtual_network=name)
+        match = MatchConditionType(protocol, addr(src), PortType(),
+                                   addr(dst), dst_port or PortType())
+        return AclRuleType(match, ActionListType('pass'))
+
+    def test_subset_rules_are_skipped(self):
+        acl_list = config_db.AclRuleListST()
+        self.assertTrue(acl_list.append(self._rule('vn1', 'vn2', '6',
+                                                   PortType(80, 80))))
+        self.assertTrue(acl_list.append(self._rule('vn1', '10.1.0.0/16')))
+        self.assertFalse(acl_list.append(self._rule('vn1', 'vn2', '6',
+                                                    PortType(80, 80))))
+        self.assertFalse(acl_list.append(self._rule('vn1', '10.1.2.0/24',
+                                                    '17')))
+        self.assertTrue(acl_list.append(self._rule('vn1', '10.2.0.0/24')))
+        self.assertTrue(acl_list.append(self._rule('vn1', 'vn2')))
+        self.assertTrue(acl_list.append(self._rule('any', 'any')))
+        self.assertFalse(acl_list.append(self._rule('vn3', 'vn4', '6')))
+        self.assertEqual(len(acl_list.get_list()), 5)
+
+    def test_update_acl_entries(self):
+        acl_entries = AclEntriesType(
+            acl_rule=[self._rule('vn1', 'any', '6')])
+        acl_list = config_db.AclRuleListST()
+        acl_list.append(self._rule('vn1', 'vn2', '6'))
+        acl_list.append(self._rule('vn2', 'vn1', '6'))
+        acl_list.update_acl_entries(acl_entries)
+        self.assertEqual(len(acl_list.get_list()), 1)
+        self.assertEqual(len(acl_entries.get_acl_rule()), 2)
+        self.assertEqual(acl_entries.get_acl_rule()[1], acl_list.get_list()[0])
+# end TestAclRuleList
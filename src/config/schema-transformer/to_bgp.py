@@ -159,6 +159,9 @@ class SchemaTransformer(object):
     def __init__(self, st_logger=None, args=None):
         self._args = args
         self._fabric_rt_inst_obj = None
+        # time and number of objects of each reinit phase, for introspect
+        self.reinit_phases = []
+        self.reinit_secs = None
 
         if st_logger is not None:
             self.logger = st_logger
@@ -177,6 +180,7 @@ class SchemaTransformer(object):
             DBBaseST.init(self, self.logger, self._object_db)
             DBBaseST._sandesh = self.logger._sandesh
             DBBaseST._vnc_lib = _vnc_lib
+            DBBaseST._list_chunk_size = self._args.reinit_chunk_size
             ServiceChain.init()
             self.reinit()
             self._vnc_amqp._db_resync_done.set()
@@ -188,14 +192,29 @@ class SchemaTransformer(object):
             raise
     # end __init__
 
+    def _reinit_phase_done(self, name, start_time, object_count=0):
+        elapsed = time.time() - start_time
+        self.reinit_phases.append({'name': name,
+                                   'object_count': object_count,
+                                   'elapsed_secs': elapsed})
+        self.logger.info("Reinit %s: %d objects in %.3f secs" %
+                         (name, object_count, elapsed))
+        return time.time()
+    # end _reinit_phase_done
+
     # Clean up stale objects
     def reinit(self):
+        self.reinit_phases = []
+        reinit_start = phase_start = time.time()
         GlobalSystemConfigST.reinit()
         BgpRouterST.reinit()
         BgpvpnST.reinit()
         LogicalRouterST.reinit()
+        phase_start = self._reinit_phase_done('global', phase_start)
         gevent.sleep(0.001)
+        si_count = 0
         for si in ServiceInstanceST.list_vnc_obj():
+            si_count += 1
             try:
                 si_st = ServiceInstanceST.locate(si.get_fq_name_str(), si)
                 if si_st is None:
@@ -211,15 +230,24 @@ class SchemaTransformer(object):
             except Exception as e:
                 self.logger.error("Error in reinit service instance %s: %s" % (
                     si.get_fq_name_str(), str(e)))
-
-        vn_list = list(VirtualNetworkST.list_vnc_obj())
-        vn_id_list = set([vn.uuid for vn in vn_list])
+        phase_start = self._reinit_phase_done('service_instance',
+                                              phase_start, si_count)
+
+        # only the uuids of networks and security groups are needed to find
+        # stale routing instances and acls, the objects are read in chunks
+        # when they are located below
+        vn_uuids = VirtualNetworkST.list_uuids()
+        vn_id_set = set(vn_uuids)
+        sg_uuids = SecurityGroupST.list_uuids()
+        sg_id_set = set(sg_uuids)
         ri_dict = {}
         service_ri_dict = {}
         ri_deleted = {}
+        ri_count = 0
         for ri in DBBaseST.list_vnc_obj('routing_instance'):
+            ri_count += 1
             delete = False
-            if ri.parent_uuid not in vn_id_list:
+            if ri.parent_uuid not in vn_id_set:
                 delete = True
                 ri_deleted.setdefault(ri.parent_uuid, []).append(ri.uuid)
             else:
@@ -250,20 +278,22 @@ class SchemaTransformer(object):
                         "Error while deleting routing instance %s: %s"%(
                         ri.get_fq_name_str(), str(e)))
         # end for ri
+        phase_start = self._reinit_phase_done('routing_instance',
+                                              phase_start, ri_count)
 
-        sg_list = list(SecurityGroupST.list_vnc_obj())
-        sg_id_list = [sg.uuid for sg in sg_list]
         sg_acl_dict = {}
         vn_acl_dict = {}
+        acl_count = 0
         for acl in DBBaseST.list_vnc_obj('access_control_list', fields=['access_control_list_hash']):
+            acl_count += 1
             delete = False
             if acl.parent_type == 'virtual-network':
-                if acl.parent_uuid in vn_id_list:
+                if acl.parent_uuid in vn_id_set:
                     vn_acl_dict[acl.uuid] = acl
                 else:
                     delete = True
             elif acl.parent_type == 'security-group':
-                if acl.parent_uuid in sg_id_list:
+                if acl.parent_uuid in sg_id_set:
                     sg_acl_dict[acl.uuid] = acl
                 else:
                     delete = True
@@ -279,9 +309,13 @@ class SchemaTransformer(object):
                     self.logger.error("Error while deleting acl %s: %s"%(
                             acl.uuid, str(e)))
         # end for acl
+        phase_start = self._reinit_phase_done('access_control_list',
+                                              phase_start, acl_count)
 
         gevent.sleep(0.001)
-        for sg in sg_list:
+        sg_count = 0
+        for sg in SecurityGroupST.list_vnc_obj(uuids=sg_uuids):
+            sg_count += 1
             try:
                 SecurityGroupST.locate(sg.get_fq_name_str(), sg, sg_acl_dict)
             except Exception as e:
@@ -296,10 +330,16 @@ class SchemaTransformer(object):
             except Exception as e:
                 self.logger.error("Error in updating SG policies %s: %s" % (
                     sg.name, str(e)))
+        phase_start = self._reinit_phase_done('security_group',
+                                              phase_start, sg_count)
 
         gevent.sleep(0.001)
         RouteTargetST.reinit()
-        for vn in vn_list:
+        phase_start = self._reinit_phase_done('route_target', phase_start,
+                                              len(RouteTargetST._dict))
+        vn_count = 0
+        for vn in VirtualNetworkST.list_vnc_obj(uuids=vn_uuids):
+            vn_count += 1
             if vn.uuid in ri_deleted:
                 vn_ri_list = vn.get_routing_instances() or []
                 new_vn_ri_list = [vn_ri for vn_ri in vn_ri_list
@@ -310,6 +350,8 @@ class SchemaTransformer(object):
             except Exception as e:
                 self.logger.error("Error in reinit virtual network %s: %s" % (
                     vn.get_fq_name_str(), str(e)))
+        phase_start = self._reinit_phase_done('virtual_network', phase_start,
+                                              vn_count)
         for ri_name, ri_obj in ri_dict.items():
             try:
                 RoutingInstanceST.locate(ri_name, ri_obj)
@@ -323,6 +365,9 @@ class SchemaTransformer(object):
             except Exception as e:
                 self.logger.error("Error in reinit routing instance %s: %s" % (
                     si_ri_name, str(e)))
+        phase_start = self._reinit_phase_done(
+            'routing_instance_locate', phase_start,
+            len(ri_dict) + len(service_ri_dict))
 
         NetworkPolicyST.reinit()
         gevent.sleep(0.001)
@@ -342,6 +387,7 @@ class SchemaTransformer(object):
         PortTupleST.reinit()
         BgpAsAServiceST.reinit()
         RouteTableST.reinit()
+        phase_start = self._reinit_phase_done('other_objects', phase_start)
 
         # evaluate virtual network objects first because other objects,
         # e.g. vmi, depend on it.
@@ -351,16 +397,25 @@ class SchemaTransformer(object):
             except Exception as e:
                 self.logger.error("Error in reinit evaluate virtual network %s: %s" % (
                     vn_obj.name, str(e)))
+        phase_start = self._reinit_phase_done('evaluate_virtual_network',
+                                              phase_start,
+                                              len(VirtualNetworkST._dict))
+        obj_count = 0
         for cls in DBBaseST.get_obj_type_map().values():
             if cls is VirtualNetworkST:
                 continue
             for obj in cls.values():
+                obj_count += 1
                 try:
                     obj.evaluate()
                 except Exception as e:
                     self.logger.error("Error in reinit evaluate %s %s: %s" % (
                         cls.obj_type, obj.name, str(e)))
+        phase_start = self._reinit_phase_done('evaluate', phase_start,
+                                              obj_count)
         self.process_stale_objects()
+        self._reinit_phase_done('process_stale_objects', phase_start)
+        self.reinit_secs = time.time() - reinit_start
     # end reinit
 
     def cleanup(self):
@@ -455,6 +510,9 @@ def parse_args(args_str):
         'kombu_ssl_keyfile': '',
         'kombu_ssl_certfile': '',
         'kombu_ssl_ca_certs': '',
+        'notification_batch_window': 0,
+        'notification_batch_max': 1000,
+        'reinit_chunk_size': 1000,
         'zk_timeout': 400,
         'logical_routers_enabled': True,
         'acl_direction_comp': False,
@@ -583,6 +641,14 @@ def parse_args(args_str):
                         help="Enabled logical routers")
     parser.add_argument("--acl_direction_comp", type=_bool,
                         help="Acl direction compression")
+    parser.add_argument("--notification_batch_window", type=float,
+                        help="Seconds to collect config notifications into "
+                             "one batch, 0 handles them one by one")
+    parser.add_argument("--notification_batch_max", type=int,
+                        help="Max config notifications in one batch")
+    parser.add_argument("--reinit_chunk_size", type=int,
+                        help="Number of objects read at a time from the "
+                             "database during reinit")
     SandeshConfig.add_parser_arguments(parser)
 
     args = parser.parse_args(remaining_argv)
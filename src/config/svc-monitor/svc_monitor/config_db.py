@@ -12,11 +12,57 @@ from cfgm_common import svc_info
 
 class DBBaseSM(DBBase):
     obj_type = __name__
+    # keys of the objects updated since the last pop_dirty, set to a set()
+    # by the classes the service monitor timer checks for orphans
+    _dirty_keys = None
 
     def evaluate(self):
         # Implement in the derived class
         pass
 
+    @classmethod
+    def reset(cls):
+        super(DBBaseSM, cls).reset()
+        if cls._dirty_keys is not None:
+            cls._dirty_keys = set()
+    # end reset
+
+    def mark_dirty(self):
+        if self._dirty_keys is not None:
+            self._dirty_keys.add(self.get_key())
+    # end mark_dirty
+
+    @classmethod
+    def pop_dirty(cls):
+        # objects updated, or with a ref added or removed, since last call
+        keys = cls._dirty_keys
+        if not keys:
+            return []
+        cls._dirty_keys = set()
+        return [obj for obj in (cls.get(key) for key in keys)
+                if obj is not None]
+    # end pop_dirty
+
+    def add_ref(self, ref_type, ref, attr=None):
+        self.mark_dirty()
+        super(DBBaseSM, self).add_ref(ref_type, ref, attr)
+    # end add_ref
+
+    def delete_ref(self, ref_type, ref):
+        self.mark_dirty()
+        super(DBBaseSM, self).delete_ref(ref_type, ref)
+    # end delete_ref
+
+    def update_single_ref(self, ref_type, obj):
+        self.mark_dirty()
+        return super(DBBaseSM, self).update_single_ref(ref_type, obj)
+    # end update_single_ref
+
+    def update_multiple_refs(self, ref_type, obj):
+        self.mark_dirty()
+        return super(DBBaseSM, self).update_multiple_refs(ref_type, obj)
+    # end update_multiple_refs
+
 class LoadbalancerSM(DBBaseSM):
     _dict = {}
     obj_type = 'loadbalancer'
@@ -389,6 +435,7 @@ class HealthMonitorSM(DBBaseSM):
 class VirtualMachineSM(DBBaseSM):
     _dict = {}
     obj_type = 'virtual_machine'
+    _dirty_keys = set()
 
     def __init__(self, uuid, obj_dict=None):
         self.uuid = uuid
@@ -446,10 +493,13 @@ class VirtualMachineSM(DBBaseSM):
 class VirtualRouterSM(DBBaseSM):
     _dict = {}
     obj_type = 'virtual_router'
+    # running vrouters by number of virtual machines scheduled on them
+    _load_index = {}
 
     def __init__(self, uuid, obj_dict=None):
         self.uuid = uuid
-        self.agent_state = False
+        self._load = None
+        self._agent_state = False
         self.agent_down_count = 0
         self.virtual_machines = set()
         self.update(obj_dict)
@@ -461,6 +511,7 @@ class VirtualRouterSM(DBBaseSM):
         self.name = obj['fq_name'][-1]
         self.fq_name = obj['fq_name']
         self.update_multiple_refs('virtual_machine', obj)
+        self._update_load()
     # end update
 
     @classmethod
@@ -469,9 +520,61 @@ class VirtualRouterSM(DBBaseSM):
             return
         obj = cls._dict[uuid]
         obj.update_multiple_refs('virtual_machine', {})
+        obj.agent_state = False
         del cls._dict[uuid]
     # end delete
 
+    @classmethod
+    def reset(cls):
+        super(VirtualRouterSM, cls).reset()
+        cls._load_index = {}
+    # end reset
+
+    def add_ref(self, ref_type, ref, attr=None):
+        super(VirtualRouterSM, self).add_ref(ref_type, ref, attr)
+        if ref_type == 'virtual_machine':
+            self._update_load()
+    # end add_ref
+
+    def delete_ref(self, ref_type, ref):
+        super(VirtualRouterSM, self).delete_ref(ref_type, ref)
+        if ref_type == 'virtual_machine':
+            self._update_load()
+    # end delete_ref
+
+    @property
+    def agent_state(self):
+        return self._agent_state
+
+    @agent_state.setter
+    def agent_state(self, up):
+        self._agent_state = up
+        self._update_load()
+
+    def _update_load(self):
+        load = len(self.virtual_machines) if self._agent_state else None
+        if load == self._load:
+            return
+        if self._load is not None:
+            vr_set = self._load_index[self._load]
+            vr_set.discard(self.uuid)
+            if not vr_set:
+                del self._load_index[self._load]
+        if load is not None:
+            self._load_index.setdefault(load, set()).add(self.uuid)
+        self._load = load
+    # end _update_load
+
+    @classmethod
+    def get_least_loaded(cls, excluded=()):
+        # running vrouter with the fewest virtual machines, not in excluded
+        for load in sorted(cls._load_index):
+            for vr_id in cls._load_index.get(load, ()):
+                if vr_id not in excluded:
+                    return vr_id
+        return None
+    # end get_least_loaded
+
     def set_agent_state(self, up):
         if up:
             self.agent_down_count = 0
@@ -490,6 +593,7 @@ class VirtualRouterSM(DBBaseSM):
 class VirtualMachineInterfaceSM(DBBaseSM):
     _dict = {}
     obj_type = 'virtual_machine_interface'
+    _dirty_keys = set()
 
     def __init__(self, uuid, obj_dict=None):
         self.uuid = uuid
@@ -745,6 +849,7 @@ class ServiceTemplateSM(DBBaseSM):
 class VirtualNetworkSM(DBBaseSM):
     _dict = {}
     obj_type = 'virtual_network'
+    _dirty_keys = set()
 
     def __init__(self, uuid, obj_dict=None):
         self.uuid = uuid
@@ -827,6 +932,7 @@ class FloatingIpSM(DBBaseSM):
 class InstanceIpSM(DBBaseSM):
     _dict = {}
     obj_type = 'instance_ip'
+    _dirty_keys = set()
 
     def __init__(self, uuid, obj_dict=None):
         self.uuid = uuid
@@ -999,6 +1105,7 @@ class PhysicalRouterSM(DBBaseSM):
 class ProjectSM(DBBaseSM):
     _dict = {}
     obj_type = 'project'
+    _dirty_keys = set()
 
     def __init__(self, uuid, obj_dict=None):
         self.uuid = uuid
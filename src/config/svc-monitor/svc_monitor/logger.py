@@ -19,7 +19,7 @@ from pysandesh.connection_info import ConnectionState
 from pysandesh.gen_py.sandesh.ttypes import SandeshLevel
 from pysandesh.gen_py.process_info.ttypes import ConnectionType as ConnType
 
-from config_db import ServiceInstanceSM, ServiceTemplateSM,\
+from config_db import DBBaseSM, ServiceInstanceSM, ServiceTemplateSM,\
         VirtualMachineSM, VirtualRouterSM, VirtualNetworkSM
 
 
@@ -43,6 +43,8 @@ class ServiceMonitorLogger(ConfigServiceLogger):
     def redefine_sandesh_handles(self):
         sandesh.ServiceInstanceList.handle_request =\
                 self.sandesh_si_handle_request
+        sandesh.TimerStatsReq.handle_request =\
+                self.sandesh_timer_stats_handle_request
 
     def api_conn_status_update(self, status, msg=None):
         ConnectionState.update(
@@ -109,6 +111,17 @@ class ServiceMonitorLogger(ConfigServiceLogger):
 
         si_resp.response(req.context())
 
+    def sandesh_timer_stats_handle_request(self, req):
+        manager = DBBaseSM._manager
+        phases = getattr(manager, 'timer_phases', None) or []
+        resp = sandesh.TimerStatsResp(phases=[
+            sandesh.TimerPhase(name=phase['name'],
+                               object_count=phase['object_count'],
+                               elapsed_secs=phase['elapsed_secs'])
+            for phase in phases])
+        resp.total_secs = getattr(manager, 'timer_secs', None)
+        resp.response(req.context())
+
     def uve_svc_instance(self, si_fq_name_str, status=None,
                          vms=[], st_name=None):
         svc_uve = UveSvcInstanceConfig(name=si_fq_name_str,
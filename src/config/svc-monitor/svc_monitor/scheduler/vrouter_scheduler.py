@@ -20,8 +20,11 @@
 import abc
 import ast
 from distutils.version import StrictVersion as V
+import gevent
+import json
 import random
 import six
+import time
 
 from cfgm_common import analytics_client
 from cfgm_common import svc_info
@@ -35,6 +38,7 @@ from sandesh_common.vns.constants import \
 
 @six.add_metaclass(abc.ABCMeta)
 class VRouterScheduler(object):
+    _UVE_STREAM_RETRY_INTERVAL = 10
 
     def __init__(self, vnc_lib, nova_client, disc, logger, args):
         self._vnc_lib = vnc_lib
@@ -43,6 +47,16 @@ class VRouterScheduler(object):
         self._disc = disc
         self._logger = logger
         self._analytics_client_list = self._get_analytics_clients()
+        # vrouter name -> VrouterAgent / NodeStatus UVE structs, kept up to
+        # date from the vrouter UVE stream of analytics
+        self._vrouters_mode = {}
+        self._agents_status = {}
+        self._changed_vrouters = set()
+        self._pending_down_vrouters = set()
+        self._evaluated_vrouters = set()
+        self._uve_stream_gl = None
+        self._uve_stream_up = False
+        self._last_reconcile_time = 0
 
     def _get_analytics_clients(self):
         analytics_client_list = []
@@ -97,104 +111,198 @@ class VRouterScheduler(object):
 
         return az_vr_list
 
+    def _get_user_token(self):
+        if self._args.aaa_mode == 'no-auth':
+            return None
+        return self._vnc_lib.get_auth_token()
+
     def query_uve(self, analytics, filter_string):
         path = "/analytics/uves/vrouter/"
         response_dict = {}
-        if self._args.aaa_mode == 'no-auth':
-            user_token = None
-        else:
-            user_token = self._vnc_lib.get_auth_token()
         response = analytics.request(path, filter_string,
-                   user_token=user_token)
+                   user_token=self._get_user_token())
         for values in response['value']:
             response_dict[values['name']] = values['value']
         return response_dict
 
-    def vrouters_running(self):
-        # get az host list
-        az_vrs = self._get_az_vrouter_list()
-
+    def _read_vrouter_uves(self):
         # read all vrouter information
         client_cnt = len(self._analytics_client_list)
         analytics_client_list = random.sample(
                   self._analytics_client_list, client_cnt)
-        analytics_response = False
         for analytics in analytics_client_list or []:
             try:
                 vrouters_mode = self.query_uve(
                        analytics, "*?cfilt=VrouterAgent:mode")
                 agents_status = self.query_uve(
                        analytics, "*?cfilt=NodeStatus:process_status")
-                analytics_response = True
-                break
             except Exception as e:
                 error_msg = "Failed to get vrouter and agent info from " + \
                             "analytics endpoint %s" %analytics.endpoint
                 self._logger.error(error_msg)
                 self._logger.error(str(e))
+                continue
+            self._vrouters_mode = vrouters_mode
+            self._agents_status = agents_status
+            return True
 
-        if not analytics_response:
-            error_msg = "no response from analytics servers"
-            self._logger.error(error_msg)
+        error_msg = "no response from analytics servers"
+        self._logger.error(error_msg)
+        return False
+
+    def _start_uve_stream(self):
+        if self._uve_stream_gl is not None or \
+                not self._analytics_client_list:
             return
+        self._uve_stream_gl = gevent.spawn(self._uve_stream_listener)
 
-        for vr in VirtualRouterSM.values():
-            if az_vrs and vr.name not in az_vrs:
-                vr.set_agent_state(False)
-                continue
+    def _uve_stream_listener(self):
+        path = "/analytics/uve-stream"
+        query = "?tablefilt=vrouter&cfilt=VrouterAgent:mode," + \
+                "NodeStatus:process_status"
+        while True:
+            for analytics in random.sample(self._analytics_client_list,
+                                           len(self._analytics_client_list)):
+                try:
+                    for event, data in analytics.request_stream(path, query,
+                            user_token=self._get_user_token()):
+                        if event == 'init':
+                            # reconcile once with the full UVEs on connect
+                            self._uve_stream_up = True
+                            self._last_reconcile_time = 0
+                        elif event == 'update':
+                            self._uve_stream_update(json.loads(data))
+                        elif event == 'stop':
+                            break
+                except Exception as e:
+                    self._logger.error("vrouter UVE stream from analytics "
+                        "endpoint %s failed: %s" % (analytics.endpoint, str(e)))
+                self._uve_stream_up = False
+            gevent.sleep(self._UVE_STREAM_RETRY_INTERVAL)
+
+    def _uve_stream_update(self, data):
+        name = data['key'].split(':', 1)[-1]
+        struct_type = data.get('type')
+        value = data.get('value')
+        if struct_type is None:
+            # vrouter UVE is gone
+            self._vrouters_mode.pop(name, None)
+            self._agents_status.pop(name, None)
+        elif struct_type == 'VrouterAgent':
+            if value is None:
+                self._vrouters_mode.pop(name, None)
+            else:
+                self._vrouters_mode[name] = {'VrouterAgent': value}
+        elif struct_type == 'NodeStatus':
+            if value is None:
+                self._agents_status.pop(name, None)
+            else:
+                self._agents_status[name] = {'NodeStatus': value}
+        else:
+            return
+        self._changed_vrouters.add(name)
+
+    def _get_changed_vrouters(self):
+        # vrouters whose UVEs changed, that are being declared down or that
+        # were never evaluated
+        vr_ids = set(VirtualRouterSM._dict)
+        self._evaluated_vrouters &= vr_ids
+        self._pending_down_vrouters &= vr_ids
+        vr_ids -= self._evaluated_vrouters
+        vr_ids |= self._pending_down_vrouters
+        for name in self._changed_vrouters:
+            vr = VirtualRouterSM.find_by_name_or_uuid(name)
+            if vr:
+                vr_ids.add(vr.uuid)
+        self._changed_vrouters = set()
+        return [VirtualRouterSM.get(vr_id) for vr_id in vr_ids]
+
+    def vrouters_running(self):
+        # get az host list
+        az_vrs = self._get_az_vrouter_list()
+
+        # read all vrouter UVEs unless they are streamed, as a fallback
+        # reconcile with them from time to time
+        if self._args.vrouter_uve_stream:
+            self._start_uve_stream()
+        now = time.time()
+        reconcile = not self._uve_stream_up or \
+            now - self._last_reconcile_time >= \
+            int(self._args.vrouter_reconcile_interval)
+        if reconcile:
+            if self._read_vrouter_uves():
+                self._last_reconcile_time = now
+                self._changed_vrouters = set()
+            elif self._uve_stream_up:
+                reconcile = False
+            else:
+                return
+
+        if reconcile or az_vrs:
+            vr_list = list(VirtualRouterSM.values())
+        else:
+            vr_list = self._get_changed_vrouters()
+        for vr in vr_list:
+            self._update_agent_state(vr, az_vrs)
+            self._evaluated_vrouters.add(vr.uuid)
+            if vr.agent_down_count % 3:
+                self._pending_down_vrouters.add(vr.uuid)
+            else:
+                self._pending_down_vrouters.discard(vr.uuid)
+
+    def _update_agent_state(self, vr, az_vrs):
+        vrouters_mode = self._vrouters_mode
+        agents_status = self._agents_status
+        if az_vrs and vr.name not in az_vrs:
+            vr.set_agent_state(False)
+            return
+
+        if vr.name not in vrouters_mode or vr.name not in agents_status:
+            vr.set_agent_state(False)
+            return
 
-            if vr.name not in vrouters_mode or vr.name not in agents_status:
+        try:
+            vr_mode = vrouters_mode[vr.name]['VrouterAgent']
+            if (vr_mode['mode'] != constants.VrouterAgentTypeMap[
+                    constants.VrouterAgentType.VROUTER_AGENT_EMBEDDED]):
                 vr.set_agent_state(False)
-                continue
+                return
+        except Exception as e:
+            vr.set_agent_state(False)
+            return
 
-            try:
-                vr_mode = vrouters_mode[vr.name]['VrouterAgent']
-                if (vr_mode['mode'] != constants.VrouterAgentTypeMap[
-                        constants.VrouterAgentType.VROUTER_AGENT_EMBEDDED]):
-                    vr.set_agent_state(False)
+        try:
+            state_up = False
+            for vr_status in agents_status[vr.name]['NodeStatus']['process_status'] or []:
+                if (vr_status['module_id'] != constants.MODULE_VROUTER_AGENT_NAME):
                     continue
-            except Exception as e:
+                if (int(vr_status['instance_id']) == 0 and
+                        vr_status['state'] == 'Functional'):
+                    vr.set_agent_state(True)
+                    state_up = True
+                    break
+            if not state_up:
                 vr.set_agent_state(False)
-                continue
+        except Exception as e:
+            vr.set_agent_state(False)
 
-            try:
-                state_up = False
-                for vr_status in agents_status[vr.name]['NodeStatus']['process_status'] or []:
-                    if (vr_status['module_id'] != constants.MODULE_VROUTER_AGENT_NAME):
-                        continue
-                    if (int(vr_status['instance_id']) == 0 and
-                            vr_status['state'] == 'Functional'):
-                        vr.set_agent_state(True)
-                        state_up = True
-                        break
-                if not state_up:
-                    vr.set_agent_state(False)
-            except Exception as e:
-                vr.set_agent_state(False)
+    def _get_anti_affinity_vrouters(self, si, vm):
+        vr_set = set()
+        for vm_id in si.virtual_machines:
+            if vm_id == vm.uuid:
                 continue
+            anti_affinity_vm = VirtualMachineSM.get(vm_id)
+            if anti_affinity_vm and anti_affinity_vm.virtual_router:
+                vr_set.add(anti_affinity_vm.virtual_router)
+        return vr_set
 
     def _get_candidates(self, si, vm):
         if vm.virtual_router:
             return [vm.virtual_router]
 
-        vr_list = VirtualRouterSM._dict.keys()
-        for vm_id in si.virtual_machines:
-            if vm_id == vm.uuid:
-                continue
-            anti_affinity_vm = VirtualMachineSM.get(vm_id)
-            if anti_affinity_vm:
-                try:
-                    vr_list.remove(anti_affinity_vm.virtual_router)
-                except ValueError:
-                    pass
-
-        for vr in VirtualRouterSM.values():
-            if not vr.agent_state:
-                try:
-                    vr_list.remove(vr.uuid)
-                except ValueError:
-                    pass
-        return vr_list
+        excluded = self._get_anti_affinity_vrouters(si, vm)
+        return [vr.uuid for vr in VirtualRouterSM.values()
+                if vr.agent_state and vr.uuid not in excluded]
 
 class RandomScheduler(VRouterScheduler):
     """Randomly allocate a vrouter agent for virtual machine of a service
@@ -207,3 +315,22 @@ class RandomScheduler(VRouterScheduler):
         self._vnc_lib.ref_update('virtual-router', chosen_vrouter,
             'virtual-machine', vm.uuid, None, 'ADD')
         return chosen_vrouter
+
+class LeastLoadedScheduler(VRouterScheduler):
+    """Allocate the running vrouter agent with the fewest virtual machines
+    for virtual machine of a service instance."""
+    def schedule(self, si, vm):
+        chosen_vrouter = vm.virtual_router
+        if not chosen_vrouter:
+            chosen_vrouter = VirtualRouterSM.get_least_loaded(
+                self._get_anti_affinity_vrouters(si, vm))
+            if not chosen_vrouter:
+                return None
+        self._vnc_lib.ref_update('virtual-router', chosen_vrouter,
+            'virtual-machine', vm.uuid, None, 'ADD')
+        # account for the virtual machine before the ref notification
+        # comes back, so a burst of schedules is spread out
+        vr = VirtualRouterSM.get(chosen_vrouter)
+        if vr:
+            vr.add_ref('virtual_machine', vm.uuid)
+        return chosen_vrouter
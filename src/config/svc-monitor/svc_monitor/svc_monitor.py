@@ -21,6 +21,7 @@ import argparse
 import signal
 import random
 import hashlib
+import time
 
 import os
 
@@ -64,6 +65,9 @@ class SvcMonitor(object):
 
     def __init__(self, sm_logger=None, args=None):
         self._args = args
+        # per phase cost of the last timer_callback run
+        self.timer_phases = []
+        self.timer_secs = None
         # initialize logger
         if sm_logger is not None:
             self.logger = sm_logger
@@ -541,10 +545,23 @@ def skip_check_service(si):
     return False
 
 
+def _timer_phase(phases, name, objects, start_time):
+    phases.append({'name': name, 'object_count': objects,
+                   'elapsed_secs': time.time() - start_time})
+
+
 def timer_callback(monitor):
+    # The orphan checks only look at the objects updated, or with a ref
+    # added or removed, since the previous run. Objects acted upon are
+    # marked again so the check is retried until their delete is notified.
+    phases = []
+    timer_start = time.time()
+
     # delete orphan shared iips
+    start_time = time.time()
+    iip_list = InstanceIpSM.pop_dirty()
     iip_delete_list = []
-    for iip in InstanceIpSM.values():
+    for iip in iip_list:
         if not iip.instance_ip_secondary or not iip.service_instance_ip:
             continue
         if iip.service_instance:
@@ -554,29 +571,46 @@ def timer_callback(monitor):
         iip_delete_list.append(iip)
     for iip in iip_delete_list:
         monitor.port_tuple_agent.delete_shared_iip(iip)
+        iip.mark_dirty()
+    _timer_phase(phases, 'orphan_shared_iip', len(iip_list), start_time)
 
     # delete vms without si
+    start_time = time.time()
+    vm_list = VirtualMachineSM.pop_dirty()
     vm_delete_list = []
-    for vm in VirtualMachineSM.values():
+    for vm in vm_list:
         si = ServiceInstanceSM.get(vm.service_instance)
         if not si and vm.virtualization_type:
             vm_delete_list.append(vm)
     for vm in vm_delete_list:
         monitor.delete_service_instance(vm)
+        vm.mark_dirty()
+    _timer_phase(phases, 'orphan_vm', len(vm_list), start_time)
 
     # delete vmis with si but no vms
+    start_time = time.time()
+    vmi_list = VirtualMachineInterfaceSM.pop_dirty()
     vmi_delete_list = []
-    for vmi in VirtualMachineInterfaceSM.values():
+    for vmi in vmi_list:
         si = ServiceInstanceSM.get(vmi.service_instance)
         if si and not vmi.virtual_machine:
-            vmi_delete_list.append(vmi.uuid)
+            vmi_delete_list.append(vmi)
     if len(vmi_delete_list):
-        monitor.vm_manager.cleanup_svc_vm_ports(vmi_delete_list)
+        monitor.vm_manager.cleanup_svc_vm_ports(
+            [vmi.uuid for vmi in vmi_delete_list])
+        for vmi in vmi_delete_list:
+            vmi.mark_dirty()
+    _timer_phase(phases, 'orphan_vmi', len(vmi_list), start_time)
 
     # check vrouter agent status
+    start_time = time.time()
     monitor.vrouter_scheduler.vrouters_running()
+    _timer_phase(phases, 'vrouter_status', len(VirtualRouterSM._dict),
+                 start_time)
 
-    # check status of service
+    # check status of service, the service vms may have gone away without
+    # any config change so all service instances are checked
+    start_time = time.time()
     si_list = list(ServiceInstanceSM.values())
     for si in si_list:
         if skip_check_service(si):
@@ -585,9 +619,18 @@ def timer_callback(monitor):
             monitor._relaunch_service_instance(si)
         if si.max_instances != len(si.virtual_machines):
             monitor._relaunch_service_instance(si)
-
-    # check vns to be deleted
-    for project in ProjectSM.values():
+    _timer_phase(phases, 'service_status', len(si_list), start_time)
+
+    # check vns to be deleted, in the projects changed or with a vn changed
+    start_time = time.time()
+    project_list = ProjectSM.pop_dirty()
+    project_ids = set(project.uuid for project in project_list)
+    for vn in VirtualNetworkSM.pop_dirty():
+        project = ProjectSM.get(getattr(vn, 'parent_key', None))
+        if project and project.uuid not in project_ids:
+            project_ids.add(project.uuid)
+            project_list.append(project)
+    for project in project_list:
         if project.service_instances:
             continue
 
@@ -598,6 +641,12 @@ def timer_callback(monitor):
                 continue
             if vn.name in svc_info.get_shared_vn_list():
                 monitor._delete_shared_vn(vn.uuid)
+                vn.mark_dirty()
+    _timer_phase(phases, 'shared_vn', len(project_list), start_time)
+
+    monitor.timer_phases = phases
+    monitor.timer_secs = time.time() - timer_start
+# end timer_callback
 
 
 def launch_timer(monitor):
@@ -646,6 +695,8 @@ def parse_args(args_str):
                          --syslog_facility LOG_USER
                          --cluster_id <testbed-name>
                          --check_service_interval 60
+                         --vrouter_uve_stream True
+                         --vrouter_reconcile_interval 600
                          [--region_name <name>]
                          [--reset_config]
     '''
@@ -691,6 +742,8 @@ def parse_args(args_str):
         'kombu_ssl_keyfile': '',
         'kombu_ssl_certfile': '',
         'kombu_ssl_ca_certs': '',
+        'notification_batch_window': 0,
+        'notification_batch_max': 1000,
     }
     defaults.update(SandeshConfig.get_default_options(['DEFAULTS']))
     secopts = {
@@ -716,6 +769,8 @@ def parse_args(args_str):
         'availability_zone': None,
         'netns_availability_zone': None,
         'aaa_mode': cfgm_common.AAA_MODE_DEFAULT_VALUE,
+        'vrouter_uve_stream': True,
+        'vrouter_reconcile_interval': 600,
     }
     cassandraopts = {
         'cassandra_user': None,
@@ -817,6 +872,18 @@ def parse_args(args_str):
                         help="Cassandra password")
     parser.add_argument("--check_service_interval",
                         help="Check service interval")
+    parser.add_argument("--vrouter_uve_stream",
+                        help="Track vrouter agent state from the analytics "
+                             "UVE stream instead of reading all vrouter "
+                             "UVEs on every service check")
+    parser.add_argument("--vrouter_reconcile_interval", type=int,
+                        help="Seconds between full reads of the vrouter "
+                             "UVEs when they are streamed")
+    parser.add_argument("--notification_batch_window", type=float,
+                        help="Seconds to collect config notifications into "
+                             "one batch, 0 handles them one by one")
+    parser.add_argument("--notification_batch_max", type=int,
+                        help="Max config notifications in one batch")
     SandeshConfig.add_parser_arguments(parser)
 
     args = parser.parse_args(remaining_argv)
@@ -833,6 +900,8 @@ def parse_args(args_str):
     if args.netns_availability_zone and \
             args.netns_availability_zone.lower() == 'none':
         args.netns_availability_zone = None
+    if type(args.vrouter_uve_stream) is str:
+        args.vrouter_uve_stream = args.vrouter_uve_stream.lower() == 'true'
     args.sandesh_config = SandeshConfig.from_parser_arguments(args)
 
     return args
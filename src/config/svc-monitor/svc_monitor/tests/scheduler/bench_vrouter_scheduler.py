@@ -0,0 +1,97 @@
+#
+# Copyright (c) 2017 Juniper Networks, Inc. All rights reserved.
+#
+"""Placement benchmark of the service instance vrouter schedulers
+
+Usage: python bench_vrouter_scheduler.py [--vrouters N] [--instances N]
+                                         [--vms-per-instance N]
+                                         [--down-ratio R]
+
+Schedules the virtual machines of many service instances on a set of
+vrouters, some of them down, and reports the time per placement and how
+evenly the virtual machines end up spread across the running vrouters.
+"""
+import argparse
+import math
+import random
+import time
+
+import svc_monitor.scheduler.vrouter_scheduler as scheduler
+from svc_monitor.config_db import VirtualMachineSM, VirtualRouterSM
+import svc_monitor.tests.test_common_utils as test_utils
+
+
+class NullVncApi(object):
+    def ref_update(self, *args, **kwargs):
+        pass
+
+
+class ServiceInstance(object):
+    def __init__(self, name, vm_ids):
+        self.name = name
+        self.virtual_machines = set(vm_ids)
+
+
+def _setup(args):
+    VirtualRouterSM.reset()
+    VirtualMachineSM.reset()
+    rand = random.Random(0)
+    for i in range(args.vrouters):
+        vr = test_utils.create_test_virtual_router('bench-vr%d' % i)
+        if rand.random() < args.down_ratio:
+            vr.agent_state = False
+    instances = []
+    for i in range(args.instances):
+        vms = [test_utils.create_test_virtual_machine('bench-si%d-vm%d' %
+                                                      (i, j))
+               for j in range(args.vms_per_instance)]
+        instances.append((ServiceInstance('bench-si%d' % i,
+                                          [vm.uuid for vm in vms]), vms))
+    return instances
+
+
+def run(cls, args):
+    instances = _setup(args)
+    sched = cls(NullVncApi(), None, None, None,
+                argparse.Namespace(analytics_server_list='',
+                                   netns_availability_zone=None))
+    placed = 0
+    start = time.time()
+    for si, vms in instances:
+        for vm in vms:
+            vr_id = sched.schedule(si, vm)
+            if vr_id is None:
+                continue
+            vm.virtual_router = vr_id
+            # what the ref notification of the placement would do
+            VirtualRouterSM.get(vr_id).add_ref('virtual_machine', vm.uuid)
+            placed += 1
+    elapsed = time.time() - start
+
+    loads = [len(vr.virtual_machines) for vr in VirtualRouterSM.values()
+             if vr.agent_state]
+    mean = float(sum(loads)) / len(loads)
+    stddev = math.sqrt(sum((l - mean) ** 2 for l in loads) / len(loads))
+    return {'usecs': elapsed * 1e6 / max(placed, 1), 'placed': placed,
+            'max_load': max(loads), 'stddev': stddev}
+
+
+def main(args_str=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--vrouters', type=int, default=2000)
+    parser.add_argument('--instances', type=int, default=5000)
+    parser.add_argument('--vms-per-instance', type=int, default=2)
+    parser.add_argument('--down-ratio', type=float, default=0.05)
+    args = parser.parse_args(args_str)
+
+    print '%-24s %12s %10s %10s %10s' % (
+        'scheduler', 'place(us)', 'placed', 'max load', 'stddev')
+    for cls in (scheduler.RandomScheduler, scheduler.LeastLoadedScheduler):
+        result = run(cls, args)
+        print '%-24s %12.2f %10d %10d %10.2f' % (
+            cls.__name__, result['usecs'], result['placed'],
+            result['max_load'], result['stddev'])
+# end main
+
+if __name__ == '__main__':
+    main()
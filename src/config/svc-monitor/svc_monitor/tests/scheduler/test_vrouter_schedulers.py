@@ -18,6 +18,7 @@
 # @author: Edouard Thuleau, Cloudwatt.
 
 import mock
+import time
 import unittest
 import six
 import cfgm_common.analytics_client as analytics
@@ -26,7 +27,8 @@ from sandesh_common.vns import constants
 import svc_monitor.scheduler.vrouter_scheduler as scheduler
 from vnc_api.vnc_api import VirtualRouter, VirtualMachine
 
-from svc_monitor.config_db import ServiceInstanceSM, VirtualRouterSM
+from svc_monitor.config_db import ServiceInstanceSM, VirtualRouterSM, \
+    VirtualMachineSM
 import svc_monitor.tests.test_common_utils as test_utils
 
 AGENTS_STATUS = \
@@ -125,6 +127,37 @@ class TestRandomScheduler(unittest.TestCase):
         self.assertTrue(VirtualRouterSM.get('vrouter1').agent_state)
         self.assertTrue(VirtualRouterSM.get('vrouter2').agent_state)
 
+    def test_vrouter_uve_stream(self):
+        vr1 = test_utils.create_test_virtual_router('vrouter1')
+        vr2 = test_utils.create_test_virtual_router('vrouter2')
+        self.scheduler._args.vrouter_uve_stream = False
+        self.scheduler._args.vrouter_reconcile_interval = 600
+        self.scheduler._uve_stream_up = True
+        self.scheduler._last_reconcile_time = time.time()
+        self.scheduler._read_vrouter_uves = mock.Mock()
+        for name in ['vrouter1', 'vrouter2']:
+            self.scheduler._uve_stream_update({
+                'key': 'ObjectVRouter:' + name, 'type': 'VrouterAgent',
+                'value': {'mode': 'VROUTER'}})
+            self.scheduler._uve_stream_update({
+                'key': 'ObjectVRouter:' + name, 'type': 'NodeStatus',
+                'value': {'process_status': [
+                    {'module_id': 'contrail-vrouter-agent',
+                     'instance_id': '0', 'state': 'Functional'}]}})
+        self.scheduler.vrouters_running()
+        self.assertTrue(vr1.agent_state)
+        self.assertTrue(vr2.agent_state)
+
+        # vrouter UVE is gone, agent is declared down after 3 checks
+        self.scheduler._uve_stream_update({'key': 'ObjectVRouter:vrouter2',
+                                           'type': None})
+        for _ in range(3):
+            self.assertTrue(vr2.agent_state)
+            self.scheduler.vrouters_running()
+        self.assertFalse(vr2.agent_state)
+        self.assertTrue(vr1.agent_state)
+        self.assertFalse(self.scheduler._read_vrouter_uves.called)
+
     def test_random_scheduling(self):
         random_patch = mock.patch('random.choice')
         random_mock = random_patch.start()
@@ -195,3 +228,74 @@ class TestRandomScheduler(unittest.TestCase):
 
         az_vr_list = self.scheduler2._get_az_vrouter_list()
         self.assertEqual(az_vr_list, ['compute1', 'compute3'])
+
+
+class TestLeastLoadedScheduler(unittest.TestCase):
+
+    def setUp(self):
+        super(TestLeastLoadedScheduler, self).setUp()
+
+        self.vnc_mock = mock.MagicMock()
+
+        self.analytics_patch = \
+            mock.patch('cfgm_common.analytics_client.Client.request')
+        self.analytics_mock = self.analytics_patch.start()
+
+        self.scheduler = \
+            scheduler.LeastLoadedScheduler(self.vnc_mock, mock.MagicMock(),
+                mock.MagicMock(), mock.MagicMock(),
+                mock.MagicMock(netns_availability_zone=False))
+
+    def tearDown(self):
+        self.analytics_patch.stop()
+        VirtualRouterSM.reset()
+        VirtualMachineSM.reset()
+        ServiceInstanceSM.reset()
+        super(TestLeastLoadedScheduler, self).tearDown()
+
+    def test_least_loaded_scheduling(self):
+        si = test_utils.create_test_si(name='test-instance', count=3,
+            intf_list=['vn1', 'vn2'])
+        vr1 = test_utils.create_test_virtual_router('vr1')
+        vr2 = test_utils.create_test_virtual_router('vr2')
+        vr3 = test_utils.create_test_virtual_router('vr3')
+        vr1.add_ref('virtual_machine', 'other-vm')
+        vms = []
+        for name in ['vm1', 'vm2', 'vm3']:
+            vm = test_utils.create_test_virtual_machine(name)
+            si.virtual_machines.add(vm.uuid)
+            vms.append(vm)
+
+        # least loaded vrouters first, with anti-affinity
+        chosen = set()
+        for vm in vms[:2]:
+            vm.virtual_router = self.scheduler.schedule(si, vm)
+            chosen.add(vm.virtual_router)
+        self.assertEqual(chosen, set([vr2.uuid, vr3.uuid]))
+        self.assertEqual(self.vnc_mock.ref_update.call_count, 2)
+        self.assertEqual(self.scheduler.schedule(si, vms[2]), vr1.uuid)
+
+        # vrouters that are down or deleted are not chosen
+        vms[2].virtual_router = None
+        vr1.agent_state = False
+        self.assertIsNone(self.scheduler.schedule(si, vms[2]))
+        vr1.agent_state = True
+        VirtualRouterSM.delete(vr1.uuid)
+        self.assertIsNone(self.scheduler.schedule(si, vms[2]))
+
+    def test_load_index(self):
+        vr1 = test_utils.create_test_virtual_router('vr1')
+        vr2 = test_utils.create_test_virtual_router('vr2')
+        vr1.add_ref('virtual_machine', 'vm1')
+        self.assertEqual(VirtualRouterSM.get_least_loaded(), vr2.uuid)
+        vr2.add_ref('virtual_machine', 'vm2')
+        vr2.add_ref('virtual_machine', 'vm3')
+        self.assertEqual(VirtualRouterSM.get_least_loaded(), vr1.uuid)
+        self.assertEqual(VirtualRouterSM.get_least_loaded([vr1.uuid]),
+                         vr2.uuid)
+        vr2.delete_ref('virtual_machine', 'vm2')
+        vr2.delete_ref('virtual_machine', 'vm3')
+        self.assertEqual(VirtualRouterSM.get_least_loaded(), vr2.uuid)
+        for _ in range(3):
+            vr2.set_agent_state(False)
+        self.assertEqual(VirtualRouterSM.get_least_loaded(), vr1.uuid)
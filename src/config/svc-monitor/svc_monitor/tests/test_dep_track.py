@@ -553,6 +553,24 @@ class DepTrackTester(unittest.TestCase):
         BlueSM.delete("fake-blue-uuid")
     # end test_find
 
+    def test_find_by_name_index(self):
+        BlueSM._object_db.object_read = self.blue_read
+        BlueSM.locate("OK")
+        self.assertIs(BlueSM.find_by_name_or_uuid("fake-blue-OK"),
+                      BlueSM.get("OK"))
+        BlueSM.delete("OK")
+        self.assertIsNone(BlueSM.find_by_name_or_uuid("fake-blue-OK"))
+        BlueSM.reset()
+        self.assertIsNone(BlueSM.find_by_name_or_uuid("fake-blue-OK"))
+    # end test_find_by_name_index
+
+    def test_obj_type_map(self):
+        obj_type_map = DBBaseTM.get_obj_type_map()
+        self.assertIs(obj_type_map['blue'], BlueSM)
+        self.assertIs(DBBaseTM.get_obj_type_map(), obj_type_map)
+        self.assertIs(RedSM.get_obj_type_map(), obj_type_map)
+    # end test_obj_type_map
+
     def test_basic_dep_track(self):
         reaction_map = {
             "red": {
@@ -1154,4 +1172,42 @@ class DepTrackTester(unittest.TestCase):
         WhiteSM.delete("fake-white-uuid")
         PurpleSM.delete("fake-purple-uuid")
     # end test_basic_dep_track_update_3
+
+    def test_dep_track_long_chain(self):
+        class Link(object):
+            _dict = {}
+            def __init__(self, key, next_key):
+                self.key = key
+                self.link = next_key
+            def get_key(self):
+                return self.key
+            @classmethod
+            def get(cls, key):
+                return cls._dict.get(key)
+        # end Link
+
+        chain_len = 5000
+        for i in range(chain_len):
+            Link._dict[i] = Link(i, (i + 1) % chain_len)
+        reaction_map = {
+            'link': {
+                'self': ['link'],
+                'link': ['link'],
+            },
+        }
+        dependency_tracker = DependencyTracker({'link': Link}, reaction_map)
+        dependency_tracker.evaluate('link', Link.get(0))
+        self.assertEqual(dependency_tracker.resources['link'],
+                         range(chain_len))
+        self.assertEqual(dependency_tracker.stats['evaluations'], 1)
+        self.assertEqual(dependency_tracker.stats['resources'], chain_len)
+        self.assertEqual(dependency_tracker.stats['max_depth'], chain_len)
+
+        # resetting resources starts a fresh walk
+        dependency_tracker.resources = {}
+        dependency_tracker.evaluate('link', Link.get(chain_len - 1))
+        self.assertEqual(dependency_tracker.resources['link'][:2],
+                         [chain_len - 1, 0])
+        self.assertEqual(dependency_tracker.stats['evaluations'], 2)
+    # end test_dep_track_long_chain
 #end DepTrackTester(unittest.TestCase):
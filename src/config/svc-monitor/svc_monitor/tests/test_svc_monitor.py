@@ -312,6 +312,7 @@ vip_del_info = {
 class SvcMonitorTest(unittest.TestCase):
     def setUp(self):
         self.args = svc_monitor.parse_args('')
+        self.args.vrouter_uve_stream = False
         ServiceMonitorLogger.__init__ = mock.MagicMock(return_value=None)
         ServiceMonitorLogger.log = mock.MagicMock()
         ServiceMonitorLogger.info = mock.MagicMock()
@@ -694,6 +695,29 @@ class SvcMonitorTest(unittest.TestCase):
         self.assertEqual(len(config_db.ServiceApplianceSM._dict), 0)
         self.assertEqual(len(config_db.ServiceApplianceSetSM._dict), 0)
 
+    def test_svc_monitor_notification_batch(self):
+        def db_read(obj_type, uuids, **kwargs):
+            return (True, [self._return_obj[obj_type]])
+        config_db.DBBaseSM._object_db.reset()
+        config_db.DBBaseSM._object_db.object_read = db_read
+        sas_obj = self.add_sas("Test-SAS", 'sas')
+        self.add_sa("Test-SA", 'sa', sas_obj)
+        rabbit = self._svc_monitor.rabbit
+
+        sa_update_info = dict(sa_add_info, oper='UPDATE')
+        batch = [sas_add_info, sa_add_info, sa_update_info, sa_update_info]
+        self.assertEqual(rabbit._coalesce_notifications(batch),
+                         [sas_add_info, sa_add_info, sa_update_info])
+
+        evaluate = mock.MagicMock(side_effect=rabbit.evaluate_dependency)
+        rabbit.evaluate_dependency = evaluate
+        rabbit._process_notification_batch(batch)
+        self.assertEqual(evaluate.call_count, 1)
+        self.assertTrue('Test-SAS' in self._svc_monitor.loadbalancer_agent._loadbalancer_driver)
+        self.assertEqual(rabbit.notification_batch_stats['batches'], 1)
+        self.assertEqual(rabbit.notification_batch_stats['processed'], 3)
+        self.assertEqual(rabbit.notification_batch_stats['max_batch_size'], 4)
+
     def test_svc_monitor_pool_add(self):
         def db_read(obj_type, uuids, **kwargs):
             return (True, [self._return_obj[obj_type]])
@@ -1015,6 +1039,38 @@ class SvcMonitorTest(unittest.TestCase):
         svc_monitor.timer_callback(self._svc_monitor)
         ServiceMonitorLogger.info.assert_any_call(test_utils.AnyStringWith('Deleting vn'))
 
+    def test_svc_monitor_timer_checks_changed_objects(self):
+        st_obj = self.add_st('fake-template', 'fake-template')
+        si_obj = self.add_si('fake-instance', 'fake-instance', st_obj)
+        self.add_vm("fake-vm", 'fake-vm', si_obj, 'virtual-machine')
+        vm = config_db.VirtualMachineSM.get('fake-vm')
+        self._svc_monitor.delete_service_instance = mock.MagicMock()
+
+        svc_monitor.timer_callback(self._svc_monitor)
+        phases = dict((phase['name'], phase)
+                      for phase in self._svc_monitor.timer_phases)
+        self.assertEqual(phases['orphan_vm']['object_count'], 1)
+        self.assertIsNotNone(self._svc_monitor.timer_secs)
+
+        # unchanged vms are not checked again
+        vm.service_instance = 'non-existent-instance'
+        svc_monitor.timer_callback(self._svc_monitor)
+        phases = dict((phase['name'], phase)
+                      for phase in self._svc_monitor.timer_phases)
+        self.assertEqual(phases['orphan_vm']['object_count'], 0)
+        self.assertFalse(self._svc_monitor.delete_service_instance.called)
+
+        # and orphans are retried until they are gone
+        vm.mark_dirty()
+        svc_monitor.timer_callback(self._svc_monitor)
+        svc_monitor.timer_callback(self._svc_monitor)
+        self.assertEqual(
+            self._svc_monitor.delete_service_instance.call_count, 2)
+        config_db.VirtualMachineSM.delete('fake-vm')
+        svc_monitor.timer_callback(self._svc_monitor)
+        self.assertEqual(
+            self._svc_monitor.delete_service_instance.call_count, 2)
+
     def test_svc_monitor_restart_vm_create(self):
         def db_read(obj_type, uuids, **kwargs):
             obj = {}
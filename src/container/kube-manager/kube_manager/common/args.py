@@ -53,6 +53,9 @@ def parse_args(args_str=None):
         'kombu_ssl_keyfile': '',
         'kombu_ssl_certfile': '',
         'kombu_ssl_ca_certs': '',
+        # secs to collect config notifications in one batch, 0 = no batching
+        'notification_batch_window': 0,
+        'notification_batch_max': 1000,
         'cassandra_user': None,
         'cassandra_password': None,
         'cassandra_server_list': '',
@@ -53,6 +53,9 @@ def parse_args(args_str=None):
         'kombu_ssl_keyfile': '',
         'kombu_ssl_certfile': '',
         'kombu_ssl_ca_certs': '',
+        # secs to collect config notifications in one batch, 0 = no batching
+        'notification_batch_window': 0,
+        'notification_batch_max': 1000,
         'cassandra_server_ip': mesos_consts._CASSANDRA_HOST,
         'cassandra_server_port': mesos_consts._CASSANDRA_PORT,
         'cassandra_max_retries': mesos_consts._CASSANDRA_MAX_RETRIES,
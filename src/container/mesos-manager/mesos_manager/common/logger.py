@@ -55,6 +55,11 @@ class MesosManagerLogger(object):
         else:
             self.syslog(log_msg, level)
 
+    def is_enabled_for(self, level):
+        # Whether messages of the sandesh level are logged.
+        return self._sandesh.logger().isEnabledFor(
+            SandeshLogger.get_py_logger_level(level))
+
     # EMERGENCY.
     def emergency(self, log_msg, log_fun=None):
         log_level = SandeshLevel.SYS_EMERG
@@ -201,7 +201,8 @@ class AlarmProcessor(object):
         self.FreqCheck_Times = {}
         self.FreqCheck_Seconds = {}
 
-    def process_alarms(self, alarm_fqname, alarm, uv, local_uve):
+    def process_alarms(self, alarm_fqname, alarm, uv, local_uve,
+                       evaluate=None):
         if not alarm.is_enabled():
             return
         sev = alarm.severity()
@@ -225,6 +226,8 @@ class AlarmProcessor(object):
             # __call__ method overrides the generic alarm processing code.
             if hasattr(alarm, '__call__'):
                 or_list = alarm.__call__(uv, local_uve)
+            elif evaluate is not None:
+                or_list = evaluate(uv, local_uve)
             else:
                 or_list = self._evaluate_uve_for_alarms(
                     alarm.config(), uv, local_uve)
@@ -279,11 +282,6 @@ class AlarmProcessor(object):
                 return self._get_uve_attribute(json_elem, attr_list, uve_path)
     # end _get_uve_attribute
 
-    def _get_operand_value(self, uve, operand):
-        attr_list = operand.split('.')
-        return self._get_uve_attribute(uve, attr_list)
-    # end _get_operand_value
-
     def _get_json_value(self, val):
         try:
             tval = json.loads(val)
@@ -293,8 +291,7 @@ class AlarmProcessor(object):
             return val
     # end _get_json_value
 
-    def _get_attribute_from_uve_path(self, attr, uve_path):
-        attr_list = attr.split('.')
+    def _get_attribute_from_uve_path(self, attr_list, uve_path):
         ai = ui = 0
         pnode = uve_path[ui]
         while (ai < len(attr_list) and ui < len(uve_path)):
@@ -320,95 +317,128 @@ class AlarmProcessor(object):
         return val
     # end _get_attribute_from_uve_path
 
-    def _get_json_variables(self, uve, exp, operand1_val,
-                            operand2_val, is_operand2_json_val):
-        json_vars = {}
-        for var in exp.variables:
-            p1 = os.path.commonprefix([exp.operand1.split('.'),
-                var.split('.')])
-            if not is_operand2_json_val:
-                p2 = os.path.commonprefix(
-                    [exp.operand2.uve_attribute.split('.'), var.split('.')])
-                if p1 > p2:
-                    var_val = self._get_attribute_from_uve_path(var,
-                        operand1_val['uve_path'])
-                else:
-                    var_val = self._get_attribute_from_uve_path(var,
-                        operand2_val['uve_path'])
-            else:
-                var_val = self._get_attribute_from_uve_path(var,
-                    operand1_val['uve_path'])
-            json_vars[var] = self._get_json_value(var_val)
-        return json_vars
-    # end _get_json_variables
-
-    def _compare_operand_vals(self, val1, val2, operation):
-        try:
-            val1 = json.loads(val1)
-        except (TypeError, ValueError):
-            pass
+    @staticmethod
+    def _json_decode(val):
         try:
-            val2 = json.loads(val2)
+            return json.loads(val)
         except (TypeError, ValueError):
-            pass
-        if operation == '==':
-            return val1 == val2
-        elif operation == '!=':
-            return val1 != val2
-        elif operation == '<':
-            return val1 < val2
-        elif operation == '<=':
-            return val1 <= val2
-        elif operation == '>':
-            return val1 > val2
-        elif operation == '>=':
-            return val1 >= val2
-        elif operation == 'in':
-            if not isinstance(val2, list):
-                return False
-            return val1 in val2
-        elif operation == 'not in':
-            if not isinstance(val2, list):
-                return True
-            return val1 not in val2
-        elif operation == 'range':
-            return val2[0] <= val1 <= val2[1]
-        elif operation == 'size==':
-            if not isinstance(val1, list):
-                return False
-            return len(val1) == val2
-        elif operation == 'size!=':
-            if not isinstance(val1, list):
-                return True
-            return len(val1) != val2
-    # end _compare_operand_vals
-
-    def _get_alarm_match(self, uve, exp, operand1_val, operand2_val,
-                         is_operand2_json_val):
-        json_vars = self._get_json_variables(uve, exp, operand1_val,
-            operand2_val, is_operand2_json_val)
-        json_operand1_val = self._get_json_value(operand1_val['value'])
-        if not is_operand2_json_val:
-            json_operand2_val = self._get_json_value(operand2_val['value'])
+            return val
+    # end _json_decode
+
+    _OPERATIONS = {
+        '==': lambda val1, val2: val1 == val2,
+        '!=': lambda val1, val2: val1 != val2,
+        '<': lambda val1, val2: val1 < val2,
+        '<=': lambda val1, val2: val1 <= val2,
+        '>': lambda val1, val2: val1 > val2,
+        '>=': lambda val1, val2: val1 >= val2,
+        'in': lambda val1, val2: isinstance(val2, list) and val1 in val2,
+        'not in': lambda val1, val2:
+            not isinstance(val2, list) or val1 not in val2,
+        'range': lambda val1, val2: val2[0] <= val1 <= val2[1],
+        'size==': lambda val1, val2:
+            isinstance(val1, list) and len(val1) == val2,
+        'size!=': lambda val1, val2:
+            not isinstance(val1, list) or len(val1) != val2,
+    }
+
+    def _compile_alarm_expression(self, exp):
+        """
+        Returns a function of the UVE that returns the AlarmConditionMatch
+        of exp, or None if exp does not match the UVE
+        """
+        decode = self._json_decode
+        compare = self._OPERATIONS.get(exp.operation,
+                                       lambda val1, val2: None)
+        operand1 = exp.operand1.split('.')
+        operand2 = None
+        json_val2 = None
+        if exp.operand2.json_value is not None:
+            operand2_json = json.loads(exp.operand2.json_value)
+            json_val2 = decode(operand2_json)
         else:
+            operand2 = exp.operand2.uve_attribute.split('.')
+        # (variable, its path, whether it is read from the UVE path of
+        # operand1 rather than of operand2)
+        variables = []
+        for var in exp.variables:
+            var_list = var.split('.')
+            from_operand1 = True
+            if operand2 is not None:
+                p1 = os.path.commonprefix([operand1, var_list])
+                p2 = os.path.commonprefix([operand2, var_list])
+                from_operand1 = p1 > p2
+            variables.append((var, var_list, from_operand1))
+        condition = AlarmCondition(operation=exp.operation,
+            operand1=exp.operand1, operand2=AlarmOperand2(
+                uve_attribute=exp.operand2.uve_attribute,
+                json_value=exp.operand2.json_value),
+            variables=exp.variables)
+
+        def alarm_match(operand1_val, operand2_val):
+            json_vars = {}
+            for var, var_list, from_operand1 in variables:
+                uve_path = operand1_val['uve_path'] if from_operand1 else \
+                    operand2_val['uve_path']
+                json_vars[var] = self._get_json_value(
+                    self._get_attribute_from_uve_path(var_list, uve_path))
             json_operand2_val = None
-        return AlarmMatch(json_operand1_value=json_operand1_val,
-            json_operand2_value=json_operand2_val, json_variables=json_vars)
-    # end _get_alarm_match
-
-    def _get_alarm_condition_match(self, uve, exp, operand1_val, operand2_val,
-                                   is_operand2_json_val, match_list=None):
-        if not match_list:
-            match_list = [self._get_alarm_match(uve, exp, operand1_val,
-                operand2_val, is_operand2_json_val)]
-        return AlarmConditionMatch(
-            condition=AlarmCondition(operation=exp.operation,
-                operand1=exp.operand1, operand2=AlarmOperand2(
-                    uve_attribute=exp.operand2.uve_attribute,
-                    json_value=exp.operand2.json_value),
-                variables=exp.variables),
-            match=match_list)
-    # end _get_alarm_condition_match
+            if operand2 is not None:
+                json_operand2_val = self._get_json_value(operand2_val['value'])
+            return AlarmMatch(
+                json_operand1_value=self._get_json_value(operand1_val['value']),
+                json_operand2_value=json_operand2_val, json_variables=json_vars)
+
+        def condition_match(uve):
+            operand1_val = self._get_uve_attribute(uve, operand1)
+            if isinstance(operand1_val, dict) and \
+                operand1_val['status'] is False:
+                return None
+            if operand2 is None:
+                operand2_val = operand2_json
+            else:
+                operand2_val = self._get_uve_attribute(uve, operand2)
+                if isinstance(operand2_val, dict) and \
+                    operand2_val['status'] is False:
+                    return None
+            is_list1 = isinstance(operand1_val, list)
+            is_list2 = operand2 is not None and \
+                isinstance(operand2_val, list)
+            match_list = []
+            # both operand1_val and operand2_val are list
+            if is_list1 and is_list2:
+                if len(operand1_val) != len(operand2_val):
+                    return None
+                for val1, val2 in zip(operand1_val, operand2_val):
+                    if compare(decode(val1['value']), decode(val2['value'])):
+                        match_list.append(alarm_match(val1, val2))
+            # operand1_val is list and operand2_val is not list
+            elif is_list1:
+                val2 = json_val2
+                if operand2 is not None:
+                    val2 = decode(operand2_val['value'])
+                for val1 in operand1_val:
+                    if compare(decode(val1['value']), val2):
+                        match_list.append(alarm_match(val1, operand2_val))
+            # operand1_val is not list and operand2_val is list
+            elif is_list2:
+                val1 = decode(operand1_val['value'])
+                for val2 in operand2_val:
+                    if compare(val1, decode(val2['value'])):
+                        match_list.append(alarm_match(operand1_val, val2))
+            # Neither operand1_val nor operand2_val is a list
+            else:
+                val2 = json_val2
+                if operand2 is not None:
+                    val2 = decode(operand2_val['value'])
+                if compare(decode(operand1_val['value']), val2):
+                    match_list.append(alarm_match(operand1_val, operand2_val))
+            if not match_list:
+                return None
+            return AlarmConditionMatch(condition=condition, match=match_list)
+
+        return condition_match
+    # end _compile_alarm_expression
 
     def _get_uve_parent_fqname(self, table, uve_name, uve):
         try:
@@ -423,106 +453,180 @@ class AlarmProcessor(object):
             return None
     # end _get_uve_parent_fqname
 
-    def _evaluate_uve_for_alarms(self, alarm_cfg, uve_key, uve):
-        table, uve_name = uve_key.split(':', 1)
+    def compile_alarm_rules(self, alarm_cfg):
+        """
+        Compiles the rules of alarm_cfg into a function evaluate(uve_key,
+        uve) returning the or_list of the UVE for the alarm, or None if the
+        alarm is not raised. The operands, UVE paths and variables of the
+        rules are parsed here rather than on each evaluation.
+        """
+        parent_fqname = None
         # For alarms configured under project, the parent fq_name of the uve
         # should match with that of the alarm config
         if alarm_cfg.parent_type == 'project':
-            uve_parent_fqname = self._get_uve_parent_fqname(table,
-                uve_name, uve)
-            if uve_parent_fqname != alarm_cfg.get_parent_fq_name_str():
-                return None
-        or_list = []
-        for cfg_and_list in alarm_cfg.alarm_rules.or_list:
-            and_list = []
-            and_list_fail = False
-            for exp in cfg_and_list.and_list:
-                operand1_val = self._get_operand_value(uve, exp.operand1)
-                if isinstance(operand1_val, dict) and \
-                    operand1_val['status'] is False:
-                    and_list_fail = True
-                    break
-                if exp.operand2.json_value is not None:
-                    operand2_val = json.loads(exp.operand2.json_value)
-                    is_operand2_json_val = True
-                else:
-                    operand2_val = self._get_operand_value(uve,
-                        exp.operand2.uve_attribute)
-                    if isinstance(operand2_val, dict) and \
-                        operand2_val['status'] is False:
-                        and_list_fail = True
+            parent_fqname = alarm_cfg.get_parent_fq_name_str()
+        rules = [[self._compile_alarm_expression(exp)
+                  for exp in cfg_and_list.and_list]
+                 for cfg_and_list in alarm_cfg.alarm_rules.or_list]
+
+        def evaluate(uve_key, uve):
+            if parent_fqname is not None:
+                table, uve_name = uve_key.split(':', 1)
+                if self._get_uve_parent_fqname(table, uve_name, uve) != \
+                        parent_fqname:
+                    return None
+            or_list = []
+            for and_rules in rules:
+                and_list = []
+                for condition_match in and_rules:
+                    cond = condition_match(uve)
+                    if cond is None:
                         break
-                    is_operand2_json_val = False
-                if isinstance(operand1_val, list) or \
-                    (is_operand2_json_val is False and \
-                        isinstance(operand2_val, list)):
-                    match_list = []
-                    # both operand1_val and operand2_val are list
-                    if isinstance(operand1_val, list) and \
-                        (is_operand2_json_val is False and \
-                            isinstance(operand2_val, list)):
-                            if len(operand1_val) != len(operand2_val):
-                                and_list_fail = True
-                                break
-                            for i in range(0, len(operand1_val)):
-                                if self._compare_operand_vals(
-                                    operand1_val[i]['value'],
-                                    operand2_val[i]['value'],
-                                    exp.operation):
-                                    match_list.append(
-                                        self._get_alarm_match(
-                                        uve, exp, operand1_val[i],
-                                        operand2_val[i],
-                                        is_operand2_json_val))
-                    # operand1_val is list and operand2_val is not list
-                    elif isinstance(operand1_val, list):
-                        val2 = operand2_val
-                        if not is_operand2_json_val:
-                            val2 = operand2_val['value']
-                        for val1 in operand1_val:
-                            if self._compare_operand_vals(val1['value'],
-                                val2, exp.operation):
-                                match_list.append(self._get_alarm_match(
-                                    uve, exp, val1, operand2_val,
-                                    is_operand2_json_val))
-                    # operand1_val is not list and operand2_val is list
-                    elif is_operand2_json_val is False and \
-                        isinstance(operand2_val, list):
-                        for val2 in operand2_val:
-                            if self._compare_operand_vals(
-                                operand1_val['value'], val2['value'],
-                                exp.operation):
-                                match_list.append(self._get_alarm_match(
-                                    uve, exp, operand1_val, val2,
-                                    is_operand2_json_val))
-                    if match_list:
-                        and_list.append(self._get_alarm_condition_match(
-                            uve, exp, operand1_val, operand2_val,
-                            is_operand2_json_val, match_list))
-                    else:
-                        and_list_fail = True
-                        break
-                # Neither operand1_val nor operand2_val is a list
+                    and_list.append(cond)
                 else:
-                    val1 = operand1_val['value']
-                    val2 = operand2_val
-                    if not is_operand2_json_val:
-                        val2 = operand2_val['value']
-                    if self._compare_operand_vals(val1, val2, exp.operation):
-                        and_list.append(self._get_alarm_condition_match(
-                            uve, exp, operand1_val, operand2_val,
-                            is_operand2_json_val))
-                    else:
-                        and_list_fail = True
-                        break
-            if not and_list_fail:
-                or_list.append(AlarmAndList(and_list))
-        if or_list:
-            return or_list
-        return None
+                    or_list.append(AlarmAndList(and_list))
+            if or_list:
+                return or_list
+            return None
+
+        return evaluate
+    # end compile_alarm_rules
+
+    def _evaluate_uve_for_alarms(self, alarm_cfg, uve_key, uve):
+        return self.compile_alarm_rules(alarm_cfg)(uve_key, uve)
     # end _evaluate_uve_for_alarms
 
 
+class AlarmRuleIndex(object):
+    """ This class maintains the compiled rules of the configured alarms,
+    indexed by the UVE structs and attributes that the rules read
+    """
+
+    _WILDCARDS = ('*', '__key', '__value')
+
+    def __init__(self, alarm_config_db, logger):
+        self._logger = logger
+        aproc = AlarmProcessor(logger)
+        # uve-type or uve-key -> [(alarm_fqname, alarm, evaluate)]
+        self._alarms = {}
+        # uve-type or uve-key -> alarms to evaluate on any change
+        self._always = {}
+        # uve-type or uve-key -> {struct: {attribute or None: alarms}}
+        self._deps = {}
+        for cfg_key, alarms in alarm_config_db.iteritems():
+            table = cfg_key.split(':', 1)[0]
+            entries = self._alarms[cfg_key] = []
+            always = self._always[cfg_key] = set()
+            deps = self._deps[cfg_key] = {}
+            for alarm_fqname, alarm in alarms.iteritems():
+                evaluate = None
+                paths = None
+                # __call__ method overrides the generic alarm processing
+                # code, hence the attributes that it reads are not known
+                if not hasattr(alarm, '__call__'):
+                    try:
+                        evaluate = aproc.compile_alarm_rules(alarm.config())
+                        paths = self._rule_paths(table, alarm.config())
+                    except Exception as e:
+                        # process_alarms reports the error of the rules
+                        self._logger.debug('Alarm %s rules not compiled: '
+                            '%s' % (alarm_fqname, str(e)))
+                        evaluate = None
+                entries.append((alarm_fqname, alarm, evaluate))
+                if paths is None:
+                    always.add(alarm_fqname)
+                    continue
+                for typ, attr in paths:
+                    deps.setdefault(typ, {}).setdefault(attr, set()).add(
+                        alarm_fqname)
+    # end __init__
+
+    def _rule_paths(self, table, alarm_cfg):
+        """
+        Returns the (struct, attribute) pairs read by the rules of
+        alarm_cfg, attribute being None when the rules read any attribute
+        of the struct, or None when they read any struct of the UVE
+        """
+        paths = set()
+        if alarm_cfg.parent_type == 'project' and \
+                table == viz_constants.VM_TABLE:
+            paths.add(('UveVirtualMachineAgent', 'interface_list'))
+        for cfg_and_list in alarm_cfg.alarm_rules.or_list:
+            for exp in cfg_and_list.and_list:
+                operands = [exp.operand1] + list(exp.variables or [])
+                if exp.operand2.json_value is None:
+                    operands.append(exp.operand2.uve_attribute)
+                for operand in operands:
+                    attr_list = operand.split('.')
+                    if attr_list[0] in self._WILDCARDS:
+                        return None
+                    attr = None
+                    if len(attr_list) > 1 and \
+                            attr_list[1] not in self._WILDCARDS:
+                        attr = attr_list[1]
+                    paths.add((attr_list[0], attr))
+        return paths
+    # end _rule_paths
+
+    @staticmethod
+    def changed_attrs(old_uve, new_uve, types=None):
+        """
+        Returns the attributes of the structs in types (all the structs if
+        None) that differ between the contents old_uve and new_uve of a
+        UVE, as {struct: attributes}. The attributes of an added or
+        removed struct are None.
+        """
+        if types is None:
+            types = set(old_uve.keys()) | set(new_uve.keys())
+        changed = {}
+        for typ in types:
+            old = old_uve.get(typ)
+            new = new_uve.get(typ)
+            if old is new:
+                continue
+            if not isinstance(old, dict) or not isinstance(new, dict):
+                changed[typ] = None
+                continue
+            attrs = set(attr for attr, val in old.iteritems()
+                        if attr not in new or (new[attr] is not val and
+                                               new[attr] != val))
+            attrs.update(attr for attr in new if attr not in old)
+            if attrs:
+                changed[typ] = attrs
+        return changed
+    # end changed_attrs
+
+    def names(self, cfg_key):
+        return set(entry[0] for entry in self._alarms.get(cfg_key, []))
+    # end names
+
+    def alarms(self, cfg_key, changed=None):
+        """
+        Returns the (alarm_fqname, alarm, evaluate) of the alarms configured
+        for cfg_key that read any of the changed attributes, as returned by
+        changed_attrs, or of all of them if changed is None. evaluate is
+        None if the rules of the alarm could not be compiled.
+        """
+        entries = self._alarms.get(cfg_key, [])
+        if changed is None:
+            return entries
+        names = set(self._always.get(cfg_key, ()))
+        deps = self._deps.get(cfg_key, {})
+        for typ, attrs in changed.iteritems():
+            typ_deps = deps.get(typ)
+            if not typ_deps:
+                continue
+            if attrs is None:
+                for alarm_names in typ_deps.itervalues():
+                    names.update(alarm_names)
+                continue
+            names.update(typ_deps.get(None, ()))
+            for attr in attrs:
+                names.update(typ_deps.get(attr, ()))
+        return [entry for entry in entries if entry[0] in names]
+    # end alarms
+
+
 class AlarmStateMachine:
     tab_alarms_timer = {}
     last_timers_run = None
@@ -971,7 +1075,8 @@ class Controller(object):
             us_freq = 2
             ad_freq = 2
         self._us = UVEServer(redis_uve_list, self._logger,
-                self._conf.redis_password(), freq=us_freq)
+                self._conf.redis_password(), freq=us_freq,
+                batch_size=self._conf.redis_uve_batch_size())
 
         # Start AnalyticsDiscovery to monitor AlarmGen instances
         if self._conf.zk_list():
@@ -995,6 +1100,8 @@ class Controller(object):
         self._uveq = {}
         self._uveqf = {}
         self._alarm_config_change_map = {}
+        # Compiled rules of the alarm config, built on first use
+        self._alarm_rules = None
 
         # Create config handler to read/update alarm config
         rabbitmq_params = self._conf.rabbitmq_params()
@@ -1512,23 +1619,41 @@ class Controller(object):
                 self._logger.info("UVE Process saturated")
                 gevent.sleep(0)
 
-    def examine_uve_for_alarms(self, part, uve_key, uve):
+    def alarm_rules(self):
+        if self._alarm_rules is None:
+            self._alarm_rules = AlarmRuleIndex(
+                self._config_handler.alarm_config_db(), self._logger)
+        return self._alarm_rules
+    # end alarm_rules
+
+    def examine_uve_for_alarms(self, part, uve_key, uve, changed=None):
+        """
+        Evaluates the alarms configured for the UVE. If changed is not None,
+        only the alarms reading the changed attributes, as returned by
+        AlarmRuleIndex.changed_attrs, are evaluated and the others keep
+        their state.
+        """
         table = uve_key.split(':', 1)[0]
         if table in _OBJECT_TABLES:
             table_str = _OBJECT_TABLES[table].log_query_name
         else:
             table_str = table
-        alarm_cfg = self._config_handler.alarm_config_db()
+        alarm_rules = self.alarm_rules()
         prevt = UTCTimestampUsec()
         aproc = AlarmProcessor(self._logger)
-        # Process all alarms configured for this uve-type
-        for alarm_fqname, alarm_obj in \
-            alarm_cfg.get(table, {}).iteritems():
-            aproc.process_alarms(alarm_fqname, alarm_obj, uve_key, uve)
-        # Process all alarms configured for this uve-key
-        for alarm_fqname, alarm_obj in \
-            alarm_cfg.get(uve_key, {}).iteritems():
-            aproc.process_alarms(alarm_fqname, alarm_obj, uve_key, uve)
+        evaluated = set()
+        skipped = set()
+        # Process all alarms configured for this uve-type and for this
+        # uve-key
+        for cfg_key in (table, uve_key):
+            for alarm_fqname, alarm_obj, evaluate in \
+                    alarm_rules.alarms(cfg_key, changed):
+                aproc.process_alarms(alarm_fqname, alarm_obj, uve_key, uve,
+                                     evaluate)
+                evaluated.add(alarm_fqname)
+            if changed is not None:
+                skipped.update(alarm_rules.names(cfg_key))
+        skipped -= evaluated
         new_uve_alarms = aproc.uve_alarms
         self.tab_perf[table].record_call(UTCTimestampUsec() - prevt)
 
@@ -1537,6 +1662,9 @@ class Controller(object):
             self.tab_alarms[table] = {}
         if self.tab_alarms[table].has_key(uve_key):
             for nm, asm in self.tab_alarms[table][uve_key].iteritems():
+                # This type was not evaluated for this change
+                if nm in skipped:
+                    continue
                 # This type was present earlier, but is now gone
                 if not new_uve_alarms.has_key(nm):
                     del_types.append(nm)
@@ -1628,6 +1756,7 @@ class Controller(object):
     # end alarm_config_change_worker
 
     def alarm_config_change_callback(self, alarm_config_change_map):
+        self._alarm_rules = None
         for table, alarm_map in alarm_config_change_map.iteritems():
             try:
                 tamap = self._alarm_config_change_map[table]
@@ -1719,6 +1848,25 @@ class Controller(object):
 	uveq_trace.trace_msg(name="UVEQTrace",\
 		sandesh=self._sandesh)
 
+        # Read the changed UVEs in batches, grouped by the structs needed
+        uve_groups = {}
+        for uv, types in uves.iteritems():
+            uve_groups.setdefault(frozenset(types or ()), []).append(uv)
+        uve_reads = {}
+        for types, uv_list in uve_groups.iteritems():
+            filters = {}
+            if types:
+                filters["cfilt"] = {}
+                for typ in types:
+                    filters["cfilt"][typ] = set()
+            prevt = UTCTimestampUsec()
+            for uv, failures, uve_data in self._us.get_uves(uv_list, True,
+                                                            filters):
+                uve_reads[uv] = (failures, uve_data)
+            get_time = (UTCTimestampUsec() - prevt) / len(uv_list)
+            for uv in uv_list:
+                uve_reads[uv] += (get_time,)
+
         erruves = []
         for uv,types in uves.iteritems():
             tab = uv.split(':',1)[0]
@@ -1727,18 +1875,11 @@ class Controller(object):
 
 
             uve_name = uv.split(':',1)[1]
-            prevt = UTCTimestampUsec() 
-            filters = {}
-            if types:
-                filters["cfilt"] = {}
-                for typ in types.keys():
-                    filters["cfilt"][typ] = set()
-
-            failures, uve_data = self._us.get_uve(uv, True, filters)
+            failures, uve_data, get_time = uve_reads[uv]
             if failures:
                 erruves.append(uv)
                 success = False
-            self.tab_perf[tab].record_get(UTCTimestampUsec() - prevt)
+            self.tab_perf[tab].record_get(get_time)
             # Handling Agg UVEs
             if not part in self.ptab_info:
                 self._logger.error("Creating UVE table for part %s" % str(part))
@@ -1752,6 +1893,7 @@ class Controller(object):
             prevt = UTCTimestampUsec()
             output[uv] = {}
             touched = False
+            prev_uve = dict(self.ptab_info[part][tab][uve_name].values())
             if not types:
                 self.ptab_info[part][tab][uve_name].update(uve_data)
                 if len(self.ptab_info[part][tab][uve_name].removed()):
@@ -1859,8 +2001,14 @@ class Controller(object):
                             del self.tab_alarms[tab][uv][nm]
                         self.send_alarm_update(tab, uv)
                 continue
-            # Examine UVE to check if alarm need to be raised/deleted
-            self.examine_uve_for_alarms(part, uv, local_uve)
+            # Examine UVE to check if alarm need to be raised/deleted.
+            # Alarms were not evaluated on a UVE with no non-alarm structs,
+            # hence all of them are evaluated when it gets one.
+            changed = None
+            if set(prev_uve.keys()) - set(["UVEAlarms"]):
+                changed = AlarmRuleIndex.changed_attrs(prev_uve, local_uve,
+                                                       types or None)
+            self.examine_uve_for_alarms(part, uv, local_uve, changed)
         if success:
 	    uveq_trace = UVEQTrace()
 	    uveq_trace.uves = output.keys()
@@ -85,6 +85,7 @@ class CfgParser(object):
             'redis_server_port'  : 6379,
             'redis_password'     : None,
             'redis_uve_list'    : ['127.0.0.1:6379'],
+            'redis_uve_batch_size' : 100,
         }
 
         keystone_opts = {
@@ -160,6 +161,8 @@ class CfgParser(object):
             help="Redis server port")
         parser.add_argument("--redis_password",
             help="Redis server password")
+        parser.add_argument("--redis_uve_batch_size", type=int,
+            help="Number of UVEs read with one pipelined redis lookup")
         parser.add_argument("--kafka_broker_list",
             help="List of bootstrap kafka brokers in ip:port format",
             nargs="+")
@@ -285,6 +288,9 @@ class CfgParser(object):
     def redis_server_port(self):
         return self._args.redis_server_port
 
+    def redis_uve_batch_size(self):
+        return self._args.redis_uve_batch_size
+
     def host_ip(self):
         return self._args.host_ip
 
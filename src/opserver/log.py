@@ -19,6 +19,7 @@ import logging
 import logging.handlers
 import time
 import re
+import tempfile
 from multiprocessing import Process
 from opserver_util import OpServerUtils
 from sandesh_common.vns.ttypes import Module
@@ -581,12 +582,23 @@ class LogQuerier(object):
     #end output
 
     def read_result(self, result_gen):
+        """
+        Reads the whole result and returns an iterator over its rows. The
+        rows are spooled to a temporary file rather than kept in memory,
+        so that large results do not grow the process.
+        """
         if not result_gen:
             return
-        result_list = []
+        spool = tempfile.TemporaryFile()
+        nrows = 0
         for r in result_gen:
-            result_list.append(r)
-        return result_list
+            spool.write(json.dumps(r) + '\n')
+            nrows += 1
+        if nrows == 0:
+            spool.close()
+            return []
+        spool.seek(0)
+        return (json.loads(line) for line in spool)
     # end read_result
 
     def display(self, result):
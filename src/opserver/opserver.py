@@ -135,11 +135,22 @@ def obj_to_dict(obj):
 # end obj_to_dict
 
 
+_redis_query_pools = {}
+
+def redis_query_handle(host, port, redis_password):
+    # All the query path redis calls to a server share its connections
+    pool = _redis_query_pools.get((host, port, redis_password))
+    if pool is None:
+        pool = redis.ConnectionPool(db=0, host=host, port=port,
+                                    password=redis_password)
+        _redis_query_pools[(host, port, redis_password)] = pool
+    return redis.StrictRedis(connection_pool=pool)
+# end redis_query_handle
+
+
 def redis_query_start(host, port, redis_password, qid, inp, columns):
-    redish = redis.StrictRedis(db=0, host=host, port=port,
-                                   password=redis_password)
-    for key, value in inp.items():
-        redish.hset("QUERY:" + qid, key, json.dumps(value))
+    redish = redis_query_handle(host, port, redis_password)
+    query = dict((key, json.dumps(value)) for key, value in inp.items())
     col_list = []
     if columns is not None:
         for col in columns:
@@ -147,11 +158,14 @@ def redis_query_start(host, port, redis_password, qid, inp, columns):
             col_list.append(m._asdict())
     query_metadata = {}
     query_metadata['enqueue_time'] = OpServerUtils.utc_timestamp_usec()
-    redish.hset("QUERY:" + qid, 'query_metadata', json.dumps(query_metadata))
-    redish.hset("QUERY:" + qid, 'enqueue_time',
-                OpServerUtils.utc_timestamp_usec())
-    redish.hset("QUERY:" + qid, 'table_schema', json.dumps(col_list))
-    redish.lpush("QUERYQ", qid)
+    query['query_metadata'] = json.dumps(query_metadata)
+    query['enqueue_time'] = OpServerUtils.utc_timestamp_usec()
+    query['table_schema'] = json.dumps(col_list)
+    # The query must be complete before the query engine dequeues it
+    ppe = redish.pipeline(transaction=False)
+    ppe.hmset("QUERY:" + qid, query)
+    ppe.lpush("QUERYQ", qid)
+    ppe.execute()
 
     res = redish.blpop("REPLY:" + qid, 10)
     if res is None:
@@ -164,9 +178,34 @@ def redis_query_start(host, port, redis_password, qid, inp, columns):
 # end redis_query_start
 
 
+def redis_query_wait(host, port, redis_password, qid, timeout=10):
+    """
+    Waits for the query engine to report the query as complete or failed
+    and returns its final progress, or None if no status was reported for
+    timeout seconds.
+    The statuses are popped from REPLY:<qid> as they are pushed, and the
+    final one is put back for redis_query_status. Only for queries whose
+    status is not read by anyone else, like synchronous ones.
+    """
+    redish = redis_query_handle(host, port, redis_password)
+    while True:
+        res = redish.blpop("REPLY:" + qid, timeout)
+        if res is None:
+            return None
+        prg = int(json.loads(res[1])["progress"])
+        if (prg < 0) or (prg == 100):
+            break
+    # The query engine may already have set the expiry of the emptied list
+    ppe = redish.pipeline(transaction=False)
+    ppe.rpush("REPLY:" + qid, res[1])
+    ppe.expire("REPLY:" + qid, 300)
+    ppe.execute()
+    return prg
+# end redis_query_wait
+
+
 def redis_query_status(host, port, redis_password, qid):
-    redish = redis.StrictRedis(db=0, host=host, port=port,
-                               password=redis_password)
+    redish = redis_query_handle(host, port, redis_password)
     resp = {"progress": 0}
     chunks = []
     # For now, the number of chunks will be always 1
@@ -189,61 +228,53 @@ def redis_query_status(host, port, redis_password, qid):
 # end redis_query_status
 
 
-def redis_query_chunk_iter(host, port, redis_password, qid, chunk_id):
-    redish = redis.StrictRedis(db=0, host=host, port=port,
-                               password=redis_password)
+# Number of result rows read from redis with one LRANGE
+_QUERY_RESULT_WINDOW = 1000
 
-    iters = 0
-    fin = False
+def redis_query_chunk_iter(host, port, redis_password, qid, chunk_id,
+                           window=_QUERY_RESULT_WINDOW):
+    """
+    Generator of the result rows of a query, in lists of at most window
+    rows. The query engine writes the result in the RESULT:<qid>:<n>
+    lists, each of them is read in LRANGE windows and deleted once read.
+    """
+    redish = redis_query_handle(host, port, redis_password)
 
-    while not fin:
-        #import pdb; pdb.set_trace()
+    iters = 0
+    while True:
+        rkey = "RESULT:" + qid + ":" + str(iters)
         # Keep the result line valid while it is being read
-        redish.persist("RESULT:" + qid + ":" + str(iters))
-        elems = redish.lrange("RESULT:" + qid + ":" + str(iters), 0, -1)
-        yield elems
-        if elems == []:
-            fin = True
-        else:
-            redish.delete("RESULT:" + qid + ":" + str(iters), 0, -1)
+        ppe = redish.pipeline(transaction=False)
+        ppe.persist(rkey)
+        ppe.lrange(rkey, 0, window - 1)
+        elems = ppe.execute()[1]
+        if not elems:
+            break
+        start = 0
+        while elems:
+            yield elems
+            start += len(elems)
+            if len(elems) < window:
+                break
+            elems = redish.lrange(rkey, start, start + window - 1)
+        redish.delete(rkey)
         iters += 1
-
-    return
 # end redis_query_chunk_iter
 
 
 def redis_query_chunk(host, port, redis_password, qid, chunk_id):
-    res_iter = redis_query_chunk_iter(host, port, redis_password, qid, chunk_id)
-
-    dli = u''
-    starter = True
-    fin = False
+    # The rows are sent as they are read, one line per window, so that
+    # neither the result nor a line of it grows with the result size
     yield u'{"value": ['
-    outcount = 0
-    while not fin:
-
-        #import pdb; pdb.set_trace()
-        # Keep the result line valid while it is being read
-        elems = res_iter.next()
-
-        fin = True
-        for elem in elems:
-            fin = False
-            outcount += 1
-            if starter:
-                dli += '\n' + elem
-                starter = False
-            else:
-                dli += ', ' + elem
-        if not fin:
-            yield dli + '\n'
-            dli = u''
-
-    if outcount == 0:
-        yield '\n' + u']}'
+    sep = u'\n'
+    for elems in redis_query_chunk_iter(host, port, redis_password, qid,
+                                        chunk_id):
+        yield sep + u', '.join(elems) + u'\n'
+        sep = u', '
+    if sep == u'\n':
+        yield u'\n]}'
     else:
         yield u']}'
-    return
 # end redis_query_chunk
 
 
@@ -278,18 +309,14 @@ def redis_query_result_dict(host, port, redis_password, qid):
     prg = int(stat["progress"])
     res = []
 
-    if (prg < 0) or (prg == 100):
-
-        done = False
-        gen = redis_query_result(host, port, redis_password, qid)
-        result = u''
-        while not done:
-            try:
-                result += gen.next()
-                #import pdb; pdb.set_trace()
-            except StopIteration:
-                done = True
-        res = (json.loads(result))['value']
+    if prg == 100:
+        # Decode the rows as they are read instead of joining the whole
+        # result into one string first
+        for chunk in stat['chunks']:
+            chunk_id = int(chunk['href'].rsplit('/', 1)[1])
+            for elems in redis_query_chunk_iter(host, port, redis_password,
+                                                qid, chunk_id):
+                res.extend(json.loads(elem) for elem in elems)
 
     return prg, res
 # end redis_query_result_dict
@@ -632,7 +659,12 @@ class OpServer(object):
                                  self._logger,
                                  self._args.redis_password,
                                  self._uvedbstream, self._usecache,
-                                 freq = us_freq)
+                                 freq = us_freq,
+                                 batch_size = self._args.redis_uve_batch_size,
+                                 parse_cache_size = \
+                                     self._args.redis_uve_parse_cache_size,
+                                 result_cache_size = \
+                                     self._args.redis_uve_result_cache_size)
         self._state_server.update_redis_list(self.redis_uve_list)
 
         self._analytics_links = ['uves', 'uve-types', 'tables',
@@ -883,6 +915,9 @@ class OpServer(object):
             'redis_query_port'   : 6379,
             'redis_password'       : None,
             'redis_uve_list'     : ['127.0.0.1:6379'],
+            'redis_uve_batch_size' : 100,
+            'redis_uve_parse_cache_size' : 100000,
+            'redis_uve_result_cache_size' : 10000,
         }
         database_opts = {
             'cluster_id'     : '',
@@ -975,6 +1010,12 @@ class OpServer(object):
         parser.add_argument("--redis_uve_list",
             help="List of redis-uve in ip:port format. For internal use only",
             nargs="+")
+        parser.add_argument("--redis_uve_batch_size", type=int,
+            help="Number of UVEs read with one pipelined redis lookup")
+        parser.add_argument("--redis_uve_parse_cache_size", type=int,
+            help="Number of parsed UVE attributes cached, 0 to disable")
+        parser.add_argument("--redis_uve_result_cache_size", type=int,
+            help="Number of aggregated UVEs cached, 0 to disable")
         parser.add_argument(
             "--worker_id",
             help="Worker Id")
@@ -1397,31 +1438,18 @@ class OpServer(object):
     # end _query
 
     def _sync_query(self, request, qid):
-        # In Sync mode, Keep polling query status until final result is
-        # available
+        # In Sync mode, wait for the query engine to report the final
+        # status of the query
         try:
-            self._logger.info("Polling %s for query result" % ("REPLY:" + qid))
-            prg = 0
-            done = False
-            while not done:
-                gevent.sleep(1)
-                resp = redis_query_status(host='127.0.0.1',
-                                          port=int(
-                                              self._args.redis_query_port),
-                                          redis_password=self._args.redis_password,
-                                          qid=qid)
-
-                # We want to print progress only if it has changed
-                if int(resp["progress"]) == prg:
-                    continue
-
-                self._logger.info(
-                    "Query Progress is %s time %d" % (str(resp), time.time()))
-                prg = int(resp["progress"])
-
-                # Either there was an error, or the query is complete
-                if (prg < 0) or (prg == 100):
-                    done = True
+            self._logger.info("Waiting on %s for query result" % ("REPLY:" + qid))
+            prg = None
+            while prg is None:
+                prg = redis_query_wait(host='127.0.0.1',
+                                       port=int(self._args.redis_query_port),
+                                       redis_password=self._args.redis_password,
+                                       qid=qid)
+            self._logger.info(
+                "Query Progress is %d time %d" % (prg, time.time()))
 
             if prg < 0:
                 cod = -prg
@@ -1497,9 +1525,9 @@ class OpServer(object):
             bottle.abort(code, msg)
         queries = {}
         try:
-            redish = redis.StrictRedis(db=0, host='127.0.0.1',
-                                       port=int(self._args.redis_query_port),
-                                       password=self._args.redis_password)
+            redish = redis_query_handle('127.0.0.1',
+                                        int(self._args.redis_query_port),
+                                        self._args.redis_password)
             pending_queries = redish.lrange('QUERYQ', 0, -1)
             pending_queries_info = []
             for query_id in pending_queries:
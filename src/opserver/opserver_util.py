@@ -497,12 +497,14 @@ class OpServerUtils(object):
 
     @staticmethod
     def parse_query_result(result):
+        # The result is read and decoded one line, i.e. one window of
+        # rows, at a time
         done = False
         resit = result.iter_lines()
         while not done:
             try:
                 ln = resit.next()
-                if ln == '{"value": [':
+                if not ln or ln == '{"value": [':
                     continue
                 if ln == ']}':
                     done = True
@@ -525,7 +527,9 @@ class OpServerUtils(object):
     @staticmethod
     def get_query_result(opserver_ip, opserver_port, qid, user, password,
                          time_out=None):
-        sleep_interval = 0.5
+        # Poll quickly at first so that short queries return early
+        sleep_interval = 0.01
+        max_sleep_interval = 0.5
         time_left = time_out
         while True:
             url = OpServerUtils.opserver_query_url(
@@ -548,6 +552,7 @@ class OpServerUtils(object):
                         return
 
                 gevent.sleep(sleep_interval)
+                sleep_interval = min(sleep_interval * 2, max_sleep_interval)
                 continue
             else:
                 for chunk in status['chunks']:
@@ -446,6 +446,7 @@ class UveStreamer(gevent.Greenlet):
         self._parts = {}
         self._rpass = rpass
         self._ccb = None
+        self._chcb = None
         self._uvedbcache = UveCacheProcessor(self._logger, rpass)
         self._USP_class = USP_class
         self._tablefilt = tablefilt
@@ -459,6 +460,8 @@ class UveStreamer(gevent.Greenlet):
         return self._uvedbcache.get_cache_list(utab, filters, patterns, keysonly)
 
     def clear_callback(self, key):
+        if callable(self._chcb):
+            self._chcb(key)
         if self._q:
             dt = {'key':key, 'type':None}
             msg = {'event': 'update', 'data':json.dumps(dt)}
@@ -466,6 +469,8 @@ class UveStreamer(gevent.Greenlet):
 
     def partition_callback(self, partition, pi, key, type, value):
         # gevent is non-premptive; we don't need locks
+        if callable(self._chcb):
+            self._chcb(key)
         if self._q:
             dt = {'key':key, 'type':type}
             if not type is None:
@@ -482,6 +487,10 @@ class UveStreamer(gevent.Greenlet):
     def set_cleanup_callback(self, cb):
         self._ccb = cb
 
+    def set_change_callback(self, cb):
+        # cb(key) is called whenever the given UVE changes or is removed
+        self._chcb = cb
+
     def _run(self):
         inputs = [ self._rfile ]
         outputs = [ ]
@@ -9,6 +9,8 @@
 from sandesh.redis.ttypes import RedisUveInfo, RedisUVERequest, RedisUVEResponse
 from sandesh.analytics.ttypes import DbInfoSetRequest, \
      DbInfoGetRequest, DbInfoResponse, DbInfo
+from sandesh.analytics_database.ttypes import UVECacheStats, \
+     UVECacheStatsReq, UVECacheStatsResp
 
 class OpserverSandeshReqImpl(object):
     def __init__(self, opserver):
@@ -16,6 +18,7 @@ class OpserverSandeshReqImpl(object):
         RedisUVERequest.handle_request = self.handle_redis_uve_info_req
         DbInfoSetRequest.handle_request = self.handle_db_info_set_req
         DbInfoGetRequest.handle_request = self.handle_db_info_get_req
+        UVECacheStatsReq.handle_request = self.handle_uve_cache_stats_req
     # end __init__
 
     def handle_redis_uve_info_req(self, req):
@@ -44,4 +47,16 @@ class OpserverSandeshReqImpl(object):
         self.send_db_info_resp(req.context())
     # end handle_db_info_get_req
 
+    def handle_uve_cache_stats_req(self, req):
+        caches = []
+        uve_server = self._opserver.get_uve_server()
+        for name, entries, nbytes, hits, misses in uve_server.cache_stats():
+            lookups = hits + misses
+            caches.append(UVECacheStats(name=name, entries=entries,
+                bytes=nbytes, hits=hits, misses=misses,
+                hit_rate=float(hits) / lookups if lookups else 0.0))
+        resp = UVECacheStatsResp(caches)
+        resp.response(req.context())
+    # end handle_uve_cache_stats_req
+
 # end class OpserverSandeshReqImpl
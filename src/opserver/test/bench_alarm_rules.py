@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2017 Juniper Networks, Inc. All rights reserved.
+#
+"""Benchmark of alarm rule evaluation in alarmgen on UVE updates
+
+Usage: python bench_alarm_rules.py [--alarms N] [--structs N]
+                                   [--attributes N] [--updates N]
+
+Configures alarms that each compare one attribute of a UVE struct, then
+applies updates that change one attribute of the UVE at a time. The
+interpreted run evaluates every alarm from its config on each update, as
+examine_uve_for_alarms used to, the compiled run evaluates every alarm with
+its compiled rules and the indexed run only evaluates the compiled rules of
+the alarms reading the changed attribute.
+"""
+import argparse
+import logging
+import time
+
+from vnc_api.gen.resource_client import Alarm
+from vnc_api.gen.resource_xsd import AlarmExpression, AlarmOperand2, \
+    AlarmAndList, AlarmOrList, UveKeysType, IdPermsType
+from opserver.alarmgen import AlarmProcessor, AlarmRuleIndex
+from opserver.plugins.alarm_base import AlarmBase
+
+_TABLE = 'ObjectVRouter'
+
+
+def _alarm_config(args):
+    alarms = {}
+    for i in xrange(args.alarms):
+        name = 'bench-alarm%d' % i
+        attr = 'Struct%d.attr%d' % (i % args.structs, i % args.attributes)
+        exp = AlarmExpression(operation='>=', operand1=attr,
+                              operand2=AlarmOperand2(json_value='100'),
+                              variables=['Struct%d.name' % (i % args.structs)])
+        alarms['default-global-system-config:' + name] = AlarmBase(
+            config=Alarm(name=name, uve_keys=UveKeysType(['vrouter']),
+                         alarm_severity=AlarmBase.ALARM_MAJOR,
+                         alarm_rules=AlarmOrList([AlarmAndList([exp])]),
+                         id_perms=IdPermsType(enable=True, description=name),
+                         parent_type='global-system-config',
+                         fq_name=['default-global-system-config', name]))
+    return {_TABLE: alarms}
+
+
+def _updates(args):
+    uve = dict(('Struct%d' % s,
+                dict([('name', '"vr%d"' % s)] +
+                     [('attr%d' % a, a) for a in xrange(args.attributes)]))
+               for s in xrange(args.structs))
+    updates = []
+    for i in xrange(args.updates):
+        new_uve = dict(uve)
+        typ = 'Struct%d' % (i % args.structs)
+        new_uve[typ] = dict(uve[typ])
+        new_uve[typ]['attr%d' % (i % args.attributes)] = i % 200
+        updates.append((uve, new_uve))
+        uve = new_uve
+    return updates
+
+
+def run(name, args, alarm_cfg, updates):
+    uve_key = _TABLE + ':bench-vr'
+    index = AlarmRuleIndex(alarm_cfg, logging)
+    evaluated = 0
+    start = time.time()
+    for old_uve, new_uve in updates:
+        aproc = AlarmProcessor(logging)
+        if name == 'interpreted':
+            alarms = [(nm, alarm, None)
+                      for nm, alarm in alarm_cfg[_TABLE].iteritems()]
+        elif name == 'compiled':
+            alarms = index.alarms(_TABLE)
+        else:
+            alarms = index.alarms(_TABLE,
+                AlarmRuleIndex.changed_attrs(old_uve, new_uve))
+        for alarm_fqname, alarm, evaluate in alarms:
+            aproc.process_alarms(alarm_fqname, alarm, uve_key, new_uve,
+                                 evaluate)
+        evaluated += len(alarms)
+    return time.time() - start, evaluated
+
+
+def main(args_str=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--alarms', type=int, default=200)
+    parser.add_argument('--structs', type=int, default=5)
+    parser.add_argument('--attributes', type=int, default=20)
+    parser.add_argument('--updates', type=int, default=2000)
+    args = parser.parse_args(args_str)
+
+    alarm_cfg = _alarm_config(args)
+    updates = _updates(args)
+    print '%-12s %10s %12s %14s %10s' % (
+        'rules', 'time(s)', 'updates/s', 'alarms eval/s', 'evaluated')
+    for name in ('interpreted', 'compiled', 'indexed'):
+        elapsed, evaluated = run(name, args, alarm_cfg, updates)
+        print '%-12s %10.3f %12.0f %14.0f %10d' % (
+            name, elapsed, len(updates) / elapsed, evaluated / elapsed,
+            evaluated)
+# end main
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2017 Juniper Networks, Inc. All rights reserved.
+#
+"""Benchmark of batched UVE reads in UVEServer against a local redis
+
+Usage: python bench_uveserver_get_uves.py [--redis-port N] [--uves N]
+                                          [--origins N] [--instances N]
+                                          [--batch-sizes N [N ...]]
+
+Fills redis db 1 with VirtualMachineInterface UVEs the way the collector
+does, then reads all of them with one get_uve call per key, as
+multi_uve_get used to, and with get_uves in batches. With more than one
+instance, the same redis is used as several collector instances.
+"""
+import argparse
+import time
+
+import gevent.monkey
+gevent.monkey.patch_all()
+import redis
+
+from opserver.uveserver import UVEServer, RedisInst, RedisInstKey
+
+
+class NullLogger(object):
+    def debug(self, *args, **kwargs):
+        pass
+
+    error = info = debug
+
+
+def _populate(args):
+    redish = redis.StrictRedis(port=args.redis_port, db=1)
+    redish.flushdb()
+    ppe = redish.pipeline()
+    keys = []
+    for i in xrange(args.uves):
+        key = 'ObjectVMITable:default-domain:bench:vmi%d' % i
+        keys.append(key)
+        for j in xrange(args.origins):
+            origin = 'node%d:Compute:contrail-vrouter-agent:0:' \
+                'UveVMInterfaceAgent' % j
+            ppe.sadd('ORIGINS:' + key, origin)
+            ppe.hmset('VALUES:' + key + ':' + origin, {
+                'vm_name': '<vm_name type="string">vm%d</vm_name>' % i,
+                'active': '<active type="bool">true</active>',
+                'ip_address':
+                    '<ip_address type="string">10.0.%d.%d</ip_address>' %
+                    (i / 250, i % 250)})
+        if i % 1000 == 999:
+            ppe.execute()
+    ppe.execute()
+    return keys
+
+
+def _uve_server(args, batch_size):
+    uve_server = UVEServer([], NullLogger(), batch_size=batch_size)
+    for i in range(args.instances):
+        r_inst = RedisInst()
+        r_inst.redis_handle = redis.StrictRedis(port=args.redis_port, db=1)
+        r_inst.collector_pid = 'bench:Analytics:contrail-collector:%d' % i
+        uve_server._redis_uve_map[RedisInstKey(ip='127.0.0.1', port=i)] = \
+            r_inst
+    return uve_server
+
+
+def run(args, keys, batch_size):
+    uve_server = _uve_server(args, batch_size or 1)
+    start = time.time()
+    if batch_size is None:
+        count = sum(1 for key in keys if uve_server.get_uve(key, False)[1])
+    else:
+        count = sum(1 for _, _, uve in uve_server.get_uves(keys, False)
+                    if uve)
+    return time.time() - start, count
+
+
+def main(args_str=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--redis-port', type=int, default=6379)
+    parser.add_argument('--uves', type=int, default=20000)
+    parser.add_argument('--origins', type=int, default=2)
+    parser.add_argument('--instances', type=int, default=2)
+    parser.add_argument('--batch-sizes', type=int, nargs='+',
+                        default=[10, 100, 1000])
+    args = parser.parse_args(args_str)
+
+    keys = _populate(args)
+    print '%-16s %10s %12s %10s' % ('read', 'time(s)', 'uves/s', 'uves')
+    for batch_size in [None] + args.batch_sizes:
+        elapsed, count = run(args, keys, batch_size)
+        name = 'get_uve' if batch_size is None else 'batch %d' % batch_size
+        print '%-16s %10.3f %12.0f %10d' % (name, elapsed,
+                                            len(keys) / elapsed, count)
+# end main
+
+if __name__ == '__main__':
+    main()
@@ -20,7 +20,7 @@ from kafka.common import OffsetAndMessage,Message
 
 from vnc_api.gen.resource_client import Alarm
 from vnc_api.gen.resource_xsd import AlarmExpression, AlarmOperand2, \
-    AlarmAndList, AlarmOrList, UveKeysType
+    AlarmAndList, AlarmOrList, UveKeysType, IdPermsType
 from pysandesh.util import UTCTimestampUsec
 from pysandesh.gen_py.sandesh_alarm.ttypes import SandeshAlarmAckRequest, \
     SandeshAlarmAckResponseCode
@@ -33,7 +33,8 @@ from opserver.sandesh.alarmgen_ctrl.ttypes import UVEAlarmOperState, \
 from opserver.uveserver import UVEServer, RedisInfo
 from opserver.partition_handler import PartitionHandler, UveStreamProc, \
     UveStreamer, UveStreamPart, PartInfo
-from opserver.alarmgen import Controller, AlarmStateMachine, AlarmProcessor
+from opserver.alarmgen import Controller, AlarmStateMachine, AlarmProcessor, \
+    AlarmRuleIndex, AGTabStats
 from opserver.alarmgen_cfg import CfgParser
 from opserver.plugins.alarm_base import AlarmBase
 
@@ -116,14 +117,16 @@ class Mock_get_part(Mock_base):
             return {}
         return self.store[key]
         
-class Mock_get_uve(Mock_base):
+class Mock_get_uves(Mock_base):
     def __init__(self, *args, **kwargs):
         Mock_base.__init__(self, *args, **kwargs)
 
-    def __call__(self, key, flat, filters):
-        if key not in self.store:
-            return False, {}
-        return False, self.store[key]
+    def __call__(self, keys, flat, filters):
+        for key in keys:
+            if key not in self.store:
+                yield key, False, {}
+            else:
+                yield key, False, self.store[key]
 
 class Mock_get_messages(Mock_base):
     def __init__(self, *args, **kwargs):
@@ -373,13 +376,13 @@ class TestAlarmGen(unittest.TestCase, TestChecker):
     @mock.patch('opserver.alarmgen.Controller.send_agg_uve')
     @mock.patch.object(UVEServer, 'redis_instances')
     @mock.patch.object(UVEServer, 'get_part')
-    @mock.patch.object(UVEServer, 'get_uve')
+    @mock.patch.object(UVEServer, 'get_uves')
     @mock.patch('opserver.partition_handler.SimpleConsumer', autospec=True)
     # Test partition Initialization, including boot-straping using UVEServer
     # Test partition shutdown as well
     def test_00_init(self,
             mock_SimpleConsumer,
-            mock_get_uve, mock_get_part, mock_redis_instances,
+            mock_get_uves, mock_get_part, mock_redis_instances,
             mock_send_agg_uve, mock_clear_agg_uve, mock_reconnect_agg_uve):
 
         m_get_part = Mock_get_part() 
@@ -388,9 +391,9 @@ class TestAlarmGen(unittest.TestCase, TestChecker):
                 { "ObjectXX:uve1" : {"type1":{}}  }}
         mock_get_part.side_effect = m_get_part
 
-        m_get_uve = Mock_get_uve()
-        m_get_uve["ObjectXX:uve1"] = {"type1": {"xx": 0}}
-        mock_get_uve.side_effect = m_get_uve
+        m_get_uves = Mock_get_uves()
+        m_get_uves["ObjectXX:uve1"] = {"type1": {"xx": 0}}
+        mock_get_uves.side_effect = m_get_uves
 
         m_redis_instances = Mock_redis_instances()
         m_redis_instances[("127.0.0.1",0)] = 0
@@ -416,13 +419,13 @@ class TestAlarmGen(unittest.TestCase, TestChecker):
     @mock.patch('opserver.alarmgen.Controller.send_agg_uve')
     @mock.patch.object(UVEServer, 'redis_instances')
     @mock.patch.object(UVEServer, 'get_part')
-    @mock.patch.object(UVEServer, 'get_uve')
+    @mock.patch.object(UVEServer, 'get_uves')
     @mock.patch('opserver.partition_handler.SimpleConsumer', autospec=True)
     # Test initialization followed by read from Kafka
     # Also test for deletetion of a boot-straped UVE
     def test_01_rxmsg(self,
             mock_SimpleConsumer,
-            mock_get_uve, mock_get_part, mock_redis_instances,
+            mock_get_uves, mock_get_part, mock_redis_instances,
             mock_send_agg_uve, mock_clear_agg_uve, mock_reconnect_agg_uve):
 
         m_get_part = Mock_get_part() 
@@ -432,9 +435,9 @@ class TestAlarmGen(unittest.TestCase, TestChecker):
         mock_get_part.side_effect = m_get_part
 
         # Boostraped UVE ObjectXX:uve1 is not present!
-        m_get_uve = Mock_get_uve()
-        m_get_uve["ObjectYY:uve2"] = {"type2": {"yy": 1}}
-        mock_get_uve.side_effect = m_get_uve
+        m_get_uves = Mock_get_uves()
+        m_get_uves["ObjectYY:uve2"] = {"type2": {"yy": 1}}
+        mock_get_uves.side_effect = m_get_uves
 
         m_redis_instances = Mock_redis_instances()
         m_redis_instances[("127.0.0.1",0)] = 0
@@ -459,13 +462,13 @@ class TestAlarmGen(unittest.TestCase, TestChecker):
     @mock.patch('opserver.alarmgen.Controller.send_agg_uve')
     @mock.patch.object(UVEServer, 'redis_instances')
     @mock.patch.object(UVEServer, 'get_part')
-    @mock.patch.object(UVEServer, 'get_uve')
+    @mock.patch.object(UVEServer, 'get_uves')
     @mock.patch('opserver.partition_handler.SimpleConsumer', autospec=True)
     # Test late bringup of collector
     # Also test collector shutdown
     def test_02_collectorha(self,
             mock_SimpleConsumer,
-            mock_get_uve, mock_get_part, mock_redis_instances,
+            mock_get_uves, mock_get_part, mock_redis_instances,
             mock_send_agg_uve, mock_clear_agg_uve, mock_reconnect_agg_uve):
 
         m_get_part = Mock_get_part() 
@@ -477,11 +480,11 @@ class TestAlarmGen(unittest.TestCase, TestChecker):
                 { "ObjectZZ:uve3" : { "type3":{}}  }}
         mock_get_part.side_effect = m_get_part
 
-        m_get_uve = Mock_get_uve()
-        m_get_uve["ObjectXX:uve1"] = {"type1": {"xx": 0}}
-        m_get_uve["ObjectYY:uve2"] = {"type2": {"yy": 1}}
-        m_get_uve["ObjectZZ:uve3"] = {"type3": {"zz": 2}}
-        mock_get_uve.side_effect = m_get_uve
+        m_get_uves = Mock_get_uves()
+        m_get_uves["ObjectXX:uve1"] = {"type1": {"xx": 0}}
+        m_get_uves["ObjectYY:uve2"] = {"type2": {"yy": 1}}
+        m_get_uves["ObjectZZ:uve3"] = {"type3": {"zz": 2}}
+        mock_get_uves.side_effect = m_get_uves
 
         m_redis_instances = Mock_redis_instances()
         m_redis_instances[("127.0.0.1",0)] = 0
@@ -514,7 +517,7 @@ class TestAlarmGen(unittest.TestCase, TestChecker):
         
         # Withdraw collector 127.0.0.1
         self.assertTrue(self.checker_dict([1, "ObjectXX", "uve1"], self._ag.ptab_info))
-        del m_get_uve["ObjectXX:uve1"]
+        del m_get_uves["ObjectXX:uve1"]
         del m_redis_instances[("127.0.0.1",0)]
         self.assertTrue(self.checker_dict([1, "ObjectXX", "uve1"], self._ag.ptab_info, False))
 
@@ -4209,6 +4212,68 @@ class TestAlarmGen(unittest.TestCase, TestChecker):
                 asm.is_new_alarm_same(new_alarm_obj))
     # end test_06_is_new_alarm_same
 
+    @mock.patch.object(Controller, 'send_alarm_update')
+    def test_07_examine_uve_for_changed_attrs(self, mock_send_alarm_update):
+        alarm_cfg = {}
+        for name, operand1 in [('alarm1', 'A.x'), ('alarm2', 'B.y'),
+                               ('alarm3', 'A')]:
+            alarm_cfg['default-global-system-config:' + name] = AlarmBase(
+                config=self.get_alarm_config_object({
+                    'name': name,
+                    'uve_keys': ['virtual-network'],
+                    'alarm_severity': AlarmBase.ALARM_MAJOR,
+                    'alarm_rules': {
+                        'or_list': [{
+                            'and_list': [{
+                                'operand1': operand1,
+                                'operation': '!=',
+                                'operand2': {'json_value': 'null'}
+                            }]
+                        }]
+                    },
+                    'kwargs': {
+                        'parent_type': 'global-system-config',
+                        'fq_name': ['default-global-system-config', name],
+                        'id_perms': IdPermsType(enable=True,
+                                                description=name)
+                    }
+                }))
+        table = 'ObjectVNTable'
+        uve_key = table + ':default-domain:admin:vn1'
+        self._ag._config_handler.alarm_config_db = mock.Mock(
+            return_value={table: alarm_cfg})
+        self._ag.alarm_config_change_callback({table: {}})
+        self._ag.tab_perf[table] = AGTabStats()
+
+        def evaluated_alarms(uve, changed):
+            with mock.patch.object(AlarmProcessor, 'process_alarms',
+                    autospec=True,
+                    side_effect=AlarmProcessor.process_alarms) as mock_proc:
+                self._ag.examine_uve_for_alarms(0, uve_key, uve, changed)
+            return sorted(args[1].rsplit(':', 1)[1]
+                          for args, _ in mock_proc.call_args_list)
+
+        uve1 = {'A': {'x': 1, 'z': 1}, 'B': {'y': 2}}
+        self.assertEqual(['alarm1', 'alarm2', 'alarm3'],
+                         evaluated_alarms(uve1, None))
+        self.assertEqual(3, len(self._ag.tab_alarms[table][uve_key]))
+
+        uve2 = {'A': {'x': 1, 'z': 2}, 'B': {'y': 2}}
+        changed = AlarmRuleIndex.changed_attrs(uve1, uve2)
+        self.assertEqual({'A': set(['z'])}, changed)
+        self.assertEqual(['alarm3'], evaluated_alarms(uve2, changed))
+
+        uve3 = {'A': {'x': 1, 'z': 2}}
+        changed = AlarmRuleIndex.changed_attrs(uve2, uve3)
+        self.assertEqual({'B': None}, changed)
+        self.assertEqual(['alarm2'], evaluated_alarms(uve3, changed))
+        # The alarms that were not evaluated keep their state
+        self.assertEqual(
+            set(['default-global-system-config:alarm1',
+                 'default-global-system-config:alarm3']),
+            set(self._ag.tab_alarms[table][uve_key].keys()))
+    # end test_07_examine_uve_for_changed_attrs
+
 
 # end class TestAlarmGen
 
@@ -53,7 +53,7 @@ class LogQuerierTest(unittest.TestCase):
         if result == [] or result is None:
             return
         try:
-            self.assertTrue(result == query_result[test_num])
+            self.assertTrue(list(result) == query_result[test_num])
         except KeyError:
             self.assertTrue(False)
 
@@ -215,5 +215,15 @@ class LogQuerierTest(unittest.TestCase):
         del query_list[2]['end_time']
         self.assertEqual(expected_result_dict, query_list[2])
 
+    #@unittest.skip("skip test_7_read_result")
+    def test_7_read_result(self):
+        rows = [{'MessageTS': 1440614454006185 + i, 'Source': 'a6s45',
+                 'Messagetype': 'GeneratorDbStatsUve'} for i in range(5)]
+        # the rows are read back from the spool as they are consumed
+        result = self._querier.read_result(iter(rows))
+        self.assertFalse(isinstance(result, list))
+        self.assertEqual(list(result), rows)
+        self.assertEqual(self._querier.read_result(iter([])), [])
+
 if __name__ == '__main__':
     unittest.main()
@@ -18,7 +18,7 @@ import unittest
 import pdb
 import json
 
-from opserver.uveserver import UVEServer
+from opserver.uveserver import UVEServer, RedisInst, RedisInstKey
 from opserver.uveserver import ParallelAggregator
 from opserver.opserver_util import OpServerUtils
 
@@ -30,6 +30,42 @@ class RedisMock(object):
     pass
 
 
+class FakeRedis(object):
+    def __init__(self):
+        self.sets = {}
+        self.hashes = {}
+        self.executes = 0
+
+    def add_uve(self, key, origin, values):
+        self.sets.setdefault('ORIGINS:' + key, set()).add(origin)
+        self.hashes['VALUES:' + key + ':' + origin] = values
+
+    def smembers(self, key):
+        return set(self.sets.get(key, ()))
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def pipeline(self, transaction=True):
+        return FakeRedisPipeline(self)
+
+
+class FakeRedisPipeline(object):
+    def __init__(self, redish):
+        self._redish = redish
+        self._cmds = []
+
+    def smembers(self, key):
+        self._cmds.append((self._redish.smembers, key))
+
+    def hgetall(self, key):
+        self._cmds.append((self._redish.hgetall, key))
+
+    def execute(self):
+        self._redish.executes += 1
+        return [cmd(key) for cmd, key in self._cmds]
+
+
 def MakeBasic(typ, val, aggtype=None):
     item = {}
     item['@type'] = typ
@@ -427,5 +463,86 @@ class UVEServerTest(unittest.TestCase):
         self.assertEqual(in_stats, res['UVEVirtualNetwork']['in_stats'])
 
 
+    def test_get_uves_batched(self):
+        logging.info("%%% Running test_get_uves_batched %%%")
+
+        oss = UVEServer([], logging, batch_size=2)
+        redis_a = FakeRedis()
+        redis_b = FakeRedis()
+        keys = ['ObjectVNTable:vn%d' % i for i in range(5)]
+        for key in keys:
+            redis_a.add_uve(key, 'a:Config:contrail-api:0:UVEVirtualNetwork',
+                {'name': '<name type="string">%s</name>' % key})
+        redis_b.add_uve(keys[0], 'b:Config:contrail-api:0:UVEVirtualNetwork',
+            {'total_acl_rules': '<total_acl_rules type="i32">3'
+                                '</total_acl_rules>'})
+        for port, redish in ((1, redis_a), (2, redis_b)):
+            r_inst = RedisInst()
+            r_inst.redis_handle = redish
+            r_inst.collector_pid = '127.0.0.1:Analytics:contrail-collector:0'
+            oss._redis_uve_map[RedisInstKey(ip='127.0.0.1', port=port)] = \
+                r_inst
+
+        res = list(oss.get_uves(keys + ['ObjectVNTable:none'], True))
+        # ORIGINS and VALUES lookups of a batch pipelined together
+        self.assertEqual(redis_a.executes, 6)
+        self.assertEqual(redis_b.executes, 4)
+        self.assertEqual([key for key, _, _ in res],
+                         keys + ['ObjectVNTable:none'])
+        self.assertFalse(any(failures for _, failures, _ in res))
+        self.assertEqual(res[0][2], {'UVEVirtualNetwork': {
+            'name': keys[0], 'total_acl_rules': 3}})
+        self.assertEqual(res[4][2], {'UVEVirtualNetwork': {'name': keys[4]}})
+        self.assertEqual(res[5][2], {})
+        self.assertEqual(oss.get_uve(keys[4], True), (False, res[4][2]))
+
+    def test_get_uves_cached(self):
+        logging.info("%%% Running test_get_uves_cached %%%")
+
+        class FakeUveStream(object):
+            def set_change_callback(self, cb):
+                self.change_callback = cb
+
+        stream = FakeUveStream()
+        oss = UVEServer([], logging, uvedbcache=stream, usecache=True)
+        redish = FakeRedis()
+        keys = ['ObjectVNTable:vn%d' % i for i in range(3)]
+        for key in keys:
+            redish.add_uve(key, 'a:Config:contrail-api:0:UVEVirtualNetwork',
+                {'total_acl_rules': '<total_acl_rules type="i32">3'
+                                    '</total_acl_rules>'})
+        r_inst = RedisInst()
+        r_inst.redis_handle = redish
+        r_inst.collector_pid = '127.0.0.1:Analytics:contrail-collector:0'
+        oss._redis_uve_map[RedisInstKey(ip='127.0.0.1', port=1)] = r_inst
+
+        # the same raw value is parsed once
+        res = list(oss.get_uves(keys, False))
+        self.assertEqual(redish.executes, 2)
+        self.assertEqual(oss.cache_stats()[0], ('parse', 1, 47, 2, 1))
+        self.assertEqual(res[2][2]['UVEVirtualNetwork']['total_acl_rules'],
+            [[{'@type': 'i32', '#text': '3'},
+              'a:Config:contrail-api:0:UVEVirtualNetwork']])
+
+        # aggregated UVEs are served from the cache until they change
+        self.assertEqual(list(oss.get_uves(keys, False)), res)
+        self.assertEqual(redish.executes, 2)
+        redish.add_uve(keys[1], 'a:Config:contrail-api:0:UVEVirtualNetwork',
+            {'total_acl_rules': '<total_acl_rules type="i32">4'
+                                '</total_acl_rules>'})
+        stream.change_callback(keys[1])
+        res2 = list(oss.get_uves(keys, False))
+        self.assertEqual(redish.executes, 4)
+        self.assertEqual(res2[0], res[0])
+        self.assertEqual(res2[1][2]['UVEVirtualNetwork']['total_acl_rules'],
+            [[{'@type': 'i32', '#text': '4'},
+              'a:Config:contrail-api:0:UVEVirtualNetwork']])
+        self.assertEqual(oss.cache_stats()[1], ('result', 3, None, 5, 4))
+
+        # other queries of the same UVE are cached separately
+        oss.get_uve(keys[0], False, {'cfilt': {'UVEVirtualNetwork': set()}})
+        self.assertEqual(redish.executes, 6)
+
+
 if __name__ == '__main__':
     unittest.main()
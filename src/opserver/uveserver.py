@@ -15,6 +15,8 @@ import xmltodict
 import redis
 import datetime
 import sys
+import itertools
+import time
 from opserver_util import OpServerUtils
 import re
 from gevent.lock import BoundedSemaphore
@@ -24,7 +26,7 @@ from sandesh.viz.constants import UVE_MAP
 from pysandesh.gen_py.process_info.ttypes import ConnectionType,\
      ConnectionStatus
 import traceback
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 
 RedisInfo = namedtuple("RedisInfo",["ip","port","pid"])
 
@@ -35,11 +37,132 @@ class RedisInst(object):
         self.collector_pid = None
         self.deleted = False
 
+class UVEParseCache(object):
+    """
+    Bounded LRU of parsed UVE attributes, keyed by the raw Sandesh XML
+    value read from redis. The parsed values are shared by all the readers
+    and must not be modified. The size in bytes is that of the raw values.
+    """
+
+    def __init__(self, max_entries, max_bytes):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, value):
+        parsed = self._entries.pop(value, None)
+        if parsed is None:
+            self.misses += 1
+            return None
+        self._entries[value] = parsed
+        self.hits += 1
+        return parsed
+
+    def put(self, value, parsed):
+        if len(value) > self._max_bytes or self._max_entries <= 0:
+            return
+        if value not in self._entries:
+            self.bytes += len(value)
+        self._entries[value] = parsed
+        while len(self._entries) > self._max_entries or \
+                self.bytes > self._max_bytes:
+            old, _ = self._entries.popitem(last=False)
+            self.bytes -= len(old)
+# end class UVEParseCache
+
+class UVEResultCache(object):
+    """
+    Aggregated UVEs by key and query. An entry is kept until the UVE stream
+    reports a change of its key, or for at most ttl seconds.
+    Reads that were in flight when their key changed are not stored.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self._max_entries = max_entries
+        self._ttl = ttl
+        # (key, query) -> (expiry time, UVE)
+        self._entries = OrderedDict()
+        # key -> set of queries in _entries
+        self._queries = {}
+        # key -> sequence number of its last change
+        self._changes = OrderedDict()
+        # reads started at or before this forgotten change are not stored
+        self._floor = -1
+        self._seq = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def query(flat, filters, base_url):
+        def freeze(obj):
+            if isinstance(obj, dict):
+                return frozenset((k, freeze(v)) for k, v in obj.iteritems())
+            if isinstance(obj, (list, tuple, set, frozenset)):
+                return frozenset(freeze(v) for v in obj)
+            return obj
+        return (flat, freeze(filters), base_url)
+
+    def seq(self):
+        return self._seq
+
+    def get(self, key, query):
+        entry = self._entries.get((key, query))
+        if entry is not None and entry[0] < time.time():
+            self._remove(key, query)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key, query, uve, seq):
+        if self._max_entries <= 0 or seq <= self._floor or \
+                self._changes.get(key, -1) >= seq:
+            return
+        if (key, query) not in self._entries:
+            self._queries.setdefault(key, set()).add(query)
+        self._entries[(key, query)] = (time.time() + self._ttl, uve)
+        while len(self._entries) > self._max_entries:
+            (okey, oquery), _ = self._entries.popitem(last=False)
+            self._forget(okey, oquery)
+
+    def invalidate(self, key):
+        self._changes.pop(key, None)
+        self._changes[key] = self._seq
+        self._seq += 1
+        while len(self._changes) > self._max_entries:
+            _, self._floor = self._changes.popitem(last=False)
+        for query in self._queries.pop(key, ()):
+            del self._entries[(key, query)]
+
+    def _remove(self, key, query):
+        del self._entries[(key, query)]
+        self._forget(key, query)
+
+    def _forget(self, key, query):
+        queries = self._queries[key]
+        queries.discard(query)
+        if not queries:
+            del self._queries[key]
+# end class UVEResultCache
+
 class UVEServer(object):
 
     def __init__(self, redis_uve_list, logger,
             redis_password=None, \
-            uvedbcache=None, usecache=False, freq=5):
+            uvedbcache=None, usecache=False, freq=5, batch_size=100,
+            parse_cache_size=100000, parse_cache_bytes=64 << 20,
+            result_cache_size=10000, result_cache_ttl=60):
         self._logger = logger
         self._redis = None
         self._uvedbcache = uvedbcache
@@ -47,6 +170,16 @@ class UVEServer(object):
         self._redis_password = redis_password
         self._uve_reverse_map = {}
         self._freq = freq
+        # number of UVE keys read with one pipelined redis lookup
+        self._batch_size = max(batch_size, 1)
+        self._parse_cache = UVEParseCache(parse_cache_size, parse_cache_bytes)
+        # Aggregated UVEs can only be cached when the UVE stream reports
+        # their changes
+        self._result_cache = None
+        if uvedbcache is not None and usecache and result_cache_size > 0:
+            self._result_cache = UVEResultCache(result_cache_size,
+                                                result_cache_ttl)
+            uvedbcache.set_change_callback(self._result_cache.invalidate)
 
         for h,m in UVE_MAP.iteritems():
             self._uve_reverse_map[m] = h
@@ -71,6 +204,16 @@ class UVEServer(object):
             redis_uve_info.status = 'Connected'
     #end fill_redis_uve_info
 
+    def cache_stats(self):
+        # [(name, entries, bytes, hits, misses)] of the UVE caches
+        stats = [('parse', len(self._parse_cache), self._parse_cache.bytes,
+                  self._parse_cache.hits, self._parse_cache.misses)]
+        if self._result_cache is not None:
+            stats.append(('result', len(self._result_cache), None,
+                          self._result_cache.hits, self._result_cache.misses))
+        return stats
+    # end cache_stats
+
     def redis_instances(self):
         ril = []
         for rkey,rinst in self._redis_uve_map.iteritems():
@@ -211,142 +354,233 @@ class UVEServer(object):
         return tables
 
     def get_uve(self, key, flat, filters=None, base_url=None):
+        for _, failures, rsp in self.get_uves([key], flat, filters, base_url):
+            return failures, rsp
+    # end get_uve
 
+    def get_uves(self, keys, flat, filters=None, base_url=None):
+        """
+        Generator of (key, failures, UVE) for the given UVE keys.
+        The keys are read in batches of batch_size, each batch costing two
+        pipelined round trips per collector redis instance, one for the
+        ORIGINS and one for the VALUES. The instances are read concurrently.
+        UVEs found in the result cache are not read again.
+        """
         filters = filters or {}
         sfilter = filters.get('sfilt')
         mfilter = filters.get('mfilt')
-        tfilter = filters.get('cfilt')
-        ackfilter = filters.get('ackfilt')
         if flat and not sfilter and not mfilter and self._usecache:
-            return self._uvedbcache.get_uve(key, filters)
-
-        is_alarm = False
-        if tfilter == "UVEAlarms": 
-            is_alarm = True
+            for key in keys:
+                failures, rsp = self._uvedbcache.get_uve(key, filters)
+                yield key, failures, rsp
+            return
+
+        results = self._result_cache
+        if results is not None:
+            query = results.query(flat, filters, base_url)
+        keys = iter(keys)
+        while True:
+            batch = list(itertools.islice(keys, self._batch_size))
+            if not batch:
+                break
+            cached = {}
+            if results is not None:
+                for key in batch:
+                    rsp = results.get(key, query)
+                    if rsp is not None:
+                        cached[key] = rsp
+            missed = [key for key in batch if key not in cached]
+            if missed:
+                if results is not None:
+                    seq = results.seq()
+                failures, state = self._read_uves(missed, filters)
+                pa = ParallelAggregator(state, self._uve_reverse_map)
+            for key in batch:
+                if key in cached:
+                    yield key, False, cached[key]
+                    continue
+                rsp = pa.aggregate(key, flat, base_url)
+                self._logger.debug("Computed %s as %s" % (key, rsp.keys()))
+                if results is not None and not failures:
+                    results.put(key, query, rsp, seq)
+                yield key, failures, rsp
+    # end get_uves
+
+    def _read_uves(self, keys, filters):
+        state = dict((key, {}) for key in keys)
+        instances = [(r_key, r_inst) for r_key, r_inst in
+                     self._redis_uve_map.items()
+                     if r_inst.redis_handle is not None and
+                     r_inst.collector_pid is not None]
+        if len(instances) == 1:
+            r_key, r_inst = instances[0]
+            values = [self._read_uve_values(r_key, r_inst, keys, filters)]
+        else:
+            readers = [gevent.spawn(self._read_uve_values, r_key, r_inst,
+                                    keys, filters)
+                       for r_key, r_inst in instances]
+            gevent.joinall(readers)
+            values = [reader.value for reader in readers]
 
-        state = {}
-        state[key] = {}
-        rsp = {}
         failures = False
-
-        tab = key.split(":",1)[0]
-
-        for r_key, r_inst in self._redis_uve_map.iteritems():
-            if r_inst.redis_handle is None or r_inst.collector_pid is None:
+        for (r_key, r_inst), uve_values in zip(instances, values):
+            if uve_values is None:
+                failures = True
                 continue
-            else:
-                redish = r_inst.redis_handle
             try:
-                qmap = {}
+                for key, origs, odict in uve_values:
+                    self._add_uve_values(state, key, origs, odict, filters)
+            except Exception as e:
+                self._logger.error("redis-uve failed %s for keys %s: (%s,%s) tb %s" \
+                               % (str(e), keys, str(r_key), str(r_inst.collector_pid),\
+                                  traceback.format_exc()))
+                failures = True
+        return failures, state
+    # end _read_uves
 
-                ppe = redish.pipeline()
+    def _read_uve_values(self, r_key, r_inst, keys, filters):
+        # Returns the [(key, origin, values)] of the keys on this instance,
+        # or None on failure
+        tfilter = filters.get('cfilt')
+        is_alarm = tfilter == "UVEAlarms"
+        try:
+            redish = r_inst.redis_handle
+            ppe = redish.pipeline(transaction=False)
+            for key in keys:
                 ppe.smembers("ALARM_ORIGINS:" + key)
                 if not is_alarm:
                     ppe.smembers("ORIGINS:" + key)
-                pperes = ppe.execute()
+            pperes = iter(ppe.execute())
+
+            key_origins = []
+            for key in keys:
+                origsets = [next(pperes)]
+                if not is_alarm:
+                    origsets.append(next(pperes))
                 origins = set()
-                for origset in pperes:
+                for origset in origsets:
                     for smt in origset:
-                        tt = smt.rsplit(":",1)[1]
-                        sm = smt.rsplit(":",1)[0]
-                        source = sm.split(":", 1)[0]
-                        mdule = sm.split(":", 1)[1]
-                        if tfilter is not None:
-                            if tt not in tfilter:
-                                continue
-                        if sfilter is not None:
-                            if sfilter != source:
-                                continue
-                        if mfilter is not None:
-                            if mfilter != mdule:
-                                continue
-                        origins.add(smt)
-
-                ppeval = redish.pipeline()
+                        if self._uve_origin_match(smt, filters):
+                            origins.add(smt)
+                key_origins.append((key, origins))
+
+            if not any(origins for _, origins in key_origins):
+                return []
+            ppeval = redish.pipeline(transaction=False)
+            for key, origins in key_origins:
                 for origs in origins:
                     ppeval.hgetall("VALUES:" + key + ":" + origs)
-                odictlist = ppeval.execute()
+            odictlist = iter(ppeval.execute())
+            return [(key, origs, next(odictlist))
+                    for key, origins in key_origins for origs in origins]
+        except Exception as e:
+            self._logger.error("redis-uve failed %s for keys %s: (%s,%s) tb %s" \
+                           % (str(e), keys, str(r_key), str(r_inst.collector_pid),\
+                              traceback.format_exc()))
+            return None
+    # end _read_uve_values
 
-                idx = 0    
-                for origs in origins:
+    @staticmethod
+    def _uve_origin_match(smt, filters):
+        tfilter = filters.get('cfilt')
+        sfilter = filters.get('sfilt')
+        mfilter = filters.get('mfilt')
+        tt = smt.rsplit(":",1)[1]
+        sm = smt.rsplit(":",1)[0]
+        source = sm.split(":", 1)[0]
+        mdule = sm.split(":", 1)[1]
+        if tfilter is not None:
+            if tt not in tfilter:
+                return False
+        if sfilter is not None:
+            if sfilter != source:
+                return False
+        if mfilter is not None:
+            if mfilter != mdule:
+                return False
+        return True
+    # end _uve_origin_match
 
-                    odict = odictlist[idx]
-                    idx = idx + 1
+    def _add_uve_values(self, state, key, origs, odict, filters):
+        tfilter = filters.get('cfilt')
+        ackfilter = filters.get('ackfilt')
 
-                    info = origs.rsplit(":", 1)
-                    dsource = info[0]
-                    typ = info[1]
+        info = origs.rsplit(":", 1)
+        dsource = info[0]
+        typ = info[1]
 
-                    afilter_list = set()
-                    if tfilter is not None:
-                        afilter_list = tfilter[typ]
+        afilter_list = set()
+        if tfilter is not None:
+            afilter_list = tfilter[typ]
 
-                    for attr, value in odict.iteritems():
-                        if len(afilter_list):
-                            if attr not in afilter_list:
-                                continue
+        for attr, value in odict.iteritems():
+            if len(afilter_list):
+                if attr not in afilter_list:
+                    continue
 
-                        if value[0] == '<':
-                            try:
-                                snhdict = xmltodict.parse(value)
-                            except:
-                                self._logger.error("xml parsing failed key %s, struct %s: %s" \
-                                    % (key, typ, str(value)))
-                                continue
+            if value[0] == '<':
+                aval = self._parse_uve_value(attr, value)
+                if aval is None:
+                    self._logger.error("xml parsing failed key %s, struct %s: %s" \
+                        % (key, typ, str(value)))
+                    continue
 
-                            if snhdict[attr]['@type'] == 'list':
-                                sname = ParallelAggregator.get_list_name(
-                                        snhdict[attr])
-                                if snhdict[attr]['list']['@size'] == '0':
-                                    continue
-                                elif snhdict[attr]['list']['@size'] == '1':
-                                    if not isinstance(
-                                        snhdict[attr]['list'][sname], list):
-                                        snhdict[attr]['list'][sname] = [
-                                            snhdict[attr]['list'][sname]]
-                                if typ == 'UVEAlarms' and attr == 'alarms' and \
-                                        ackfilter is not None:
-                                    alarms = []
-                                    for alarm in snhdict[attr]['list'][sname]:
-                                        ack_attr = alarm.get('ack')
-                                        if ack_attr:
-                                            ack = ack_attr['#text']
-                                        else:
-                                            ack = 'false'
-                                        if ack == ackfilter:
-                                            alarms.append(alarm)
-                                    if not len(alarms):
-                                        continue
-                                    snhdict[attr]['list'][sname] = alarms
-                                    snhdict[attr]['list']['@size'] = \
-                                        str(len(alarms))
-                        else:
+                if aval['@type'] == 'list':
+                    sname = ParallelAggregator.get_list_name(aval)
+                    if aval['list']['@size'] == '0':
+                        continue
+                    if typ == 'UVEAlarms' and attr == 'alarms' and \
+                            ackfilter is not None:
+                        alarms = []
+                        for alarm in aval['list'][sname]:
+                            ack_attr = alarm.get('ack')
+                            if ack_attr:
+                                ack = ack_attr['#text']
+                            else:
+                                ack = 'false'
+                            if ack == ackfilter:
+                                alarms.append(alarm)
+                        if not len(alarms):
                             continue
-
-                        # print "Attr %s Value %s" % (attr, snhdict)
-                        if typ not in state[key]:
-                            state[key][typ] = {}
-                        if attr not in state[key][typ]:
-                            state[key][typ][attr] = {}
-                        if dsource in state[key][typ][attr]:
-                            self._logger.debug(\
-                            "Found Dup %s:%s:%s:%s:%s = %s" % \
-                                (key, typ, attr, source, mdule, state[
-                                key][typ][attr][dsource]))
-                        state[key][typ][attr][dsource] = snhdict[attr]
-
-                pa = ParallelAggregator(state, self._uve_reverse_map)
-                rsp = pa.aggregate(key, flat, base_url)
-            except Exception as e:
-                self._logger.error("redis-uve failed %s for key %s: (%s,%s) tb %s" \
-                               % (str(e), key, str(r_key), str(r_inst.collector_pid),\
-                                  traceback.format_exc()))
-                failures = True
+                        # aval is shared through the parse cache
+                        alist = dict(aval['list'])
+                        alist[sname] = alarms
+                        alist['@size'] = str(len(alarms))
+                        aval = dict(aval)
+                        aval['list'] = alist
             else:
-                self._logger.debug("Computed %s as %s" % (key,rsp.keys()))
+                continue
 
-        return failures, rsp
-    # end get_uve
+            # print "Attr %s Value %s" % (attr, snhdict)
+            if typ not in state[key]:
+                state[key][typ] = {}
+            if attr not in state[key][typ]:
+                state[key][typ][attr] = {}
+            if dsource in state[key][typ][attr]:
+                self._logger.debug(\
+                "Found Dup %s:%s:%s = %s" % \
+                    (key, typ, attr, state[key][typ][attr][dsource]))
+            state[key][typ][attr][dsource] = aval
+    # end _add_uve_values
+
+    def _parse_uve_value(self, attr, value):
+        # Returns the parsed Sandesh XML value of attr, or None if it
+        # cannot be parsed. Single element lists are returned as lists.
+        aval = self._parse_cache.get(value)
+        if aval is not None:
+            return aval
+        try:
+            snhdict = xmltodict.parse(value)
+        except:
+            return None
+        aval = snhdict[attr]
+        if aval['@type'] == 'list' and aval['list']['@size'] == '1':
+            sname = ParallelAggregator.get_list_name(aval)
+            if not isinstance(aval['list'][sname], list):
+                aval['list'][sname] = [aval['list'][sname]]
+        self._parse_cache.put(value, aval)
+        return aval
+    # end _parse_uve_value
 
     def get_uve_regex(self, key):
         regex = ''
@@ -393,13 +627,13 @@ class UVEServer(object):
             # so we don't pass them here
             uve_list = self.get_uve_list(table, filters, False)
 
-        for uve_name in uve_list:
-            _,uve_val = self.get_uve(
-                table + ':' + uve_name, flat, filters,  base_url)
+        uve_keys = (table + ':' + uve_name for uve_name in uve_list)
+        for uve_key, _, uve_val in self.get_uves(uve_keys, flat, filters,
+                                                 base_url):
             if uve_val == {}:
                 continue
             else:
-                uve = {'name': uve_name, 'value': uve_val}
+                uve = {'name': uve_key[len(table) + 1:], 'value': uve_val}
                 yield uve
 
     # end multi_uve_get